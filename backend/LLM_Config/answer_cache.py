@@ -0,0 +1,175 @@
+"""
+Semantic answer cache: serves a stored answer for a near-identical question.
+
+- Scope: tenant + the exact set of collection ids the user may query; an entry
+  is never served across scopes.
+- Match: cosine similarity of the query embeddings >= ANSWER_CACHE_SIMILARITY,
+  same rule/classifier intent, and the same numbers in both questions (years,
+  amounts), since "leave days in 2023" and "... in 2024" embed almost identically.
+- Freshness: each entry records the ingest generation of every collection in
+  scope (Collection.content_generation, bumped in the database on every indexed
+  or deleted document, so all workers see it) when its answer was computed; any
+  later write to one of them retires it. Entries also expire after ANSWER_CACHE_TTL_S.
+- Bounded to ANSWER_CACHE_MAX_PER_SCOPE entries per scope (oldest dropped first).
+"""
+
+import os
+import re
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.93"))
+ANSWER_CACHE_TTL_S = float(os.getenv("ANSWER_CACHE_TTL_S", "86400"))
+ANSWER_CACHE_MAX_PER_SCOPE = int(os.getenv("ANSWER_CACHE_MAX_PER_SCOPE", "256"))
+
+# Answers that depend on the conversation or on "the previous answer" are not cached
+UNCACHEABLE_INTENTS = {"CHITCHAT", "CAPABILITIES", "FOLLOWUP_ELABORATE", "IMPLICATIONS", "STRATEGY"}
+
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+
+Scope = Tuple[str, Tuple[str, ...]]
+Generations = Tuple[Tuple[str, int], ...]
+
+
+def answer_cache_scope(tenant_id: str, collection_ids: Sequence[str]) -> Scope:
+    return tenant_id, tuple(sorted(set(collection_ids)))
+
+
+def _numbers(text: str) -> frozenset:
+    return frozenset(n.replace(",", "") for n in _NUMBER_RE.findall(text or ""))
+
+
+def _unit(vector: Sequence[float]) -> np.ndarray:
+    vec = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else vec
+
+
+class SemanticAnswerCache:
+    def __init__(
+        self,
+        similarity: float = ANSWER_CACHE_SIMILARITY,
+        ttl_s: float = ANSWER_CACHE_TTL_S,
+        max_per_scope: int = ANSWER_CACHE_MAX_PER_SCOPE,
+    ):
+        self.similarity = similarity
+        self.ttl_s = ttl_s
+        self.max_per_scope = max_per_scope
+        self._entries: Dict[Scope, List[dict]] = {}
+        self._matrices: Dict[Scope, np.ndarray] = {}
+        self._stats = {"hits": 0, "misses": 0, "stored": 0, "stale": 0}
+        self._tenant_stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, scope: Scope, name: str, n: int = 1) -> None:
+        self._stats[name] += n
+        per_tenant = self._tenant_stats.setdefault(scope[0], {"hits": 0, "misses": 0, "stored": 0, "stale": 0})
+        per_tenant[name] += n
+
+    def _matrix(self, scope: Scope) -> np.ndarray:
+        matrix = self._matrices.get(scope)
+        if matrix is None:
+            matrix = np.vstack([e["embedding"] for e in self._entries[scope]])
+            self._matrices[scope] = matrix
+        return matrix
+
+    def _drop(self, scope: Scope, keep: List[dict]) -> None:
+        if keep:
+            self._entries[scope] = keep
+        else:
+            self._entries.pop(scope, None)
+        self._matrices.pop(scope, None)
+
+    def lookup(
+        self,
+        scope: Scope,
+        embedding: Sequence[float],
+        question: str,
+        intent: str,
+        generations: Generations,
+    ) -> Optional[dict]:
+        """
+        Best fresh entry for this question, with its "similarity"; None on a miss.
+        """
+        entries = self._entries.get(scope)
+        if not entries:
+            self._count(scope, "misses")
+            return None
+
+        now = time.time()
+        fresh = [e for e in entries if e["generations"] == generations and now - e["stored_at"] <= self.ttl_s]
+        if len(fresh) != len(entries):
+            self._count(scope, "stale", len(entries) - len(fresh))
+            self._drop(scope, fresh)
+            if not fresh:
+                self._count(scope, "misses")
+                return None
+
+        scores = self._matrix(scope) @ _unit(embedding)
+        numbers = _numbers(question)
+        for idx in np.argsort(scores)[::-1]:
+            if scores[idx] < self.similarity:
+                break
+            entry = fresh[idx]
+            if entry["intent"] == intent and entry["numbers"] == numbers:
+                self._count(scope, "hits")
+                entry["hits"] += 1
+                return {**entry, "similarity": round(float(scores[idx]), 4)}
+
+        self._count(scope, "misses")
+        return None
+
+    def store(
+        self,
+        scope: Scope,
+        embedding: Sequence[float],
+        question: str,
+        intent: str,
+        generations: Generations,
+        answer: str,
+        sources: List[str],
+    ) -> dict:
+        """
+        Add an answer; returns the entry (chart_specs can be filled in later).
+        """
+        entry = {
+            "embedding": _unit(embedding),
+            "question": question,
+            "numbers": _numbers(question),
+            "intent": intent,
+            "generations": generations,
+            "answer": answer,
+            "sources": list(sources),
+            "chart_specs": None,
+            "stored_at": time.time(),
+            "hits": 0,
+        }
+        entries = self._entries.get(scope, []) + [entry]
+        self._drop(scope, entries[-self.max_per_scope:])
+        self._count(scope, "stored")
+        return entry
+
+    def stats(self, tenant_id: Optional[str] = None) -> dict:
+        if tenant_id is not None:
+            counts = dict(self._tenant_stats.get(tenant_id, {"hits": 0, "misses": 0, "stored": 0, "stale": 0}))
+            scopes = [s for s in self._entries if s[0] == tenant_id]
+        else:
+            counts = dict(self._stats)
+            scopes = list(self._entries)
+        lookups = counts["hits"] + counts["misses"]
+        return {
+            **counts,
+            "entries": sum(len(self._entries[s]) for s in scopes),
+            "scopes": len(scopes),
+            "hit_rate": round(counts["hits"] / lookups, 4) if lookups else None,
+        }
+
+
+answer_cache = SemanticAnswerCache()
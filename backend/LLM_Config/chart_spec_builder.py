@@ -0,0 +1,385 @@
+"""
+Deterministic chart specs from the tables in an answer (replaces the chart-spec LLM call).
+
+- Sources: Markdown/pipe tables in the answer, then bulleted "label: number" series
+  (3+ items) in the answer, then the exact-figure tables the tabular store built
+  for the question.
+- x axis: the first time-like column (year, month, quarter, date, ...; a Year + Month
+  pair becomes one "period" column), else the first text column; total rows are dropped.
+- y axis: numeric columns (currency, thousands separators, %, k/m/bn suffixes and
+  "(1,200)" negatives are parsed), preferring the ones named in the question; columns
+  with different units (amounts, percentages, plain counts) go into separate charts;
+  identifier columns (ID, code, "... No") are not charted.
+- Output matches CHART_SPEC_SYSTEM_PROMPT: chart_type "line" for a time-like x and
+  "bar" otherwise, snake_case field names, at most 3 y_fields per chart and 3 charts.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+MAX_CHARTS = 3
+MAX_Y_FIELDS = 3
+MIN_POINTS = 2
+MIN_SERIES_ITEMS = 3
+# Share of the non-empty cells of a column that must parse as numbers
+NUMERIC_COLUMN_RATIO = 0.8
+
+_TABLE_SEP_CELL_RE = re.compile(r"^:?-+:?$")
+_HEADING_RE = re.compile(r"^\s{0,3}#{1,6}\s*(.*?)\s*#*\s*$")
+_BOLD_LABEL_RE = re.compile(r"^\*\*([^*]{1,80}?):?\*\*:?$")
+
+_CURRENCY_CODES = {"USD", "EUR", "GBP", "NGN"}
+_NUMBER_RE = re.compile(
+    r"^(?P<neg>-)?\s*(?P<cur>[$€£₦]|(?:USD|EUR|GBP|NGN)\b)?\s*(?P<neg2>-)?\s*"
+    r"(?P<num>\d[\d,]*(?:\.\d+)?|\.\d+)\s*"
+    r"(?P<suffix>%|k|m|mn|bn|b|thousand|million|billion)?\s*"
+    r"(?P<cur2>[$€£₦]|(?:USD|EUR|GBP|NGN)\b)?$",
+    re.IGNORECASE,
+)
+_MULTIPLIERS = {
+    "k": 1e3, "thousand": 1e3,
+    "m": 1e6, "mn": 1e6, "million": 1e6,
+    "b": 1e9, "bn": 1e9, "billion": 1e9,
+}
+
+_TIME_HEADER_WORDS = {
+    "date", "day", "week", "month", "quarter", "year", "period", "fy", "time", "qtr",
+}
+# Identifier columns ("Employee ID", "Invoice No", "Account Number") are never y fields;
+# "Number of staff" still is
+_ID_HEADER_WORDS = {"id", "ids", "code", "ref", "sku", "uuid"}
+_ID_HEADER_LAST_WORDS = {"number", "no", "num"}
+_MONTHS = (
+    "jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec|january|february|march|april|"
+    "june|july|august|september|october|november|december"
+)
+_TIME_VALUE_RE = re.compile(
+    rf"^(?:(?:19|20)\d\d(?:[-/.]\d{{1,2}}(?:[-/.]\d{{1,2}})?)?"
+    rf"|\d{{1,2}}[-/.]\d{{1,2}}[-/.](?:19|20)?\d\d"
+    rf"|(?:fy\s?)?(?:19|20)\d\d(?:\s?[-/]?\s?q[1-4])?"
+    rf"|q[1-4](?:\s?[-/]?\s?(?:fy\s?)?(?:19|20)?\d\d)?"
+    rf"|h[12](?:\s?(?:19|20)\d\d)?"
+    rf"|(?:{_MONTHS})\.?(?:[\s,-]+(?:19|20)?\d\d)?"
+    rf"|week\s?\d{{1,2}})$",
+    re.IGNORECASE,
+)
+_TOTAL_ROW_RE = re.compile(r"^(?:grand\s+)?(?:total|sum|overall)\b", re.IGNORECASE)
+_SERIES_ITEM_RE = re.compile(
+    r"^\s*(?:[-*+•·–]|\d{1,3}[.)])\s+(?:\*\*)?(?P<label>[^:*|]{1,60}?)(?:\*\*)?\s*[:=]\s*"
+    r"(?:\*\*)?(?P<value>[^\s*][^*]*?)(?:\*\*)?\s*(?:\((?P<note>[^)]{0,60})\))?\.?\s*$"
+)
+# Aggregate summary emitted by TenantTabularStore.build_numeric_context (not a series)
+_AGGREGATE_HEADER = ["metric", "total", "average", "min", "max"]
+
+Table = Tuple[List[str], List[List[str]], Optional[str]]
+
+
+def _strip_markup(text: str) -> str:
+    return re.sub(r"[*_`]", "", text or "").strip()
+
+
+def snake_case(label: str) -> str:
+    text = re.sub(r"[^0-9a-zA-Z]+", "_", _strip_markup(label).lower()).strip("_")
+    return text or "value"
+
+
+def _split_cells(row: str) -> List[str]:
+    row = row.strip()
+    if row.startswith("|"):
+        row = row[1:]
+    if row.endswith("|") and not row.endswith("\\|"):
+        row = row[:-1]
+    return [c.strip() for c in re.split(r"(?<!\\)\|", row)]
+
+
+def _is_separator(cells: List[str]) -> bool:
+    return bool(cells) and all(_TABLE_SEP_CELL_RE.match(c.replace(" ", "")) for c in cells)
+
+
+def _caption(line: str) -> Optional[str]:
+    line = line.strip()
+    m = _HEADING_RE.match(line)
+    if m and m.group(1) and line.startswith("#"):
+        return _strip_markup(m.group(1)).rstrip(":").strip() or None
+    m = _BOLD_LABEL_RE.match(line)
+    if m:
+        return m.group(1).strip().rstrip(":") or None
+    if line.endswith(":") and len(line) <= 100:
+        return _strip_markup(line).rstrip(":").strip() or None
+    return None
+
+
+def parse_number(cell: str) -> Optional[Tuple[float, str]]:
+    """
+    Parse a table cell as a number; returns (value, unit) or None.
+
+    unit is the currency symbol/code, "%" or "" for plain numbers.
+    """
+    text = _strip_markup(cell).replace("−", "-").replace(" ", " ")
+    negative = False
+    if text.startswith("(") and text.endswith(")"):
+        negative, text = True, text[1:-1].strip()
+    m = _NUMBER_RE.match(text)
+    if not m:
+        return None
+    number = m.group("num").replace(",", "")
+    try:
+        value = float(number)
+    except ValueError:
+        return None
+    suffix = (m.group("suffix") or "").lower()
+    value *= _MULTIPLIERS.get(suffix, 1.0)
+    if negative or m.group("neg") or m.group("neg2"):
+        value = -value
+    cur = m.group("cur") or m.group("cur2") or ""
+    unit = "%" if suffix == "%" else (cur.upper() if cur.upper() in _CURRENCY_CODES else cur)
+    return value, unit
+
+
+def _clean_value(value: float):
+    return int(value) if float(value).is_integer() and abs(value) < 1e15 else round(value, 4)
+
+
+def parse_markdown_tables(text: str) -> List[Table]:
+    """
+    Pipe tables in `text` as (header, rows, caption); caption is the nearest
+    heading / bold label / "...:" line above the table, if any.
+    """
+    tables: List[Table] = []
+    lines = (text or "").replace("\r\n", "\n").split("\n")
+    caption: Optional[str] = None
+    in_fence = False
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        if line.startswith("```"):
+            in_fence = not in_fence
+            i += 1
+            continue
+        if in_fence or not line.startswith("|"):
+            if line:
+                caption = _caption(line) or caption
+            i += 1
+            continue
+
+        block: List[List[str]] = []
+        while i < len(lines) and lines[i].strip().startswith("|"):
+            cells = _split_cells(lines[i])
+            if not _is_separator(cells):
+                block.append(cells)
+            i += 1
+        if len(block) >= 1 + MIN_POINTS:
+            header, rows = block[0], block[1:]
+            width = len(header)
+            rows = [(r + [""] * width)[:width] for r in rows]
+            tables.append((header, rows, caption))
+        caption = None
+    return tables
+
+
+def _is_time_header(header: str) -> bool:
+    words = set(snake_case(header).split("_"))
+    return bool(words & _TIME_HEADER_WORDS)
+
+
+def _is_time_column(header: str, values: List[str]) -> bool:
+    values = [_strip_markup(v) for v in values if _strip_markup(v)]
+    if not values:
+        return False
+    if _is_time_header(header):
+        return True
+    hits = sum(1 for v in values if _TIME_VALUE_RE.match(v))
+    return hits / len(values) >= NUMERIC_COLUMN_RATIO
+
+
+def _is_id_header(header: str) -> bool:
+    words = snake_case(header).split("_")
+    return bool(set(words) & _ID_HEADER_WORDS) or words[-1] in _ID_HEADER_LAST_WORDS or header.rstrip().endswith("#")
+
+
+def _numeric_column(values: List[str]) -> Optional[str]:
+    """
+    Unit of a numeric column ("" for plain numbers), or None if it is not numeric.
+    """
+    non_empty = [v for v in values if _strip_markup(v) not in ("", "-", "—", "–", "n/a", "N/A")]
+    if not non_empty:
+        return None
+    parsed = [parse_number(v) for v in non_empty]
+    numbers = [p for p in parsed if p is not None]
+    if len(numbers) / len(non_empty) < NUMERIC_COLUMN_RATIO:
+        return None
+    units = [u for _, u in numbers if u]
+    return max(set(units), key=units.count) if units else ""
+
+
+def _mentioned(header: str, question: str) -> bool:
+    words = [w for w in snake_case(header).split("_") if len(w) >= 3]
+    return any(w in question for w in words)
+
+
+def _y_label(labels: List[str], unit: str) -> str:
+    base = labels[0] if len(labels) == 1 else ("Percent" if unit == "%" else "Amount" if unit else "Value")
+    if unit and unit not in base:
+        return f"{base} ({unit})"
+    return base
+
+
+def _specs_from_table(table: Table, question: str) -> List[dict]:
+    header, rows, caption = table
+    header = [_strip_markup(h) or f"column {i + 1}" for i, h in enumerate(header)]
+    if [snake_case(h) for h in header] == _AGGREGATE_HEADER:
+        return []
+
+    # Year + Month columns (tabular store breakdowns) become one period column
+    if len(header) >= 3 and [snake_case(h) for h in header[:2]] == ["year", "month"]:
+        merged = []
+        for r in rows:
+            year, month = _strip_markup(r[0]), _strip_markup(r[1])
+            period = f"{year}-{int(month):02d}" if month.isdigit() else f"{month} {year}".strip()
+            merged.append([period, *r[2:]])
+        header, rows = ["Period", *header[2:]], merged
+
+    columns = list(zip(*rows))
+    x_idx: Optional[int] = None
+    for idx, h in enumerate(header):
+        if _is_time_column(h, list(columns[idx])):
+            x_idx = idx
+            break
+    if x_idx is None:
+        for idx in range(len(header)):
+            if _numeric_column(list(columns[idx])) is None:
+                x_idx = idx
+                break
+    if x_idx is None:
+        return []
+    time_like = _is_time_column(header[x_idx], list(columns[x_idx]))
+
+    rows = [
+        r for r in rows
+        if _strip_markup(r[x_idx]) and not _TOTAL_ROW_RE.match(_strip_markup(r[x_idx]))
+    ]
+    if len(rows) < MIN_POINTS:
+        return []
+
+    # Numeric columns grouped by unit, question-mentioned ones first
+    groups: Dict[str, List[int]] = {}
+    for idx, h in enumerate(header):
+        if idx == x_idx or _is_id_header(h):
+            continue
+        unit = _numeric_column([r[idx] for r in rows])
+        if unit is not None:
+            groups.setdefault(unit, []).append(idx)
+    if not groups:
+        return []
+
+    x_field = snake_case(header[x_idx])
+    specs: List[dict] = []
+    ordered = sorted(
+        groups.items(),
+        key=lambda g: -sum(1 for idx in g[1] if _mentioned(header[idx], question)),
+    )
+    for unit, idxs in ordered:
+        idxs = sorted(idxs, key=lambda idx: not _mentioned(header[idx], question))[:MAX_Y_FIELDS]
+        y_fields = []
+        for idx in idxs:
+            field = snake_case(header[idx])
+            if field == x_field or field in y_fields:
+                field = f"{field}_{idx}"
+            y_fields.append(field)
+
+        data = []
+        for r in rows:
+            point = {x_field: _strip_markup(r[x_idx])}
+            for field, idx in zip(y_fields, idxs):
+                parsed = parse_number(r[idx])
+                point[field] = _clean_value(parsed[0]) if parsed else None
+            if any(point[f] is not None for f in y_fields):
+                data.append(point)
+        if len(data) < MIN_POINTS:
+            continue
+
+        labels = [header[idx] for idx in idxs]
+        title = caption if caption and len(groups) == 1 else f"{', '.join(labels)} by {header[x_idx]}"
+        specs.append({
+            "chart_type": "line" if time_like else "bar",
+            "title": title,
+            "x_field": x_field,
+            "x_label": header[x_idx],
+            "y_fields": y_fields,
+            "y_label": _y_label(labels, unit),
+            "data": data,
+        })
+    return specs
+
+
+def _series_specs(text: str) -> List[dict]:
+    """
+    Charts from runs of bulleted "label: number" lines (3+ items with one unit).
+    """
+    specs: List[dict] = []
+    caption: Optional[str] = None
+    run: List[Tuple[str, float, str]] = []
+    run_caption: Optional[str] = None
+
+    def _close() -> None:
+        if len(run) >= MIN_SERIES_ITEMS and len({u for _, _, u in run}) == 1:
+            labels = [label for label, _, _ in run]
+            time_like = _is_time_column("", labels)
+            x_field = "period" if time_like else "category"
+            unit = run[0][2]
+            title = run_caption or "Values"
+            specs.append({
+                "chart_type": "line" if time_like else "bar",
+                "title": title,
+                "x_field": x_field,
+                "x_label": "Period" if time_like else "Category",
+                "y_fields": ["value"],
+                "y_label": _y_label(["Value"], unit),
+                "data": [{x_field: label, "value": _clean_value(v)} for label, v, _ in run],
+            })
+        run.clear()
+
+    for raw in (text or "").split("\n"):
+        m = _SERIES_ITEM_RE.match(raw)
+        parsed = parse_number(m.group("value")) if m else None
+        if parsed:
+            if not run:
+                run_caption = caption
+            run.append((_strip_markup(m.group("label")), parsed[0], parsed[1]))
+            continue
+        if raw.strip():
+            _close()
+            caption = _caption(raw) or None
+    _close()
+    return specs
+
+
+def has_table(text: str) -> bool:
+    """
+    True when `text` contains a pipe table or a bulleted numeric series.
+    """
+    return bool(parse_markdown_tables(text)) or bool(_series_specs(text))
+
+
+def build_chart_specs(
+    question: str,
+    answer: str,
+    table_context: Optional[str] = None,
+    max_charts: int = MAX_CHARTS,
+) -> List[dict]:
+    """
+    Chart specs for `answer` (CHART_SPEC_SYSTEM_PROMPT schema), [] if nothing is chartable.
+
+    Tables in the answer come first; the tabular-store context (exact figures the
+    answer was built from) is only used when the answer itself has no chartable table.
+    """
+    q = (question or "").lower()
+    specs: List[dict] = []
+    for table in parse_markdown_tables(answer):
+        specs.extend(_specs_from_table(table, q))
+    if not specs:
+        specs.extend(_series_specs(answer))
+    if not specs and table_context:
+        for table in parse_markdown_tables(table_context):
+            specs.extend(_specs_from_table(table, q))
+    return specs[:max_charts]
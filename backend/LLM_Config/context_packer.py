@@ -0,0 +1,184 @@
+"""
+Token-budgeted prompt packing for the main answer call.
+
+- Budget per model (DEFAULT_PROMPT_TOKEN_BUDGETS, or PROMPT_TOKEN_BUDGET for all
+  models), never more than the model's context window minus the output tokens.
+- Fixed parts (system prompt, instructions, question, exact table figures) are
+  counted first; recent history turns get up to PROMPT_HISTORY_TOKEN_SHARE of the
+  budget (whole turns, newest first); ranked chunks fill what is left, greedily
+  in rank order (a chunk that does not fit is skipped, smaller ones may still fit).
+- Overlaps are removed: exact / contained duplicates are dropped and the text a
+  chunk shares with an already selected neighbour (chunker overlap) is trimmed.
+- Tokens are counted with tiktoken; if the encoding cannot be loaded (offline)
+  a ~4 characters per token estimate is used.
+"""
+
+import os
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import tiktoken
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-4.1-mini": 1_047_576,
+    "gpt-4o-mini": 128_000,
+}
+DEFAULT_PROMPT_TOKEN_BUDGETS = {
+    "gpt-4.1-mini": 12_000,
+    "gpt-4o-mini": 8_000,
+}
+FALLBACK_PROMPT_TOKEN_BUDGET = 8_000
+# Overrides the per-model budgets when set (> 0)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "0"))
+# Share of the budget history turns may use
+PROMPT_HISTORY_TOKEN_SHARE = float(os.getenv("PROMPT_HISTORY_TOKEN_SHARE", "0.2"))
+MAX_HISTORY_TURNS = 2
+
+# Chat-format framing per message, and the "[Source i]" wrapper per chunk
+MESSAGE_OVERHEAD_TOKENS = 4
+CHUNK_OVERHEAD_TOKENS = 6
+# Shortest shared prefix/suffix treated as chunker overlap
+MIN_OVERLAP_CHARS = 40
+
+CountFn = Callable[[str], int]
+
+_encodings: Dict[str, Optional[tiktoken.Encoding]] = {}
+
+
+def _encoding_for(model: str) -> Optional[tiktoken.Encoding]:
+    if model not in _encodings:
+        try:
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encodings[model] = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            logger.warning("tiktoken encoding for %s unavailable, estimating tokens", model)
+            _encodings[model] = None
+    return _encodings[model]
+
+
+def count_tokens(text: str, model: str = "gpt-4.1-mini") -> int:
+    if not text:
+        return 0
+    encoding = _encoding_for(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages: List[dict], model: str = "gpt-4.1-mini") -> int:
+    return sum(
+        count_tokens(m.get("content") or "", model) + MESSAGE_OVERHEAD_TOKENS for m in messages
+    ) + 2
+
+
+def prompt_token_budget(model: str, max_output_tokens: int) -> int:
+    budget = PROMPT_TOKEN_BUDGET or DEFAULT_PROMPT_TOKEN_BUDGETS.get(model, FALLBACK_PROMPT_TOKEN_BUDGET)
+    window = MODEL_CONTEXT_WINDOWS.get(model)
+    if window:
+        budget = min(budget, window - max_output_tokens)
+    return budget
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def _trim_overlap(selected: Sequence[str], candidate: str) -> str:
+    """
+    Drop the text `candidate` shares with the end / start of a selected chunk.
+    """
+    for text in selected:
+        if len(candidate) < MIN_OVERLAP_CHARS:
+            break
+        # candidate starts inside `text` and runs past its end
+        idx = text.find(candidate[:MIN_OVERLAP_CHARS])
+        while idx != -1:
+            overlap = len(text) - idx
+            if candidate.startswith(text[idx:]):
+                candidate = candidate[overlap:].lstrip()
+                break
+            idx = text.find(candidate[:MIN_OVERLAP_CHARS], idx + 1)
+        if len(candidate) < MIN_OVERLAP_CHARS:
+            break
+        # candidate ends inside `text`, which continues it
+        idx = candidate.find(text[:MIN_OVERLAP_CHARS])
+        while idx != -1:
+            if text.startswith(candidate[idx:]):
+                candidate = candidate[:idx].rstrip()
+                break
+            idx = candidate.find(text[:MIN_OVERLAP_CHARS], idx + 1)
+    return candidate
+
+
+def pack_context(
+    chunks: List[str],
+    ranking: Sequence[int],
+    budget: int,
+    fixed_tokens: int,
+    history: Optional[List[Tuple[str, str]]] = None,
+    max_chunks: Optional[int] = None,
+    count_fn: CountFn = count_tokens,
+) -> dict:
+    """
+    Choose the history turns and chunks that fit in `budget` prompt tokens.
+
+    `ranking` lists chunk indices best first; `fixed_tokens` is the size of
+    everything that is always sent. Returns {"chunk_indices", "chunks" (trimmed
+    texts, in rank order), "history", "prompt_tokens" (estimate), "budget",
+    "dropped" (chunks that did not fit), "deduplicated"}.
+    """
+    remaining = budget - fixed_tokens
+
+    # 1) History: whole turns, newest first, within the history share
+    kept_turns: List[Tuple[str, str]] = []
+    history_allowance = min(remaining, int(budget * PROMPT_HISTORY_TOKEN_SHARE))
+    for user_msg, assistant_msg in reversed((history or [])[-MAX_HISTORY_TURNS:]):
+        cost = count_fn(user_msg or "") + count_fn(assistant_msg or "") + 2 * MESSAGE_OVERHEAD_TOKENS
+        if cost > history_allowance:
+            break
+        kept_turns.insert(0, (user_msg, assistant_msg))
+        history_allowance -= cost
+        remaining -= cost
+
+    # 2) Chunks: greedy in rank order, overlaps removed
+    indices: List[int] = []
+    texts: List[str] = []
+    normalized: List[str] = []
+    dropped = deduplicated = 0
+    for i in ranking:
+        if max_chunks is not None and len(indices) >= max_chunks:
+            break
+        text = (chunks[i] or "").strip()
+        norm = _normalize(text)
+        if not norm or any(norm in seen for seen in normalized):
+            deduplicated += 1
+            continue
+        trimmed = _trim_overlap(texts, text)
+        if len(trimmed) < MIN_OVERLAP_CHARS and trimmed != text:
+            deduplicated += 1
+            continue
+        cost = count_fn(trimmed) + CHUNK_OVERHEAD_TOKENS
+        if cost > remaining:
+            dropped += 1
+            continue
+        indices.append(i)
+        texts.append(trimmed)
+        normalized.append(_normalize(trimmed))
+        remaining -= cost
+
+    return {
+        "chunk_indices": indices,
+        "chunks": texts,
+        "history": kept_turns,
+        "prompt_tokens": budget - remaining,
+        "budget": budget,
+        "dropped": dropped,
+        "deduplicated": deduplicated,
+    }
@@ -0,0 +1,124 @@
+"""
+Embedding nearest-centroid intent / domain classifier.
+
+- Centroids are the normalized mean embedding of the labeled examples in
+  INTENT_EXAMPLES_PATH (one {"text", "intent", "domain"} JSON object per line),
+  embedded once with the same model as the queries.
+- Classifying a query is one matrix-vector product per label set on the query
+  embedding retrieval needs anyway (microseconds, no extra model).
+- The keyword rules break ties: the rule label is kept when it scores within
+  INTENT_MARGIN of the best centroid, or when the best two centroids are that close.
+"""
+
+import json
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+INTENT_EXAMPLES_PATH = os.getenv(
+    "INTENT_EXAMPLES_PATH",
+    os.path.join(os.path.dirname(__file__), "data", "intent_examples.jsonl"),
+)
+# "embedding" (centroids + rules as tie-breaker) or "rules" (keyword rules only)
+INTENT_CLASSIFIER = os.getenv("INTENT_CLASSIFIER", "embedding").lower()
+# Cosine gap under which two labels count as a tie
+INTENT_MARGIN = float(os.getenv("INTENT_MARGIN", "0.05"))
+
+EmbedFn = Callable[[List[str]], List[List[float]]]
+
+
+def load_examples(path: str = INTENT_EXAMPLES_PATH) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _pick(rule_label: str, labels: Sequence[str], scores: np.ndarray, margin: float) -> Tuple[str, str]:
+    """
+    (label, source) with source "embedding" or "rules".
+    """
+    order = np.argsort(scores)[::-1]
+    best = order[0]
+    if len(order) > 1 and scores[best] - scores[order[1]] < margin:
+        return rule_label, "rules"
+    if rule_label in labels and scores[best] - scores[labels.index(rule_label)] < margin:
+        return rule_label, "rules"
+    return labels[best], "embedding"
+
+
+class IntentCentroidClassifier:
+    def __init__(self, examples: List[dict], embed_fn: EmbedFn):
+        vectors = _normalize_rows(np.asarray(embed_fn([e["text"] for e in examples]), dtype=np.float32))
+        self.intents, self._intent_centroids = self._centroids(examples, vectors, "intent")
+        self.domains, self._domain_centroids = self._centroids(examples, vectors, "domain")
+
+    @staticmethod
+    def _centroids(examples: List[dict], vectors: np.ndarray, key: str) -> Tuple[List[str], np.ndarray]:
+        labels = sorted({e[key] for e in examples})
+        index = {label: i for i, label in enumerate(labels)}
+        sums = np.zeros((len(labels), vectors.shape[1]), dtype=np.float32)
+        for e, vec in zip(examples, vectors):
+            sums[index[e[key]]] += vec
+        return labels, _normalize_rows(sums)
+
+    def scores(self, query_embedding: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+        q = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        if norm > 0:
+            q = q / norm
+        return self._intent_centroids @ q, self._domain_centroids @ q
+
+    def classify(
+        self,
+        query_embedding: Sequence[float],
+        rule_intent: str,
+        rule_domain: str,
+        margin: float = INTENT_MARGIN,
+    ) -> dict:
+        """
+        {"intent", "domain", "intent_source", "domain_source", "intent_score"}.
+        """
+        intent_scores, domain_scores = self.scores(query_embedding)
+        intent, intent_source = _pick(rule_intent, self.intents, intent_scores, margin)
+        domain, domain_source = _pick(rule_domain, self.domains, domain_scores, margin)
+        return {
+            "intent": intent,
+            "domain": domain,
+            "intent_source": intent_source,
+            "domain_source": domain_source,
+            "intent_score": round(float(intent_scores.max()), 4),
+        }
+
+
+_classifiers: Dict[str, IntentCentroidClassifier] = {}
+_classifiers_lock = threading.Lock()
+
+
+def get_intent_classifier(model_name: str, embed_fn: EmbedFn) -> IntentCentroidClassifier:
+    """
+    Classifier for one embedding model, built on first use (embeds the examples once).
+    """
+    classifier = _classifiers.get(model_name)
+    if classifier is None:
+        with _classifiers_lock:
+            classifier = _classifiers.get(model_name)
+            if classifier is None:
+                examples = load_examples()
+                classifier = IntentCentroidClassifier(examples, embed_fn)
+                _classifiers[model_name] = classifier
+                logger.info(
+                    "Intent classifier built for %s from %d examples", model_name, len(examples)
+                )
+    return classifier
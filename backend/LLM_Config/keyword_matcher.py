@@ -0,0 +1,71 @@
+"""
+Keyword tables compiled once into one regex per category.
+
+Each category's keywords become a single trie-shaped alternation (shared prefixes
+are tried once per text position). `pattern.search(text)` is true exactly when
+`any(k in text for k in keywords)` is, so rules keep their substring semantics;
+the scan runs in the regex engine instead of one Python-level `in` per keyword.
+"""
+
+import re
+from typing import Dict, FrozenSet, Iterable, Optional, Sequence, Tuple
+
+
+def _trie_regex(node: dict) -> str:
+    # node: char -> child node; "" marks the end of a keyword
+    if "" in node:
+        # A keyword ends here: search() only needs the shortest match, longer ones are redundant
+        return ""
+    branches = []
+    single_chars = []
+    for char in sorted(node):
+        sub = _trie_regex(node[char])
+        if sub:
+            branches.append(re.escape(char) + sub)
+        else:
+            single_chars.append(re.escape(char))
+    if single_chars:
+        branches.append(single_chars[0] if len(single_chars) == 1 else "[" + "".join(single_chars) + "]")
+    return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+
+def compile_keywords(keywords: Iterable[str]) -> "re.Pattern[str]":
+    """
+    One regex for a keyword list, shaped as a trie (shared prefixes are matched once).
+    """
+    trie: dict = {}
+    for keyword in keywords:
+        if not keyword:
+            continue
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    if not trie:
+        return re.compile(r"(?!)")
+    return re.compile(_trie_regex(trie))
+
+
+class KeywordMatcher:
+    """
+    Ordered keyword categories; `first` returns the first category (in table order)
+    with a keyword in the text, `matches` all of them.
+    """
+
+    def __init__(self, categories: Sequence[Tuple[str, Sequence[str]]]):
+        self.categories: Tuple[str, ...] = tuple(name for name, _ in categories)
+        self._patterns: Dict[str, "re.Pattern[str]"] = {
+            name: compile_keywords(keywords) for name, keywords in categories
+        }
+
+    def first(self, text: str) -> Optional[str]:
+        for name in self.categories:
+            if self._patterns[name].search(text):
+                return name
+        return None
+
+    def matches(self, text: str) -> FrozenSet[str]:
+        return frozenset(name for name in self.categories if self._patterns[name].search(text))
+
+    def has(self, name: str, text: str) -> bool:
+        return self._patterns[name].search(text) is not None
@@ -0,0 +1,149 @@
+"""
+Exact-match cache for non-streaming LLM calls (rerank, formatter, chart spec).
+
+- Key: SHA-256 of model + messages + every other request parameter, scoped by
+  tenant and the Collection.content_generation of each collection in scope.
+  One tenant never sees another's entries, and an ingest, upsert or delete in
+  any worker bumps the persisted generation, so every worker's entries for that
+  content are retired (they age out of the LRU instead of being scanned for).
+- Only deterministic calls are cached (temperature 0).
+- Bounded by LLM_CACHE_MAX_ENTRIES (least recently used evicted first) and
+  LLM_CACHE_TTL_S; concurrent identical misses share one API call.
+- Hit / miss / eviction counters, overall and per tenant, via stats().
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_TTL_S = float(os.getenv("LLM_CACHE_TTL_S", "3600"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048"))
+
+
+def request_fingerprint(params: Dict[str, Any]) -> str:
+    payload = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(params: Dict[str, Any]) -> bool:
+    return not params.get("stream") and params.get("temperature") == 0
+
+
+# (tenant_id, ((collection_name, content_generation), ...), request fingerprint)
+CacheKey = Tuple[str, Tuple[Tuple[str, int], ...], str]
+
+
+def _retrieve_exception(task: asyncio.Future) -> None:
+    # Callers re-raise it; keeps asyncio from logging it as unretrieved when they all left
+    if not task.cancelled():
+        task.exception()
+
+
+class LLMResponseCache:
+    def __init__(self, ttl_s: float = LLM_CACHE_TTL_S, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Task] = {}
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "expired": 0}
+        self._tenant_stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, tenant_id: str, name: str) -> None:
+        self._stats[name] += 1
+        per_tenant = self._tenant_stats.setdefault(tenant_id, {"hits": 0, "misses": 0})
+        if name in per_tenant:
+            per_tenant[name] += 1
+
+    def _lookup(self, key: CacheKey) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.ttl_s:
+            del self._entries[key]
+            self._stats["expired"] += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _store(self, key: CacheKey, value: Any) -> None:
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    async def get_or_call(
+        self,
+        tenant_id: str,
+        generations: Tuple[Tuple[str, int], ...],
+        params: Dict[str, Any],
+        call: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Cached response for `params` over the collections at `generations`
+        (sorted (name, content_generation) pairs), or the result of `call()`
+        (stored on success).
+        """
+        key = (tenant_id, tuple(generations), request_fingerprint(params))
+
+        found, value = self._lookup(key)
+        if found:
+            self._count(tenant_id, "hits")
+            return value
+
+        pending = self._inflight.get(key)
+        if pending is None:
+            self._count(tenant_id, "misses")
+            # The call runs as its own task: a caller going away (client disconnect,
+            # a dropped post-answer stage) never cancels it for the callers sharing it
+            pending = asyncio.ensure_future(self._call_and_store(key, call))
+            pending.add_done_callback(_retrieve_exception)
+            self._inflight[key] = pending
+        else:
+            self._count(tenant_id, "hits")
+            self._stats["coalesced"] += 1
+        return await asyncio.shield(pending)
+
+    async def _call_and_store(self, key: CacheKey, call: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await call()
+            self._store(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate_tenant(self, tenant_id: str) -> int:
+        """
+        Drop every entry of a tenant now (generation changes retire them lazily anyway).
+        """
+        keys = [k for k in self._entries if k[0] == tenant_id]
+        for k in keys:
+            del self._entries[k]
+        return len(keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self, tenant_id: Optional[str] = None) -> dict:
+        if tenant_id is not None:
+            counts = dict(self._tenant_stats.get(tenant_id, {"hits": 0, "misses": 0}))
+            counts["entries"] = sum(1 for k in self._entries if k[0] == tenant_id)
+        else:
+            counts = {**self._stats, "entries": len(self._entries), "max_entries": self.max_entries}
+        lookups = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = round(counts["hits"] / lookups, 4) if lookups else None
+        return counts
+
+
+llm_response_cache = LLMResponseCache()
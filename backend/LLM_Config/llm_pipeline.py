@@ -4,10 +4,13 @@
 
 
 from typing import List, Dict, Any, Tuple, Literal, Optional, AsyncGenerator
+import asyncio
 import json
+import os
 import textwrap
 import logging
 import re
+import time
 
 from LLM_Config.llm_setup import call_llm, stream_llm
 from LLM_Config.system_user_prompt import (
@@ -16,7 +19,24 @@ from LLM_Config.system_user_prompt import (
     RERANK_SYSTEM_PROMPT,
     create_chart_spec_prompt,
 )
+from LLM_Config.markdown_formatter import StreamingMarkdownFormatter, format_markdown
+from LLM_Config.chart_spec_builder import build_chart_specs, has_table
+from LLM_Config.keyword_matcher import KeywordMatcher, compile_keywords
+from LLM_Config.intent_classifier import INTENT_CLASSIFIER, get_intent_classifier
+from LLM_Config.answer_cache import (
+    ANSWER_CACHE_ENABLED,
+    UNCACHEABLE_INTENTS,
+    answer_cache,
+    answer_cache_scope,
+)
+from LLM_Config.context_packer import (
+    count_message_tokens,
+    count_tokens,
+    pack_context,
+    prompt_token_budget,
+)
 from Vector_setup.base.db_setup_management import MultiTenantChromaStoreManager
+from Vector_setup.base.tabular_store_management import TenantTabularStore
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -39,8 +59,19 @@ IntentType = Literal[
     "CHART",
 ]
 
+# Opt-in: rewrite the answer with the formatter LLM after the local formatter
+# (buffers the whole answer, so tokens are no longer streamed)
+STREAM_FORMATTER_PASS = os.getenv("STREAM_FORMATTER_PASS", "false").lower() in ("1", "true", "yes")
+
+# Main answer call (Call 1); its prompt is packed to the model's token budget
+ANSWER_MODEL = "gpt-4.1-mini"
+ANSWER_MAX_TOKENS = 4096
+
 YEAR_REGEX = re.compile(r"\b(20[0-4][0-9])\b")  # 2000–2049
 
+# Intents answered from exact aggregates over the structured tabular store
+TABULAR_INTENTS = {"NUMERIC_ANALYSIS", "EXPORT_TABLE"}
+
 FINANCE_KEYWORDS = [
     "budget",
     "expense",
@@ -141,6 +172,107 @@ POLICY_KEYWORDS = [
     "security",
 ]
 
+CHART_ONLY_PHRASES = [
+    "charts only",
+    "chart only",
+    "only charts",
+    "just the chart",
+    "just charts",
+    "no explanation",
+    "no text",
+    "skip the explanation",
+]
+
+CHITCHAT_PHRASES = [
+    "thank you",
+    "thanks",
+    "thx",
+    "got it",
+    "great",
+    "good job",
+    "well done",
+    "appreciate it",
+    "hello",
+    "hi ",
+    "hi,",
+    "hey",
+    "good morning",
+    "good afternoon",
+    "good evening",
+]
+
+CAPABILITIES_PHRASES = [
+    "what can you do",
+    "what information can you help me with",
+    "what information can you currently have",
+    "what information do you have",
+    "what topics should i ask you",
+    "what do you know",
+    "what is your knowledge base",
+    "what can you assist me with",
+    "what information can you provide for me now",
+]
+
+# Intent keyword tables, checked in this order (first match wins)
+INTENT_KEYWORDS: List[Tuple[str, List[str]]] = [
+    ("FOLLOWUP_ELABORATE", [
+        "how did you arrive at your answer",
+        "how did you arrive at that answer",
+        "how did you get this answer",
+        "explain how you arrived at your answer",
+        "explain how you arrived at that",
+        "how did you come up with this answer",
+    ]),
+    ("IMPLICATIONS", [
+        "implication",
+        "implications",
+        "what does this mean",
+        "so what",
+        "how does this affect",
+        "what does this imply",
+    ]),
+    ("STRATEGY", [
+        "how can we improve",
+        "how can we increase",
+        "suggest ways",
+        "what can we do",
+        "which other areas",
+        "what else can we do",
+        "how do we increase",
+        "how do we reduce",
+    ]),
+    ("NUMERIC_ANALYSIS", [
+        "sum",
+        "total",
+        "calculate",
+        "projection",
+        "compare",
+        "increase",
+        "decrease",
+        "analyze",
+        "average",
+        "how much",
+        "what is the amount",
+        "amount of",
+    ]),
+    ("PROCEDURE", ["how do i", "steps", "procedure", "process"]),
+    ("LOOKUP", ["list", "what are the", "do we have"]),
+    ("EXPORT_TABLE", ["export as table", "as a table", "table of", "csv", "spreadsheet"]),
+    ("ANALYSIS", ["analyze this", "detailed analysis", "deep analysis", "root cause"]),
+    ("CHART", ["chart", "graph", "plot", "visualize", "line chart", "bar chart"]),
+]
+
+_CHART_ONLY_PATTERN = compile_keywords(CHART_ONLY_PHRASES)
+_CHITCHAT_PATTERN = compile_keywords(CHITCHAT_PHRASES)
+_CAPABILITIES_PATTERN = compile_keywords(CAPABILITIES_PHRASES)
+_DOMAIN_MATCHER = KeywordMatcher([
+    ("FINANCE", FINANCE_KEYWORDS),
+    ("HR", HR_KEYWORDS),
+    ("TECH", TECH_KEYWORDS),
+    ("POLICY", POLICY_KEYWORDS),
+])
+_INTENT_MATCHER = KeywordMatcher(INTENT_KEYWORDS)
+
 # ---------- helpers ----------
 
 
@@ -300,156 +432,164 @@ def infer_intent_rule_based(user_message: str) -> Tuple[IntentType, str, bool]:
     Pure rule-based intent + domain + chart_only, no LLM call.
     Call 1 (main answer) can still *use* this intent (e.g., CHANGE style, mention charts),
     and can also *re-interpret/override* it in-text if needed.
+
+    Keyword tables are compiled once (see keyword_matcher); the first matching
+    category in table order wins, as with the original chain of `any(...)` checks.
     """
     text = (user_message or "").lower().strip()
 
-    chart_only = any(
-        p in text
-        for p in [
-            "charts only",
-            "chart only",
-            "only charts",
-            "just the chart",
-            "just charts",
-            "no explanation",
-            "no text",
-            "skip the explanation",
-        ]
-    )
+    chart_only = _CHART_ONLY_PATTERN.search(text) is not None
 
     # 1) CHITCHAT
-    if any(
-        x in text
-        for x in [
-            "thank you",
-            "thanks",
-            "thx",
-            "got it",
-            "great",
-            "good job",
-            "well done",
-            "appreciate it",
-            "hello",
-            "hi ",
-            "hi,",
-            "hey",
-            "good morning",
-            "good afternoon",
-            "good evening",
-        ]
-    ):
+    if _CHITCHAT_PATTERN.search(text):
         return "CHITCHAT", "GENERAL", chart_only
 
     # 2) CAPABILITIES
-    if any(
-        x in text
-        for x in [
-            "what can you do",
-            "what information can you help me with",
-            "what information can you currently have",
-            "what information do you have",
-            "what topics should i ask you",
-            "what do you know",
-            "what is your knowledge base",
-            "what can you assist me with",
-            "what information can you provide for me now",
-        ]
-    ):
+    if _CAPABILITIES_PATTERN.search(text):
         return "CAPABILITIES", "GENERAL", chart_only
 
     # 3) Domain guess
-    domain: str = "GENERAL"
-    if any(k in text for k in FINANCE_KEYWORDS):
-        domain = "FINANCE"
-    elif any(k in text for k in HR_KEYWORDS):
-        domain = "HR"
-    elif any(k in text for k in TECH_KEYWORDS):
-        domain = "TECH"
-    elif any(k in text for k in POLICY_KEYWORDS):
-        domain = "POLICY"
+    domain: str = _DOMAIN_MATCHER.first(text) or "GENERAL"
 
     # 4) Intent guess
-    if any(
-        x in text
-        for x in [
-            "how did you arrive at your answer",
-            "how did you arrive at that answer",
-            "how did you get this answer",
-            "explain how you arrived at your answer",
-            "explain how you arrived at that",
-            "how did you come up with this answer",
-        ]
-    ):
-        intent: IntentType = "FOLLOWUP_ELABORATE"
-    elif any(
-        x in text
-        for x in [
-            "implication",
-            "implications",
-            "what does this mean",
-            "so what",
-            "how does this affect",
-            "what does this imply",
-        ]
-    ):
-        intent = "IMPLICATIONS"
-    elif any(
-        x in text
-        for x in [
-            "how can we improve",
-            "how can we increase",
-            "suggest ways",
-            "what can we do",
-            "which other areas",
-            "what else can we do",
-            "how do we increase",
-            "how do we reduce",
-        ]
-    ):
-        intent = "STRATEGY"
-    elif any(
-        x in text
-        for x in [
-            "sum",
-            "total",
-            "calculate",
-            "projection",
-            "compare",
-            "increase",
-            "decrease",
-            "analyze",
-            "average",
-            "how much",
-            "what is the amount",
-            "amount of",
-        ]
-    ):
-        intent = "NUMERIC_ANALYSIS"
-    elif any(x in text for x in ["how do i", "steps", "procedure", "process"]):
-        intent = "PROCEDURE"
-    elif any(x in text for x in ["list", "what are the", "do we have"]):
-        intent = "LOOKUP"
-    elif any(
-        x in text
-        for x in ["export as table", "as a table", "table of", "csv", "spreadsheet"]
-    ):
-        intent = "EXPORT_TABLE"
-    elif any(
-        x in text
-        for x in ["analyze this", "detailed analysis", "deep analysis", "root cause"]
-    ):
-        intent = "ANALYSIS"
-    elif any(
-        x in text
-        for x in ["chart", "graph", "plot", "visualize", "line chart", "bar chart"]
-    ):
-        intent = "CHART"
-    else:
-        intent = "NEW_QUESTION"
+    intent: IntentType = _INTENT_MATCHER.first(text) or "NEW_QUESTION"
 
     return intent, domain, chart_only
 
 
+async def generate_chart_specs(
+    question: str,
+    formatted_answer: str,
+    intent: str,
+    domain: str,
+    table_context: Optional[dict] = None,
+    result_holder: Optional[dict] = None,
+    tenant_id: Optional[str] = None,
+    cache_generations: Optional[tuple] = None,
+) -> List[dict]:
+    """
+    Chart specs for a finished answer (step 8 of llm_pipeline_stream).
+
+    - Only for NUMERIC_ANALYSIS / LOOKUP / CHART intents, or FINANCE questions asking for a chart.
+    - Built locally from the answer's tables (or the exact table figures behind it);
+      the chart-spec LLM call only runs when the answer has no table at all.
+    - Sets result_holder["chart_specs"] and the chart_source / chart_ms metrics.
+    """
+    chart_specs: List[dict] = []
+    try:
+        lower_q = (question or "").lower()
+        chart_intent_trigger = any(
+            kw in lower_q
+            for kw in ["chart", "graph", "plot", "visual", "visualise", "visualize"]
+        )
+
+        logger.info(
+            f"CHART_DEBUG domain={domain} intent={intent} "
+            f"chart_intent_trigger={chart_intent_trigger}"
+        )
+
+        if not ((domain == "FINANCE" and chart_intent_trigger) or intent in {
+            "NUMERIC_ANALYSIS",
+            "LOOKUP",
+            "CHART",
+        }):
+            return chart_specs
+
+        logger.info("CHART_DEBUG entering chart_spec generation block")
+        chart_started = time.perf_counter()
+        metrics = result_holder.setdefault("metrics", {}) if result_holder is not None else {}
+
+        chart_specs = build_chart_specs(
+            question,
+            formatted_answer,
+            table_context=table_context["text"] if table_context else None,
+        )
+        if chart_specs or has_table(formatted_answer):
+            metrics["chart_ms"] = round((time.perf_counter() - chart_started) * 1000, 1)
+            if chart_specs and result_holder is not None:
+                result_holder["chart_specs"] = chart_specs
+                metrics["chart_source"] = "local"
+                logger.info(
+                    "CHART_DEBUG set local chart_specs on result_holder: %s",
+                    chart_specs,
+                )
+            return chart_specs
+
+        chart_messages = create_chart_spec_prompt(question, formatted_answer)
+        chart_resp = await call_llm(
+            cache_tenant=tenant_id,
+            cache_generations=cache_generations,
+            priority="background",
+            messages=chart_messages,
+            model="gpt-4o-mini",
+            temperature=0.0,
+            max_tokens=1500,
+        )
+
+        raw_chart = (chart_resp.choices[0].message.content or "").strip()
+        logger.info(f"RAW_CHART_SPEC {raw_chart}")
+
+        chart_obj = parse_raw_chart(raw_chart, logger)
+
+        required_keys = {
+            "chart_type",
+            "title",
+            "x_field",
+            "x_label",
+            "y_fields",
+            "y_label",
+            "data",
+        }
+
+        def normalize_one(spec: dict) -> dict | None:
+            if "x-label" in spec and "x_field" in spec:
+                spec["x_label"] = spec.pop("x-label")
+
+            if not required_keys.issubset(spec.keys()):
+                logger.warning(
+                    "CHART_DEBUG chart_spec missing required keys: %s",
+                    spec.keys(),
+                )
+                return None
+
+            return spec
+
+        if isinstance(chart_obj, dict):
+            normalized = normalize_one(chart_obj)
+            if normalized:
+                chart_specs.append(normalized)
+        elif isinstance(chart_obj, list):
+            for idx, item in enumerate(chart_obj):
+                if not isinstance(item, dict):
+                    logger.warning(
+                        "CHART_DEBUG chart_specs[%s] is not a dict, skipping",
+                        idx,
+                    )
+                    continue
+                normalized = normalize_one(item)
+                if normalized:
+                    chart_specs.append(normalized)
+        elif chart_obj is not None:
+            logger.warning(
+                "CHART_DEBUG chart_spec is neither dict nor list. skipping: %r",
+                type(chart_obj),
+            )
+
+        metrics["chart_ms"] = round((time.perf_counter() - chart_started) * 1000, 1)
+        if chart_specs and result_holder is not None:
+            result_holder["chart_specs"] = chart_specs
+            metrics["chart_source"] = "llm"
+            logger.info(
+                "CHART_DEBUG set chart_specs on result_holder: %s",
+                chart_specs,
+            )
+
+    except Exception as e:
+        logger.warning(f"Chart spec generation failed: {e}")
+
+    return chart_specs
+
+
 # ---------- main pipeline ----------
 
 async def llm_pipeline_stream(
@@ -461,9 +601,40 @@ async def llm_pipeline_stream(
     result_holder: Optional[dict] = None,
     last_doc_id: Optional[str] = None,
     collection_names: Optional[List[str]] = None,
+    tabular_store: Optional[TenantTabularStore] = None,
+    defer_charts: bool = False,
+    collection_ids: Optional[List[str]] = None,
+    content_generations: Optional[Dict[str, int]] = None,
 ) -> AsyncGenerator[str, None]:
-    # Intent & domain are rule-based (no LLM call)
+    pipeline_started = time.perf_counter()
+
+    def _record_metric(name: str, value: float) -> None:
+        if result_holder is not None:
+            result_holder.setdefault("metrics", {})[name] = round(value, 1)
+
+    # Intent & domain: keyword rules, refined by the centroid classifier on the
+    # query embedding (reused for retrieval below); no LLM call
     intent, domain, chart_only = infer_intent_rule_based(question)
+    query_embedding: Optional[List[float]] = None
+    if INTENT_CLASSIFIER == "embedding" and (question or "").strip():
+        try:
+            query_embedding = await store.embed_query(question)
+            if query_embedding is not None:
+                classifier = await asyncio.to_thread(
+                    get_intent_classifier, store.embedding_model_name, store.embed_texts
+                )
+                classify_started = time.perf_counter()
+                classified = classifier.classify(query_embedding, intent, domain)
+                _record_metric("intent_ms", (time.perf_counter() - classify_started) * 1000)
+                if (classified["intent"], classified["domain"]) != (intent, domain):
+                    logger.info(
+                        "INTENT rules=%s/%s classifier=%s/%s score=%s",
+                        intent, domain, classified["intent"], classified["domain"],
+                        classified["intent_score"],
+                    )
+                intent, domain = classified["intent"], classified["domain"]
+        except Exception as e:
+            logger.warning(f"Intent classifier failed, using keyword rules: {e}")
 
     text_lower = (question or "").lower()
     unique_sources: list[str] = []
@@ -505,6 +676,44 @@ async def llm_pipeline_stream(
         yield msg
         return
 
+    # 2b) SEMANTIC ANSWER CACHE: a near-identical standalone question over the same
+    #     allowed collections, none of them re-ingested since, is answered from the
+    #     cache (no retrieval, rerank, generation, formatter or chart calls).
+    #     content_generations (Collection.content_generation per collection name) is
+    #     what every worker sees; without it neither this cache nor the LLM response
+    #     cache (rerank, formatter, chart calls) is used.
+    cache_scope = None
+    cache_generations = (
+        tuple(sorted((name, content_generations.get(name, 0)) for name in set(collection_names or ())))
+        if content_generations is not None
+        else None
+    )
+    if (
+        ANSWER_CACHE_ENABLED
+        and query_embedding is not None
+        and collection_names
+        and content_generations is not None
+        and intent not in UNCACHEABLE_INTENTS
+        and build_retrieval_query(question, history) == normalize_query(question)
+    ):
+        cache_scope = answer_cache_scope(tenant_id, collection_ids or collection_names)
+        cached = answer_cache.lookup(cache_scope, query_embedding, question, intent, cache_generations)
+        if cached is not None:
+            logger.info(
+                "ANSWER_CACHE hit tenant=%s similarity=%s cached_question=%r",
+                tenant_id, cached["similarity"], cached["question"],
+            )
+            if result_holder is not None:
+                metrics = result_holder.setdefault("metrics", {})
+                metrics["answer_cache_hit"] = 1
+                metrics["answer_cache_similarity"] = cached["similarity"]
+                if cached["chart_specs"]:
+                    result_holder["chart_specs"] = cached["chart_specs"]
+            _record_metric("ttft_ms", (time.perf_counter() - pipeline_started) * 1000)
+            _store(cached["answer"], cached["sources"])
+            yield cached["answer"]
+            return
+
     # 3) RETRIEVAL
     raw_question = question
     if intent == "EXPORT_TABLE":
@@ -539,6 +748,9 @@ async def llm_pipeline_stream(
     else:
         effective_top_k = top_k
 
+    # The classifier's embedding is of the raw question; reuse it when that is what we search for
+    reusable_embedding = query_embedding if effective_question == question else None
+
     retrieval = await store.query_policies(
         tenant_id=tenant_id,
         collection_name=None,
@@ -546,6 +758,7 @@ async def llm_pipeline_stream(
         query=effective_question,
         top_k=effective_top_k,
         where=query_filter,
+        query_embedding=reusable_embedding,
     )
     hits = retrieval.get("results", [])
 
@@ -557,10 +770,25 @@ async def llm_pipeline_stream(
             query=effective_question,
             top_k=effective_top_k,
             where=None,
+            query_embedding=reusable_embedding,
         )
         hits = retrieval.get("results", [])
 
-    if not hits:
+    # 3b) EXACT TABLE FIGURES (SQL over spreadsheet/CSV data, no LLM)
+    table_context: Optional[dict] = None
+    if tabular_store is not None and intent in TABULAR_INTENTS:
+        try:
+            table_context = tabular_store.build_numeric_context(
+                tenant_id=tenant_id,
+                collection_names=collection_names or None,
+                question=question,
+                by_period=year_level,
+            )
+        except Exception as e:
+            logger.warning(f"Tabular aggregation failed, using retrieved chunks only: {e}")
+            table_context = None
+
+    if not hits and not table_context:
         if intent == "EXPORT_TABLE":
             msg = (
                 "I could not find any data you have access to that can be exported as a table "
@@ -589,213 +817,205 @@ async def llm_pipeline_stream(
         sources.append(title)
 
     # 5) RERANK (Call 2)
-    try:
-        rerank_messages = build_rerank_messages(effective_question, context_chunks)
-        rerank_resp = await call_llm(
-            messages=rerank_messages,
-            model="gpt-4o-mini",
-            temperature=0.0,
-            max_tokens=300,
-        )
-        raw = (rerank_resp.choices[0].message.content or "[]").strip()
+    indices: list[int] = []
+    if context_chunks:
         try:
-            indices = json.loads(raw)
-        except Exception:
-            start = raw.find("[")
-            end = raw.rfind("]")
-            if start != -1 and end != -1 and end > start:
-                indices = json.loads(raw[start: end + 1])
-            else:
-                raise
-        if not isinstance(indices, list):
-            raise ValueError
-        indices = [
-            i for i in indices if isinstance(i, int) and 0 <= i < len(context_chunks)
-        ]
-    except Exception as e:
-        logger.warning(f"Rerank failed, falling back to original order: {e}")
-        indices = list(range(len(context_chunks)))
-
-    if year_level and domain == "FINANCE":
-        max_chunks = 10
-    elif intent == "EXPORT_TABLE":
-        max_chunks = 10
-    else:
-        max_chunks = 5
-
-    if indices:
-        indices = indices[:max_chunks]
-        context_chunks = [context_chunks[i] for i in indices]
-        sources = [sources[i] for i in indices]
-    else:
-        context_chunks = context_chunks[:max_chunks]
-        sources = sources[:max_chunks]
+            rerank_messages = build_rerank_messages(effective_question, context_chunks)
+            rerank_resp = await call_llm(
+                cache_tenant=tenant_id,
+                cache_generations=cache_generations,
+                priority="rerank",
+                messages=rerank_messages,
+                model="gpt-4o-mini",
+                temperature=0.0,
+                max_tokens=300,
+            )
+            raw = (rerank_resp.choices[0].message.content or "[]").strip()
+            try:
+                indices = json.loads(raw)
+            except Exception:
+                start = raw.find("[")
+                end = raw.rfind("]")
+                if start != -1 and end != -1 and end > start:
+                    indices = json.loads(raw[start: end + 1])
+                else:
+                    raise
+            if not isinstance(indices, list):
+                raise ValueError
+            indices = [
+                i for i in indices if isinstance(i, int) and 0 <= i < len(context_chunks)
+            ]
+        except Exception as e:
+            logger.warning(f"Rerank failed, falling back to original order: {e}")
+            indices = list(range(len(context_chunks)))
 
-    unique_sources = sorted(set(sources))
+    if not indices:
+        indices = list(range(len(context_chunks)))
 
-    # 6) PROMPT BUILDING
+    # 6) PROMPT BUILDING (token-budgeted: fixed parts first, then history, then
+    #    ranked chunks greedily until the model's prompt budget is full)
     last_answer_text = history[-1][1] if history else None
+    pinned_chunks = [table_context["text"]] if table_context else []
+
+    def _build_messages(chunks: list[str], turns: list[Tuple[str, str]]) -> list[dict]:
+        # Let create_context know both the rule-based intent & domain;
+        # the main call will also be instructed to do its own "intent understanding" and formatting.
+        system_prompt, user_prompt = create_context(
+            context_chunks=[*pinned_chunks, *chunks],
+            user_question=raw_question,
+            intent=intent,
+            domain=domain,
+            last_answer=last_answer_text,
+            chart_only=chart_only,
+        )
 
-    # Let create_context know both the rule-based intent & domain;
-    # the main call will also be instructed to do its own "intent understanding" and formatting.
-    system_prompt, user_prompt = create_context(
-        context_chunks=context_chunks,
-        user_question=raw_question,
-        intent=intent,
-        domain=domain,
-        last_answer=last_answer_text,
-        chart_only=chart_only,
-    )
+        # Merge your formatting instructions into system prompt
+        system_prompt = FORMATTER_SYSTEM_PROMPT + "\n\n" + system_prompt
+
+        # You can also add an explicit instruction here:
+        # "Additionally, infer the user intent (e.g., CHITCHAT, LOOKUP, ANALYSIS, CHART)
+        # and make sure the answer style fits that intent."
+        system_prompt += (
+            "\n\nYou should internally infer the user's intent type based on the question "
+            "and respond in a style that matches it (e.g., short direct answers for LOOKUP, "
+            "stepwise explanations for PROCEDURE, numeric focus for NUMERIC_ANALYSIS). "
+            "You do not need to output the intent label, only adapt your behavior."
+        )
 
-    # Merge your formatting instructions into system prompt
-    system_prompt = FORMATTER_SYSTEM_PROMPT + "\n\n" + system_prompt
-
-    # You can also add an explicit instruction here:
-    # "Additionally, infer the user intent (e.g., CHITCHAT, LOOKUP, ANALYSIS, CHART)
-    # and make sure the answer style fits that intent."
-    system_prompt += (
-        "\n\nYou should internally infer the user's intent type based on the question "
-        "and respond in a style that matches it (e.g., short direct answers for LOOKUP, "
-        "stepwise explanations for PROCEDURE, numeric focus for NUMERIC_ANALYSIS). "
-        "You do not need to output the intent label, only adapt your behavior."
+        built: list[dict] = [{"role": "system", "content": system_prompt}]
+        for u, a in turns:
+            built.append({"role": "user", "content": u})
+            built.append({"role": "assistant", "content": a})
+        built.append({"role": "user", "content": user_prompt})
+        return built
+
+    budget = prompt_token_budget(ANSWER_MODEL, ANSWER_MAX_TOKENS)
+    packed = pack_context(
+        chunks=context_chunks,
+        ranking=indices,
+        budget=budget,
+        fixed_tokens=count_message_tokens(_build_messages([], []), ANSWER_MODEL),
+        history=history,
+        # Exact aggregates already cover the full table; a few rows are enough as support
+        max_chunks=5 if table_context else None,
+        count_fn=lambda text: count_tokens(text, ANSWER_MODEL),
     )
+    context_chunks = packed["chunks"]
+    sources = [*(table_context["sources"] if table_context else []), *(sources[i] for i in packed["chunk_indices"])]
+    unique_sources = sorted(set(sources))
 
-    messages: list[dict] = [{"role": "system", "content": system_prompt}]
-
-    if history:
-        for u, a in history[-2:]:
-            messages.append({"role": "user", "content": u})
-            messages.append({"role": "assistant", "content": a})
-
-    messages.append({"role": "user", "content": user_prompt})
+    messages = _build_messages(context_chunks, packed["history"])
+    prompt_tokens = count_message_tokens(messages, ANSWER_MODEL)
+    _record_metric("prompt_tokens", prompt_tokens)
+    _record_metric("prompt_budget", budget)
+    _record_metric("context_chunks", len(context_chunks))
+    logger.info(
+        "PROMPT_PACK tokens=%s budget=%s chunks=%s dropped=%s deduplicated=%s history_turns=%s",
+        prompt_tokens, budget, len(context_chunks), packed["dropped"],
+        packed["deduplicated"], len(packed["history"]),
+    )
 
     # 7) MAIN ANSWER (Call 1 – streaming, formatting, self-check inside prompt)
+    #    Tokens are forwarded as they arrive through the local Markdown formatter;
+    #    the formatting rules are also part of the system prompt.
     try:
         full_answer_parts: list[str] = []
+        formatter = StreamingMarkdownFormatter()
+        llm_started = time.perf_counter()
 
         stream = await stream_llm(
-            model="gpt-4.1-mini",
+            tenant_id=tenant_id,
+            priority="answer",
+            model=ANSWER_MODEL,
             messages=messages,
             temperature=0.3,
-            max_tokens=4096,
+            max_tokens=ANSWER_MAX_TOKENS,
         )
+        _record_metric("llm_queue_ms", getattr(stream, "wait_ms", 0.0))
 
-        async for chunk in stream:
-            delta = chunk.choices[0].delta or {}
-            text = getattr(delta, "content", "") or ""
-            if text:
+        # The stream holds a scheduler slot and an open HTTP response until closed,
+        # including when the caller stops consuming this generator early
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta or {}
+                text = getattr(delta, "content", "") or ""
+                if not text:
+                    continue
+                if not full_answer_parts:
+                    _record_metric("llm_ttft_ms", (time.perf_counter() - llm_started) * 1000)
+                    _record_metric("ttft_ms", (time.perf_counter() - pipeline_started) * 1000)
                 full_answer_parts.append(text)
+                if not STREAM_FORMATTER_PASS:
+                    formatted = formatter.feed(text)
+                    if formatted:
+                        yield formatted
+        finally:
+            await stream.aclose()
+
+        _record_metric("stream_chunks", len(full_answer_parts))
+        _record_metric("generation_ms", (time.perf_counter() - llm_started) * 1000)
+
+        if not STREAM_FORMATTER_PASS:
+            tail = formatter.flush()
+            if tail:
+                yield tail
+            formatted_answer = format_markdown("".join(full_answer_parts))
+        else:
+            # Opt-in fallback: buffer the answer and have the formatter LLM rewrite it
+            formatted_answer = format_markdown("".join(full_answer_parts))
+            try:
+                formatter_messages = create_formatter_prompt(formatted_answer)
+                formatted_resp = await call_llm(
+                    cache_tenant=tenant_id,
+                    cache_generations=cache_generations,
+                    priority="background",
+                    messages=formatter_messages,
+                    model="gpt-4o-mini",
+                    temperature=0.0,
+                    max_tokens=4096,
+                )
+                formatted_answer = formatted_resp.choices[0].message.content or formatted_answer
 
-        formatted_answer = "".join(full_answer_parts).strip()
+            except Exception as e:
+                logger.warning(f"Formatter failed, returning locally formatted answer: {e}")
 
-        # _store(formatted_answer, unique_sources)
-        # yield formatted_answer
-        
-        try:
-            formatter_messages = create_formatter_prompt(formatted_answer)
-            formatted_resp = await call_llm(
-                messages=formatter_messages,
-                model="gpt-4o-mini",
-                temperature=0.0,
-                max_tokens=1000,
-            )
-            formatted_answer = formatted_resp.choices[0].message.content or formatted_answer
-
-        except Exception as e:
-            logger.warning(f"Formatter failed, returning raw answer: {e}")
-            formatted_answer = formatted_answer
+            yield formatted_answer
 
         _store(formatted_answer, unique_sources)
-        yield formatted_answer
 
-        # 8) Optional chart spec (Call 3, only when needed)
-        try:
-            lower_q = (question or "").lower()
-            chart_intent_trigger = any(
-                kw in lower_q
-                for kw in ["chart", "graph", "plot", "visual", "visualise", "visualize"]
+        # Cached against the generations seen before retrieval, so an ingest that
+        # raced this answer retires it immediately
+        cache_entry = None
+        if cache_scope is not None:
+            cache_entry = answer_cache.store(
+                cache_scope, query_embedding, question, intent, cache_generations,
+                formatted_answer, unique_sources,
             )
 
-            logger.info(
-                f"CHART_DEBUG domain={domain} intent={intent} "
-                f"chart_intent_trigger={chart_intent_trigger}"
+        # 8) Optional chart spec: built locally from the answer's tables (or the exact
+        #    table figures behind it); Call 3 only when the answer has no table at all.
+        #    With defer_charts the caller runs it alongside its other post-answer work.
+        async def chart_stage() -> List[dict]:
+            specs = await generate_chart_specs(
+                question=question,
+                formatted_answer=formatted_answer,
+                intent=intent,
+                domain=domain,
+                table_context=table_context,
+                result_holder=result_holder,
+                tenant_id=tenant_id,
+                cache_generations=cache_generations,
             )
+            if cache_entry is not None:
+                cache_entry["chart_specs"] = specs
+            return specs
 
-            if ((domain == "FINANCE" and chart_intent_trigger) or intent in {
-                "NUMERIC_ANALYSIS",
-                "LOOKUP",
-                "CHART",
-            }):
-                logger.info("CHART_DEBUG entering chart_spec generation block")
-
-                chart_messages = create_chart_spec_prompt(question, formatted_answer)
-                chart_resp = await call_llm(
-                    messages=chart_messages,
-                    model="gpt-4o-mini",
-                    temperature=0.0,
-                    max_tokens=1500,
-                )
-
-                raw_chart = (chart_resp.choices[0].message.content or "").strip()
-                logger.info(f"RAW_CHART_SPEC {raw_chart}")
-
-                chart_obj = parse_raw_chart(raw_chart, logger)
-
-                required_keys = {
-                    "chart_type",
-                    "title",
-                    "x_field",
-                    "x_label",
-                    "y_fields",
-                    "y_label",
-                    "data",
-                }
-
-                def normalize_one(spec: dict) -> dict | None:
-                    if "x-label" in spec and "x_field" in spec:
-                        spec["x_label"] = spec.pop("x-label")
-
-                    if not required_keys.issubset(spec.keys()):
-                        logger.warning(
-                            "CHART_DEBUG chart_spec missing required keys: %s",
-                            spec.keys(),
-                        )
-                        return None
-
-                    return spec
-
-                chart_specs: list[dict] = []
-
-                if isinstance(chart_obj, dict):
-                    normalized = normalize_one(chart_obj)
-                    if normalized:
-                        chart_specs.append(normalized)
-                elif isinstance(chart_obj, list):
-                    for idx, item in enumerate(chart_obj):
-                        if not isinstance(item, dict):
-                            logger.warning(
-                                "CHART_DEBUG chart_specs[%s] is not a dict, skipping",
-                                idx,
-                            )
-                            continue
-                        normalized = normalize_one(item)
-                        if normalized:
-                            chart_specs.append(normalized)
-                elif chart_obj is not None:
-                    logger.warning(
-                        "CHART_DEBUG chart_spec is neither dict nor list. skipping: %r",
-                        type(chart_obj),
-                    )
-
-                if chart_specs and result_holder is not None:
-                    result_holder["chart_specs"] = chart_specs
-                    logger.info(
-                        "CHART_DEBUG set chart_specs on result_holder: %s",
-                        chart_specs,
-                    )
-
-        except Exception as e:
-            logger.warning(f"Chart spec generation failed: {e}")
+        if defer_charts and result_holder is not None:
+            result_holder["chart_stage"] = chart_stage
+        else:
+            await chart_stage()
 
     except Exception as e:
         error_msg = f"There was a temporary problem generating the answer: {str(e)}"
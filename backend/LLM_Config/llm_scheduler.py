@@ -0,0 +1,247 @@
+"""
+Fair-share scheduler for LLM calls (replaces the single global semaphore).
+
+- Slots: at most LLM_MAX_CONCURRENCY calls in flight per worker, and at most
+  LLM_MODEL_CONCURRENCY[model] per model. A streaming call holds its slot until
+  the stream is consumed or closed.
+- Priority classes, strict: "answer" (main streamed answer) before "rerank"
+  before "background" (formatter, chart spec).
+- Within a class, tenants share slots by weighted fair queuing: each call gets
+  a virtual finish tag of max(class virtual clock, tenant's last tag) + 1 / weight
+  and the smallest tag goes first, so a tenant's burst interleaves with other
+  tenants' calls instead of queueing them behind it. Weights: LLM_TENANT_WEIGHTS.
+- Queue-time metrics per priority class and per tenant via stats().
+"""
+
+import asyncio
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+PRIORITY_CLASSES = ("answer", "rerank", "background")
+SHARED_TENANT = "_shared"
+
+
+def _parse_mapping(raw: str) -> Dict[str, float]:
+    """
+    "a=1,b=2.5" -> {"a": 1.0, "b": 2.5}; malformed items are skipped.
+    """
+    mapping: Dict[str, float] = {}
+    for item in (raw or "").split(","):
+        key, sep, value = item.partition("=")
+        if not sep or not key.strip():
+            continue
+        try:
+            mapping[key.strip()] = float(value)
+        except ValueError:
+            logger.warning("Ignoring malformed scheduler setting %r", item)
+    return mapping
+
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "30"))
+# The answer model may not take every slot; the rest is left to rerank / formatter calls
+DEFAULT_MODEL_CONCURRENCY = {
+    "gpt-4.1-mini": 24,
+    "gpt-4o-mini": 16,
+}
+LLM_MODEL_CONCURRENCY = {
+    **DEFAULT_MODEL_CONCURRENCY,
+    **{k: int(v) for k, v in _parse_mapping(os.getenv("LLM_MODEL_CONCURRENCY", "")).items()},
+}
+# e.g. "tenant-a=2,tenant-b=0.5"; unlisted tenants weigh 1
+LLM_TENANT_WEIGHTS = _parse_mapping(os.getenv("LLM_TENANT_WEIGHTS", ""))
+MIN_TENANT_WEIGHT = 0.01
+
+
+class LLMSlot:
+    """
+    A granted call slot; release() gives it back (safe to call more than once).
+    """
+
+    def __init__(self, scheduler: "LLMScheduler", tenant_id: str, model: Optional[str], priority: str, wait_ms: float):
+        self.tenant_id = tenant_id
+        self.model = model
+        self.priority = priority
+        self.wait_ms = wait_ms
+        self._scheduler = scheduler
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._scheduler._release(self)
+
+
+class ScheduledStream:
+    """
+    Wraps a streaming response so its slot is held until the stream ends,
+    fails or is closed (or, as a last resort, garbage collected).
+    """
+
+    def __init__(self, stream: Any, slot: LLMSlot):
+        self._stream = stream
+        self._slot = slot
+        self.wait_ms = slot.wait_ms
+
+    def __aiter__(self) -> "ScheduledStream":
+        return self
+
+    async def __anext__(self) -> Any:
+        try:
+            return await self._stream.__anext__()
+        except BaseException:
+            self._slot.release()
+            raise
+
+    async def aclose(self) -> None:
+        try:
+            close = getattr(self._stream, "close", None) or getattr(self._stream, "aclose", None)
+            if close is not None:
+                await close()
+        finally:
+            self._slot.release()
+
+    def __del__(self) -> None:
+        self._slot.release()
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        model_limits: Optional[Dict[str, int]] = None,
+        tenant_weights: Optional[Dict[str, float]] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.model_limits = dict(LLM_MODEL_CONCURRENCY if model_limits is None else model_limits)
+        self.tenant_weights = dict(LLM_TENANT_WEIGHTS if tenant_weights is None else tenant_weights)
+        self._in_flight = 0
+        self._model_in_flight: Dict[Optional[str], int] = {}
+        self._waiters: List[dict] = []
+        self._virtual_time = {p: 0.0 for p in PRIORITY_CLASSES}
+        self._last_tag: Dict[tuple, float] = {}
+        self._seq = itertools.count()
+        self._wait_stats: Dict[str, Dict[str, dict]] = {"priority": {}, "tenant": {}}
+
+    def _has_capacity(self, model: Optional[str]) -> bool:
+        limit = self.model_limits.get(model, self.max_concurrency)
+        return self._in_flight < self.max_concurrency and self._model_in_flight.get(model, 0) < limit
+
+    def _record_wait(self, tenant_id: str, priority: str, wait_ms: float, queued: bool) -> None:
+        for group, key in (("priority", priority), ("tenant", tenant_id)):
+            s = self._wait_stats[group].setdefault(
+                key, {"calls": 0, "queued_calls": 0, "total_wait_ms": 0.0, "max_wait_ms": 0.0}
+            )
+            s["calls"] += 1
+            s["queued_calls"] += int(queued)
+            s["total_wait_ms"] += wait_ms
+            s["max_wait_ms"] = max(s["max_wait_ms"], wait_ms)
+
+    def _grant(self, tenant_id: str, model: Optional[str], priority: str, enqueued: float, queued: bool) -> LLMSlot:
+        self._in_flight += 1
+        self._model_in_flight[model] = self._model_in_flight.get(model, 0) + 1
+        wait_ms = (time.perf_counter() - enqueued) * 1000
+        self._record_wait(tenant_id, priority, wait_ms, queued)
+        return LLMSlot(self, tenant_id, model, priority, round(wait_ms, 1))
+
+    def _release(self, slot: LLMSlot) -> None:
+        self._in_flight -= 1
+        self._model_in_flight[slot.model] -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        # Hand freed slots to the best waiters: priority class, then fair-share tag
+        while self._waiters:
+            eligible = [w for w in self._waiters if self._has_capacity(w["model"])]
+            if not eligible:
+                return
+            waiter = min(eligible, key=lambda w: (w["rank"], w["tag"], w["seq"]))
+            self._waiters.remove(waiter)
+            if waiter["future"].done():
+                continue
+            vt = self._virtual_time
+            vt[waiter["priority"]] = max(vt[waiter["priority"]], waiter["tag"])
+            waiter["future"].set_result(
+                self._grant(waiter["tenant"], waiter["model"], waiter["priority"], waiter["enqueued"], True)
+            )
+
+    async def acquire(self, tenant_id: Optional[str], model: Optional[str], priority: str = "background") -> LLMSlot:
+        """
+        Wait for a slot; the caller must release() it.
+        """
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown LLM priority class: {priority}")
+        tenant = tenant_id or SHARED_TENANT
+        enqueued = time.perf_counter()
+
+        weight = max(self.tenant_weights.get(tenant, 1.0), MIN_TENANT_WEIGHT)
+        tag = max(self._virtual_time[priority], self._last_tag.get((priority, tenant), 0.0)) + 1.0 / weight
+        self._last_tag[(priority, tenant)] = tag
+
+        # Waiters never sit on free capacity for their model, so none is ahead of us here
+        if self._has_capacity(model):
+            self._virtual_time[priority] = max(self._virtual_time[priority], tag)
+            return self._grant(tenant, model, priority, enqueued, False)
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append({
+            "tenant": tenant,
+            "model": model,
+            "priority": priority,
+            "rank": PRIORITY_CLASSES.index(priority),
+            "tag": tag,
+            "seq": next(self._seq),
+            "enqueued": enqueued,
+            "future": future,
+        })
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                future.result().release()
+            else:
+                self._waiters = [w for w in self._waiters if w["future"] is not future]
+            raise
+
+    @asynccontextmanager
+    async def slot(self, tenant_id: Optional[str], model: Optional[str], priority: str = "background") -> AsyncIterator[LLMSlot]:
+        granted = await self.acquire(tenant_id, model, priority)
+        try:
+            yield granted
+        finally:
+            granted.release()
+
+    def stats(self, tenant_id: Optional[str] = None) -> dict:
+        def _summary(s: dict) -> dict:
+            return {
+                "calls": s["calls"],
+                "queued_calls": s["queued_calls"],
+                "avg_wait_ms": round(s["total_wait_ms"] / s["calls"], 1) if s["calls"] else None,
+                "max_wait_ms": round(s["max_wait_ms"], 1),
+            }
+
+        if tenant_id is not None:
+            s = self._wait_stats["tenant"].get(tenant_id)
+            return {
+                **(_summary(s) if s else {"calls": 0, "queued_calls": 0, "avg_wait_ms": None, "max_wait_ms": 0.0}),
+                "waiting": sum(1 for w in self._waiters if w["tenant"] == tenant_id),
+            }
+
+        return {
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "model_in_flight": {m: n for m, n in self._model_in_flight.items() if n},
+            "model_limits": self.model_limits,
+            "waiting": {p: sum(1 for w in self._waiters if w["priority"] == p) for p in PRIORITY_CLASSES},
+            "priority": {p: _summary(s) for p, s in self._wait_stats["priority"].items()},
+        }
+
+
+llm_scheduler = LLMScheduler()
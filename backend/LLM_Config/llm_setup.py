@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 """LLM module Setup"""
 import os
-import asyncio
+from typing import Optional
 from openai import AsyncOpenAI
 
+from LLM_Config.llm_cache import LLM_CACHE_ENABLED, is_cacheable, llm_response_cache
+from LLM_Config.llm_scheduler import ScheduledStream, llm_scheduler
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,18 +22,46 @@ llm_client = AsyncOpenAI(
     base_url=OPENAI_API_BASE,
 )
 
-LLM_SEMAPHORE = asyncio.Semaphore(30)
-
-async def call_llm( **kwargs):
-    async with LLM_SEMAPHORE:
+async def _create_completion(tenant_id: Optional[str] = None, priority: str = "background", **kwargs):
+    async with llm_scheduler.slot(tenant_id, kwargs.get("model"), priority):
         response = await llm_client.chat.completions.create(**kwargs,
         )
         return response
 
-async def stream_llm(**kwargs):
-    # optional: reuse same semaphore or a separate one
-    async with LLM_SEMAPHORE:
-        return await llm_client.chat.completions.create(stream=True, **kwargs)
-
-
+async def call_llm(
+    cache_tenant: Optional[str] = None,
+    cache_generations: Optional[tuple] = None,
+    tenant_id: Optional[str] = None,
+    priority: str = "background",
+    **kwargs,
+):
+    """
+    Chat completion, queued by the fair-share scheduler under tenant_id (defaults
+    to cache_tenant) and the priority class ("rerank" / "background").
+    With cache_tenant and cache_generations (sorted (collection name,
+    Collection.content_generation) pairs of the collections in scope),
+    deterministic calls (temperature 0) are served from the tenant-scoped
+    response cache when the same request was made before over the same content.
+    """
+    tenant_id = tenant_id or cache_tenant
+    if cache_tenant and cache_generations is not None and LLM_CACHE_ENABLED and is_cacheable(kwargs):
+        return await llm_response_cache.get_or_call(
+            cache_tenant,
+            cache_generations,
+            kwargs,
+            lambda: _create_completion(tenant_id=tenant_id, priority=priority, **kwargs),
+        )
+    return await _create_completion(tenant_id=tenant_id, priority=priority, **kwargs)
 
+async def stream_llm(tenant_id: Optional[str] = None, priority: str = "answer", **kwargs):
+    """
+    Streaming chat completion; the scheduler slot is held until the stream ends.
+    The returned stream's wait_ms is the time spent queued for the slot.
+    """
+    slot = await llm_scheduler.acquire(tenant_id, kwargs.get("model"), priority)
+    try:
+        stream = await llm_client.chat.completions.create(stream=True, **kwargs)
+    except BaseException:
+        slot.release()
+        raise
+    return ScheduledStream(stream, slot)
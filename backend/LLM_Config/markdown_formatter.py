@@ -0,0 +1,259 @@
+"""
+Deterministic Markdown clean-up for assistant answers (replaces the formatter LLM call).
+
+- Headings: `#Title` -> `## Title` (H1 demoted to H2, trailing colons/hashes dropped);
+  a line that is only a short bold label (`**Key points:**`) becomes a `###` heading.
+- Lists: `*`, `+`, `•`, `·`, `–` bullets become `- `; `1)` becomes `1.`; indentation
+  is normalized to steps of two spaces.
+- Tables: pipe rows get outer pipes and trimmed cells; a header row without a
+  separator row gets one; separator rows keep their alignment colons.
+- Whitespace: trailing spaces removed, runs of blank lines collapsed to one,
+  exactly one blank line between blocks of a different kind (heading, list,
+  table, code, paragraph); fenced code blocks are passed through untouched.
+- Numbers: currency amounts get thousands separators (`$ 1250000` -> `$1,250,000`),
+  as do plain decimals of 5+ integer digits; bare integers (ids, years) are left alone.
+
+StreamingMarkdownFormatter applies the same rules to streamed text: plain
+paragraph text is released as soon as a word is complete, while lines that may
+be structural (headings, lists, tables, code) are held until their newline.
+Its output for any split of the input equals format_markdown() of the whole.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+_HEADING_RE = re.compile(r"^\s{0,3}(#{1,6})\s*(.*?)\s*#*\s*$")
+_BOLD_LABEL_RE = re.compile(r"^\*\*([^*]{1,60}?)\*\*:?$|^\*\*([^*]{1,60}?):\*\*$")
+_RULE_RE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+_BULLET_RE = re.compile(r"^(\s*)(?:[-*+–]\s+|[•·]\s*)(.*\S)")
+_NUMBERED_RE = re.compile(r"^(\s*)(\d{1,3})[.)]\s+(.*\S)")
+_TABLE_SEP_CELL_RE = re.compile(r"^:?-+:?$")
+
+_CURRENCY_RE = re.compile(
+    r"(?P<cur>[$€£₦]|\b(?:USD|EUR|GBP|NGN)\b)\s?(?P<num>\d[\d,]*(?:\.\d+)?)(?![\d,]*\d)"
+)
+_PLAIN_DECIMAL_RE = re.compile(r"(?<![\w.,$€£₦])(\d{5,})(\.\d+)(?!\d)")
+# A partial line is never cut right after one of these (the amount may follow)
+_TRAILING_CURRENCY_RE = re.compile(r"(?:[$€£₦]|\b(?:USD|EUR|GBP|NGN))$")
+
+# First characters that may open a structural line; such lines wait for their newline
+_STRUCTURAL_START = set("#|*-+_•·–`>") | set("0123456789")
+
+
+def _group_thousands(number: str) -> str:
+    integer, dot, fraction = number.replace(",", "").partition(".")
+    if len(integer) > 1 and integer.startswith("0"):
+        return number  # zero-padded: an identifier or code, not an amount
+    return f"{int(integer):,}{dot}{fraction}"
+
+
+def _format_numbers(text: str) -> str:
+    def _currency(m: re.Match) -> str:
+        cur = m.group("cur")
+        sep = " " if cur.isalpha() else ""
+        return f"{cur}{sep}{_group_thousands(m.group('num'))}"
+
+    text = _CURRENCY_RE.sub(_currency, text)
+    return _PLAIN_DECIMAL_RE.sub(lambda m: _group_thousands(m.group(1) + m.group(2)), text)
+
+
+def _split_cells(row: str) -> List[str]:
+    row = row.strip()
+    if row.startswith("|"):
+        row = row[1:]
+    if row.endswith("|") and not row.endswith("\\|"):
+        row = row[:-1]
+    return [c.strip() for c in re.split(r"(?<!\\)\|", row)]
+
+
+def _is_separator(cells: List[str]) -> bool:
+    return bool(cells) and all(_TABLE_SEP_CELL_RE.match(c.replace(" ", "")) for c in cells)
+
+
+def _separator_cell(cell: str) -> str:
+    cell = cell.replace(" ", "")
+    left, right = cell.startswith(":"), cell.endswith(":")
+    return f"{':' if left else ''}---{':' if right else ''}"
+
+
+class StreamingMarkdownFormatter:
+    def __init__(self):
+        self._buf = ""               # unprocessed text of the current line
+        self._line_open = False      # current paragraph line already partly emitted
+        self._in_code = False        # inside an inline `code` span on the open line
+        self._in_fence = False       # inside a ``` block
+        self._prev: Optional[str] = None  # kind of the last emitted line
+        self._blank = False          # blank line(s) seen since the last emitted line
+        self._pending_header: Optional[List[str]] = None  # table row awaiting its separator
+
+    def feed(self, chunk: str) -> str:
+        """
+        Add streamed text; returns the formatted text that can be sent now.
+        """
+        out: List[str] = []
+        self._buf += chunk
+        while "\n" in self._buf:
+            line, self._buf = self._buf.split("\n", 1)
+            out.append(self._finish_line(line))
+        out.append(self._emit_partial())
+        return "".join(out)
+
+    def flush(self) -> str:
+        """
+        End of stream: returns whatever was held back.
+        """
+        out = []
+        if self._buf or self._line_open:
+            line, self._buf = self._buf, ""
+            out.append(self._finish_line(line))
+        if self._pending_header is not None:
+            out.append(self._table_row(self._pending_header))
+            self._pending_header = None
+        return "".join(out)
+
+    # --- line handling ---
+
+    def _start(self, kind: str) -> str:
+        prefix = ""
+        if self._prev is not None:
+            prefix = "\n"
+            if self._blank or kind != self._prev or kind == "heading":
+                prefix += "\n"
+        self._prev = kind
+        self._blank = False
+        return prefix
+
+    def _inline(self, text: str) -> str:
+        # Number formatting outside `code` spans; span state carries across segments
+        parts = text.split("`")
+        for i, part in enumerate(parts):
+            if i:
+                self._in_code = not self._in_code
+            if not self._in_code:
+                parts[i] = _format_numbers(part)
+        return "`".join(parts)
+
+    def _table_row(self, cells: List[str]) -> str:
+        prefix = self._start("table")
+        if _is_separator(cells):
+            return prefix + "| " + " | ".join(_separator_cell(c) for c in cells) + " |"
+        formatted = []
+        for c in cells:
+            self._in_code = False
+            formatted.append(self._inline(c))
+        self._in_code = False
+        return prefix + "| " + " | ".join(formatted) + " |"
+
+    def _safe_cut(self, text: str) -> int:
+        # Emit up to the last complete word, never separating a currency from its amount
+        end = len(text)
+        while end and not text[end - 1].isspace():
+            end -= 1
+        while end and text[end - 1].isspace():
+            end -= 1
+        if end and _TRAILING_CURRENCY_RE.search(text[:end]):
+            end = _TRAILING_CURRENCY_RE.search(text[:end]).start()
+            while end and text[end - 1].isspace():
+                end -= 1
+        return end
+
+    def _emit_partial(self) -> str:
+        if self._in_fence or self._pending_header is not None:
+            return ""
+        if not self._line_open and (not self._buf or self._buf[0].isspace() or self._buf[0] in _STRUCTURAL_START):
+            return ""
+        cut = self._safe_cut(self._buf)
+        if cut == 0:
+            return ""
+        prefix = ""
+        if not self._line_open:
+            prefix = self._start("text")
+            self._line_open = True
+        segment, self._buf = self._buf[:cut], self._buf[cut:]
+        return prefix + self._inline(segment)
+
+    def _finish_line(self, line: str) -> str:
+        if self._line_open:
+            out = self._inline(line.rstrip())
+            self._line_open = False
+            self._in_code = False
+            return out
+        out = self._process_line(line)
+        self._in_code = False
+        return out
+
+    def _process_line(self, line: str) -> str:
+        if self._in_fence:
+            if line.strip().startswith("```"):
+                self._in_fence = False
+                return "\n" + line.strip()
+            return "\n" + line.rstrip()
+
+        stripped = line.rstrip()
+        is_table = stripped.lstrip().startswith("|")
+
+        out = ""
+        if self._pending_header is not None:
+            header, self._pending_header = self._pending_header, None
+            out = self._table_row(header)
+            if is_table:
+                cells = _split_cells(stripped)
+                if not _is_separator(cells):
+                    out += self._table_row(["---"] * len(header))
+                return out + self._table_row(cells)
+
+        if not stripped.strip():
+            if self._prev is not None:
+                self._blank = True
+            return out
+
+        if is_table:
+            cells = _split_cells(stripped)
+            if self._prev != "table" or self._blank:
+                if not _is_separator(cells):
+                    self._pending_header = cells
+                    return out
+            return out + self._table_row(cells)
+
+        if stripped.lstrip().startswith("```"):
+            self._in_fence = True
+            return out + self._start("fence") + stripped.strip()
+
+        if _RULE_RE.match(stripped):
+            return out + self._start("rule") + "---"
+
+        m = _HEADING_RE.match(stripped)
+        if m and m.group(2):
+            level = max(2, len(m.group(1)))
+            return out + self._start("heading") + "#" * level + " " + self._inline(m.group(2).rstrip(":").strip())
+
+        m = _BOLD_LABEL_RE.match(stripped.strip())
+        if m:
+            label = (m.group(1) or m.group(2)).strip().rstrip(":")
+            if label and len(label.split()) <= 8 and not label.endswith("."):
+                return out + self._start("heading") + "### " + self._inline(label)
+
+        m = _BULLET_RE.match(stripped)
+        if m:
+            indent = len(m.group(1).expandtabs(4)) // 2 * 2
+            return out + self._start("list") + " " * indent + "- " + self._inline(m.group(2))
+
+        m = _NUMBERED_RE.match(stripped)
+        if m:
+            indent = len(m.group(1).expandtabs(4)) // 2 * 2
+            return out + self._start("list") + " " * indent + f"{m.group(2)}. " + self._inline(m.group(3))
+
+        if stripped[0].isspace() and self._prev == "list" and not self._blank:
+            # Continuation of the previous list item
+            indent = max(2, len(stripped.expandtabs(4)) - len(stripped.expandtabs(4).lstrip())) // 2 * 2
+            return out + self._start("list") + " " * indent + self._inline(stripped.strip())
+
+        return out + self._start("text") + self._inline(stripped.strip())
+
+
+def format_markdown(text: str) -> str:
+    """
+    Normalize a complete answer (see module docstring for the rules).
+    """
+    formatter = StreamingMarkdownFormatter()
+    return (formatter.feed((text or "").replace("\r\n", "\n")) + formatter.flush()).strip()
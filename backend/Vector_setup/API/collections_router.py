@@ -1,12 +1,13 @@
 from typing import List, Optional
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query
 from sqlmodel import Session, select
 import json
 
 from Vector_setup.user.db import DBUser, Tenant, Collection, Organization, get_db
 from Vector_setup.user.auth_jwt import ensure_tenant_active
 from Vector_setup.base.db_setup_management import MultiTenantChromaStoreManager, CollectionCreateRequest
+from Vector_setup.base.tabular_store_management import TenantTabularStore
 from Vector_setup.schema.schema_signature import (
     CollectionCreateIn,
     CollectionOut,
@@ -20,6 +21,12 @@ from Vector_setup.access.collections_acl import user_can_access_collection
 from Vector_setup.user.auth_store import get_current_db_user
 
 from Vector_setup.API.helpers.json_load_help import safe_json_loads, safe_json_dumps
+from Vector_setup.API.ingest_routes import get_tabular_store
+from Vector_setup.services.document_registry_service import collection_chunk_total, delete_collection_records
+from Vector_setup.services.document_deletion_service import (
+    purge_collection_data,
+    DELETE_ASYNC_CHUNK_THRESHOLD,
+)
 
 vector_store = MultiTenantChromaStoreManager("./chromadb_multi_tenant")
 
@@ -170,7 +177,7 @@ def list_collections(
                 tenant_id=c.tenant_id,
                 organization_id=c.organization_id,
                 name=c.name,
-                doc_count=0,
+                doc_count=c.doc_count,
                 visibility=c.visibility,
                 allowed_roles=roles,
                 allowed_user_ids=user_ids,
@@ -245,6 +252,57 @@ def update_collection_access(
 
 
 
+@router.delete("/{collection_id}")
+def delete_collection(
+    collection_id: str,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    store: MultiTenantChromaStoreManager = Depends(get_store),
+    tables_store: TenantTabularStore = Depends(get_tabular_store),
+    current_user: DBUser = Depends(_ensure_collection_admin),
+):
+    """
+    Delete a collection with all its documents, vectors and structured tables.
+
+    SQL rows are removed before the response (the collection disappears from
+    listings and retrieval immediately); for large collections the Chroma drop
+    runs in the background and the status is "accepted".
+    """
+    col = db.get(Collection, collection_id)
+    if not col or col.tenant_id != current_user.tenant_id:
+        raise HTTPException(status_code=404, detail="Collection not found")
+
+    tenant_id, name = col.tenant_id, col.name
+    run_async = collection_chunk_total(db, col) > DELETE_ASYNC_CHUNK_THRESHOLD
+    documents_deleted = delete_collection_records(db, col)
+
+    if run_async:
+        background_tasks.add_task(purge_collection_data, store, tables_store, tenant_id, name)
+        purged = {"collection_name": name}
+    else:
+        purged = purge_collection_data(store, tables_store, tenant_id, name)
+
+    write_audit_log(
+        db=db,
+        user=current_user,
+        action="collection_delete",
+        resource_type="collection",
+        resource_id=collection_id,
+        metadata={
+            "tenant_id": tenant_id,
+            "name": name,
+            "documents_deleted": documents_deleted,
+            "background": run_async,
+        },
+    )
+
+    return {
+        "status": "accepted" if run_async else "ok",
+        "documents_deleted": documents_deleted,
+        **purged,
+    }
+
+
 @router.get("/by-org", response_model=list[CollectionOut])
 def list_collections_for_org(
     db: Session = Depends(get_db),
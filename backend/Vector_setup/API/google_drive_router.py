@@ -1,25 +1,64 @@
 
-from fastapi import APIRouter, HTTPException, Depends, status, Request
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, status, Request
 from sqlmodel import Session
 from fastapi.responses import RedirectResponse, JSONResponse, Response
 from urllib.parse import parse_qs, urlencode
 from google_auth_oauthlib.flow import Flow
 from googleapiclient.discovery import build
 from google.oauth2.credentials import Credentials
-from Vector_setup.user.db import DBUser, TenantGoogleDriveConfig, IngestedDriveFile,  get_db, Tenant
+from Vector_setup.user.db import DBUser, TenantGoogleDriveConfig, IngestedDriveFile,  get_db, Tenant, engine, DriveSyncState
 from Vector_setup.API.admin_permission import require_tenant_admin
 import os
+import asyncio
 from pydantic import BaseModel
 from typing import List, Optional
 from googleapiclient.http import MediaIoBaseDownload
 from io import BytesIO
 import uuid
 from Vector_setup.base.db_setup_management import MultiTenantChromaStoreManager
-from Vector_setup.services.extraction_documents_service import extract_text_from_upload
+from Vector_setup.services.extraction_documents_service import extract_document_for_indexing
+from Vector_setup.services.document_dedup_service import (
+    find_document_by_hash,
+    record_duplicate,
+)
+from Vector_setup.services.document_registry_service import record_indexed_document
+from Vector_setup.services.google_drive_crawler_service import (
+    list_all_pages,
+    crawl_drive_tree,
+    folder_query,
+    drive_tree_cache,
+    GOOGLE_DOC_MIME,
+    GOOGLE_SHEET_MIME,
+    GOOGLE_SLIDE_MIME,
+    GOOGLE_FOLDER_MIME,
+    SUPPORTED_MIME_TYPES,
+)
+from Vector_setup.services.google_drive_ingest_service import (
+    create_ingest_job,
+    get_ingest_job,
+    run_drive_folder_ingest,
+)
+from Vector_setup.services.ingestion_pipeline_service import get_extract_process_pool
+from Vector_setup.services.google_drive_sync_service import (
+    mark_file_ingested,
+    drive_document_metadata,
+    tracked_drive_document,
+    sync_tenant_drive,
+    DRIVE_FILE_FIELDS,
+    DRIVE_SYNC_INTERVAL_S,
+)
+from Vector_setup.services.upload_spool_service import (
+    SpooledUpload,
+    UploadTooLargeError,
+    too_large_http_error,
+    MAX_UPLOAD_BYTES,
+    UPLOAD_CHUNK_BYTES,
+)
 from googleapiclient.errors import HttpError
 import requests
 from Vector_setup.user.auth_jwt import ensure_tenant_active, ensure_tenant_active_by_id
-from Vector_setup.API.ingest_routes import get_collection_for_user_or_403
+from Vector_setup.API.ingest_routes import get_collection_for_user_or_403, get_tabular_store
+from Vector_setup.base.tabular_store_management import TenantTabularStore
 
 
 
@@ -144,6 +183,8 @@ def google_drive_callback(
     print("Saving Google Drive config for tenant", tenant_id, account_email)
     db.commit()
     print("Saved config")
+    # A different account may have been connected; drop cached folder trees
+    drive_tree_cache.invalidate(tenant_id)
 
     return RedirectResponse(FRONTEND_AFTER_CONNECT_URL)
 
@@ -166,10 +207,10 @@ def google_drive_status(
 
 
 # Added a helper that reconstructs credentials for the current tenant
-def get_drive_service_for_tenant(
+def get_drive_credentials_for_tenant(
     tenant_id: str,
     db: Session
-):
+) -> Credentials:
     cfg = (
         db.query(TenantGoogleDriveConfig)
         .filter_by(tenant_id=tenant_id)
@@ -185,7 +226,7 @@ def get_drive_service_for_tenant(
         "https://www.googleapis.com/auth/drive.readonly"
     ]
     
-    creds = Credentials(
+    return Credentials(
         token=None, # Will be obtained using refresh_token
         refresh_token=cfg.refresh_token,
         token_uri="https://oauth2.googleapis.com/token",
@@ -193,9 +234,11 @@ def get_drive_service_for_tenant(
         client_secret=GOOGLE_CLIENT_SECRET,
         scopes=scopes
     )
-    
+
+
+def build_drive_service(creds: Credentials):
     try:
-       service = build("drive", "v3", credentials=creds)   
+       service = build("drive", "v3", credentials=creds, cache_discovery=False)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -205,6 +248,13 @@ def get_drive_service_for_tenant(
     return service
 
 
+def get_drive_service_for_tenant(
+    tenant_id: str,
+    db: Session
+):
+    return build_drive_service(get_drive_credentials_for_tenant(tenant_id, db))
+
+
 # Endpoint List files from Drive
 class DriveFileOut(BaseModel):
     id: str
@@ -221,8 +271,9 @@ class DriveFileOut(BaseModel):
 @router.get("/files", response_model=List[DriveFileOut])
 def list_drive_files(
     folder_id: Optional[str] = None,
-    page_size: int = 100,
+    page_size: int = 1000,
     recursive: bool = False,
+    refresh: bool = False,
     db: Session = Depends(get_db),
     current_user: DBUser = Depends(require_tenant_admin),
     tenant: Tenant = Depends(ensure_tenant_active),
@@ -234,65 +285,28 @@ def list_drive_files(
     List files in this tenant's connected Google Drive.
     If folder_id is provided, list that folder's children.
     - Otherwise, list items in 'My Drive' visible to this account.
-    - If recursive=True, traverse subfolders and return all descendants.
+    - If recursive=True, traverse subfolders (from My Drive root when no folder_id)
+      and return all descendants.
+    - All result pages are fetched; listings are cached per tenant for
+      DRIVE_TREE_CACHE_TTL_S unless refresh=True.
     """
     tenant_id = current_user.tenant_id
-    service = get_drive_service_for_tenant(tenant_id, db)
-    
-    def _list_page(q: str) -> list[dict]:
-        # you can also set spaces="drive" explicitly if needed.
-        results = (
-            service.files()
-            .list(
-                q=q,
-                pageSize=page_size,
-                fields=(
-                    "nextPageToken, "
-                    "files(id, name, mimeType, parents, size, modifiedTime)"
-                ),
-                
-            )
-            .execute()
-        )
-        return results.get("files", [])
-    
-    # Base query: non-trashed files.
-    q_parts = ["trashed = false"]
-    if folder_id:
-        q_parts.append(f"'{folder_id}' in parents")
-    #else: omit parents filter to treat as root/visible.
-        
-        
-    query = " and ".join(q_parts)
-    
-    if not recursive:
-        files = _list_page(query)
-    else:
-        # BFS/DFS through subfolders using multiple list calls.
-        files: list[dict] = []
-        folders_to_visit = list[Optional[str]] =  [folder_id] if folder_id else [None]        
-        visited_folders: set[str] = set()
-        
-        while folders_to_visit:
-            current_folder = folders_to_visit.pop()
-            q_parts = ["trashed = false"]
-            if current_folder:
-                q_parts.append(f"'{current_folder}' in parents")
-                
-            query = " and ".join(q_parts)
-            
-            page_files = _list_page(query)
-            files.extend(page_files)
-            
-            # Add any child folders to the queue
-            for f in page_files:
-                if f.get("mimeType") == GOOGLE_FOLDER_MIME:
-                    fid = f["id"]
-                    if fid not in visited_folders:
-                        visited_folders.add(fid)
-                        folders_to_visit.append(fid)
-                        
-                        
+
+    files = None if refresh else drive_tree_cache.get(tenant_id, folder_id, recursive)
+    if files is None:
+        creds = get_drive_credentials_for_tenant(tenant_id, db)
+
+        def _service_factory():
+            return build_drive_service(creds)
+
+        if not recursive:
+            # Base query: non-trashed files (children of folder_id when given), all pages
+            files = list_all_pages(_service_factory(), folder_query(folder_id), page_size)
+        else:
+            # Level-by-level crawl, listing the folders of each level concurrently
+            files = crawl_drive_tree(_service_factory, folder_id, page_size)
+        drive_tree_cache.put(tenant_id, folder_id, recursive, files)
+
     file_ids = [f["id"] for f in files]
     
     ingested_rows = (
@@ -312,7 +326,7 @@ def list_drive_files(
             name=f["name"],
             mime_type=f.get("mimeType", ""),
             is_folder=(f.get("mimeType") == GOOGLE_FOLDER_MIME),
-            siz=int(f["size"]) if "size" in f else None,
+            size=int(f["size"]) if "size" in f else None,
             modified_time=f.get("modifiedTime"),
             already_ingested=f["id"] in ingested_ids,
             is_supported=(
@@ -337,60 +351,75 @@ class DriveIngestRequest(BaseModel):
     title: Optional[str] = None
     
 
-def mark_file_ingested(
-    db: Session,
-    tenant_id: str,
-    drive_file_id: str,
-    filename: str,
-    mime_type: str,
-)-> None:
-    existing = (
-        db.query(IngestedDriveFile)
-        .filter_by(tenant_id=tenant_id, drive_file_id=drive_file_id)
-        .first()
-    )
-    if existing:
-        existing.filename = filename
-        existing.mime_type = mime_type
-    else:
-        db.add(
-            IngestedDriveFile(
-                tenant_id=tenant_id,
-                drive_file_id=drive_file_id,
-                filename=filename,
-                mime_type=mime_type
+from Vector_setup.user.audit import write_audit_log
+
+
+def download_drive_file(service, file_meta: dict) -> tuple[SpooledUpload, str]:
+    """
+    Download (binary files) or export (Google Docs/Sheets/Slides) a Drive file
+    into a size-limited spool, in bounded chunks.
+
+    Returns the spool and the filename to pass to the extractor (exports get
+    the extension of their export format). Raises UploadTooLargeError / HttpError.
+    """
+    original_name = file_meta["name"]
+    mime_type = file_meta.get("mimeType", "")
+
+    # Reject oversize binaries before downloading (Google-native exports have no size)
+    if int(file_meta.get("size") or 0) > MAX_UPLOAD_BYTES:
+        raise UploadTooLargeError(MAX_UPLOAD_BYTES)
+
+    # 1) Decide how to download/export and what "filename" to pass to extractor
+    if mime_type.startswith("application/vnd.google-apps"):
+        # Google Workspace files: choose export target per type
+        if mime_type == GOOGLE_DOC_MIME:
+            export_mime = (
+                "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+            )
+            synthetic_filename = f"{original_name}.docx"
+        elif mime_type == GOOGLE_SHEET_MIME:
+            export_mime = (
+                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             )
+            synthetic_filename = f"{original_name}.xlsx"
+        elif mime_type == GOOGLE_SLIDE_MIME:
+            export_mime = "application/pdf"
+            synthetic_filename = f"{original_name}.pdf"
+        else:
+            # Fallback: try PDF
+            export_mime = "application/pdf"
+            synthetic_filename = f"{original_name}.pdf"
+
+        request = service.files().export_media(
+            fileId=file_meta["id"],
+            mimeType=export_mime,
         )
-    db.commit()
+    else:
+        # Normal Drive binary files (PDF, DOCX, etc.)
+        synthetic_filename = original_name  # already has extension
+        request = service.files().get_media(fileId=file_meta["id"])
 
-# refine ingest function for google native documents supports
-GOOGLE_DOC_MIME = "application/vnd.google-apps.document"
-GOOGLE_SHEET_MIME = "application/vnd.google-apps.spreadsheet"
-GOOGLE_SLIDE_MIME = "application/vnd.google-apps.presentation"
-GOOGLE_FOLDER_MIME = "application/vnd.google-apps.folder"
-
-SUPPORTED_MIME_TYPES = {
-    "application/pdf",
-    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-    "application/msword",
-    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    "application/vnd.ms-excel",
-    "text/plain",
-    "text/markdown",
-    # Google Workspace native types that you export:
-    GOOGLE_DOC_MIME,
-    GOOGLE_SHEET_MIME,
-    GOOGLE_SLIDE_MIME,
-}
+    # 2) Download in bounded chunks into a size-limited spool
+    buf = SpooledUpload(suffix=os.path.splitext(synthetic_filename)[1])
+    try:
+        downloader = MediaIoBaseDownload(buf, request, chunksize=UPLOAD_CHUNK_BYTES)
+        done = False
+        while not done:
+            status_chunk, done = downloader.next_chunk()
+            logger.info("Download %d%%", int(status_chunk.progress() * 100))
+    except Exception:
+        buf.close()
+        raise
 
+    return buf, synthetic_filename
 
-from Vector_setup.user.audit import write_audit_log
 
 @router.post("/ingest")
 async def ingest_drive_file(
     req: DriveIngestRequest,
     db: Session = Depends(get_db),
     store: MultiTenantChromaStoreManager = Depends(get_store),
+    tables_store: TenantTabularStore = Depends(get_tabular_store),
     current_user: DBUser = Depends(require_tenant_admin),
     # tenant: Tenant = Depends(ensure_tenant_active)
 
@@ -423,51 +452,17 @@ async def ingest_drive_file(
     # 1) Get file metadata
     file_meta = (
         service.files()
-        .get(fileId=req.file_id, fields="id, name, mimeType")
+        .get(fileId=req.file_id, fields=DRIVE_FILE_FIELDS)
         .execute()
     )
     original_name = file_meta["name"]
     mime_type = file_meta.get("mimeType", "")
 
-    buf = BytesIO()
-
-    # 2) Decide how to download/export and what "filename" to pass to extractor
-    if mime_type.startswith("application/vnd.google-apps"):
-        # Google Workspace files: choose export target per type
-        if mime_type == GOOGLE_DOC_MIME:
-            export_mime = (
-                "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-            )
-            synthetic_filename = f"{original_name}.docx"
-        elif mime_type == GOOGLE_SHEET_MIME:
-            export_mime = (
-                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-            synthetic_filename = f"{original_name}.xlsx"
-        elif mime_type == GOOGLE_SLIDE_MIME:
-            export_mime = "application/pdf"
-            synthetic_filename = f"{original_name}.pdf"
-        else:
-            # Fallback: try PDF
-            export_mime = "application/pdf"
-            synthetic_filename = f"{original_name}.pdf"
-
-        request = service.files().export_media(
-            fileId=req.file_id,
-            mimeType=export_mime,
-        )
-    else:
-        # Normal Drive binary files (PDF, DOCX, etc.)
-        synthetic_filename = original_name  # already has extension
-        request = service.files().get_media(fileId=req.file_id)
-
-    # 3) Download
+    # 2) Download/export in bounded chunks into a size-limited spool
     try:
-        downloader = MediaIoBaseDownload(buf, request)
-        done = False
-        while not done:
-            status_chunk, done = downloader.next_chunk()
-            logger.info("Download %d%%", int(status_chunk.progress() * 100))
+        buf, synthetic_filename = download_drive_file(service, file_meta)
+    except UploadTooLargeError:
+        raise too_large_http_error()
     except HttpError as e:
         # Handle large file export limit
         if e.resp.status == 403 and "exportSizeLimitExceeded" in str(e):
@@ -485,45 +480,44 @@ async def ingest_drive_file(
             detail="Failed to download file from Google Drive.",
         )
 
-    raw_bytes = buf.getvalue()
+    # 4) Extract text (identical content already in the collection is linked, not re-indexed)
+    with buf:
+        existing = find_document_by_hash(db, tenant_id, req.collection_name, buf.content_hash)
+        if existing is not None:
+            mark_file_ingested(
+                db=db,
+                tenant_id=tenant_id,
+                drive_file_id=req.file_id,
+                filename=original_name,
+                mime_type=mime_type,
+                collection_name=req.collection_name,
+            )
+            return record_duplicate(db, existing, filename=original_name, source="google_drive")
 
-    # 4) Extract text
-    text = extract_text_from_upload(synthetic_filename, raw_bytes)
+        source = buf.source()
+        text, tables, table_chunks = extract_document_for_indexing(synthetic_filename, source)
     if not isinstance(text, str) or not text.strip():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No text could be extracted from the Google Drive file.",
         )
 
-    # 5) Index into vector store
-    doc_id = str(uuid.uuid4())
-    # Look up collection info
-    collection_info = store.get_collection_info(tenant_id, req.collection_name) # to be implemented
-    collection_display_name = collection_info.get("display_name", req.collection_name)
-    high_level_topic = collection_info.get("topic") # e.g. "HR & Policies", "Engineering", etc.
-    
-    metadata = {
-        "filename": original_name,
-        "title": req.title or original_name,
-        "content_type": mime_type,
-        "size_bytes": len(raw_bytes),
-        "source": "google_drive",
-        "drive_file_id": req.file_id,
-        "tenant_id": tenant_id,
-        "collection": req.collection_name,
-        "collection_display_name": collection_display_name,
-        "high_level_topic": high_level_topic,
-        "collection_id": collection.id,
-        "organization_id": collection.organization_id,
-    }
-    
+    # 5) Index into vector store; a file already ingested into this collection keeps
+    #    its doc_id and is re-indexed incrementally (no second copy of its chunks)
+    tracked = tracked_drive_document(db, tenant_id, req.file_id, collection)
+    doc_id = tracked.doc_id if tracked is not None else str(uuid.uuid4())
+    metadata = drive_document_metadata(
+        store, collection, req.file_id, original_name, req.title, mime_type, buf.size
+    )
 
-    result = await store.add_document(
+    index_document = store.upsert_document if tracked is not None else store.add_document
+    result = await index_document(
         tenant_id=tenant_id,
         collection_name=req.collection_name,
         doc_id=doc_id,
         text=text,
         metadata=metadata,
+        table_chunks=table_chunks,
     )
 
     if result.get("status") != "ok":
@@ -532,6 +526,35 @@ async def ingest_drive_file(
             detail=result.get("message", "Indexing failed!"),
         )
 
+    record_indexed_document(
+        db,
+        collection=collection,
+        doc_id=doc_id,
+        source="google_drive",
+        filename=original_name,
+        chunk_count=result.get("chunks_indexed", 0),
+        size_bytes=buf.size,
+        content_hash=buf.content_hash,
+        title=req.title,
+        content_type=mime_type,
+        drive_file_id=req.file_id,
+    )
+
+    # Mirror tabular sources into the structured store for exact aggregations
+    try:
+        if tables:
+            tables_store.load_tables(
+                tenant_id=tenant_id,
+                collection_name=req.collection_name,
+                doc_id=doc_id,
+                tables=tables,
+                title=req.title or original_name,
+            )
+        elif tracked is not None:
+            tables_store.delete_document(tenant_id, doc_id)
+    except Exception:
+        logger.warning("Failed to load tables for doc %s", doc_id, exc_info=True)
+
     # Add to audit log
     write_audit_log(
         db=db,
@@ -549,18 +572,85 @@ async def ingest_drive_file(
         },
     )
 
-    # 6) Mark file as ingested for this tenant (for UX "already ingested" flag)
+    # 6) Mark file as ingested for this tenant ("already ingested" flag, and the version for sync)
     mark_file_ingested(
         db=db,
         tenant_id=tenant_id,
         drive_file_id=req.file_id,
         filename=original_name,
         mime_type=mime_type,
+        doc_id=doc_id,
+        collection_name=req.collection_name,
+        modified_time=file_meta.get("modifiedTime"),
+        md5_checksum=file_meta.get("md5Checksum"),
     )
 
     return {"status": "ok", "doc_id": doc_id}
 
 
+class DriveFolderIngestRequest(BaseModel):
+    folder_id: Optional[str] = None  # None -> My Drive root
+    collection_name: str
+    recursive: bool = True
+
+
+@router.post("/ingest-folder", status_code=status.HTTP_202_ACCEPTED)
+def ingest_drive_folder(
+    req: DriveFolderIngestRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    store: MultiTenantChromaStoreManager = Depends(get_store),
+    tables_store: TenantTabularStore = Depends(get_tabular_store),
+    current_user: DBUser = Depends(require_tenant_admin),
+    tenant: Tenant = Depends(ensure_tenant_active),
+):
+    """
+    Ingest every supported file of a Drive folder (recursively by default) into a collection.
+
+    Runs in the background: concurrent downloads, extraction in a process pool and
+    embedding batched across files. Poll GET /google-drive/ingest-jobs/{job_id}
+    for progress and per-file outcomes.
+    """
+    tenant_id = current_user.tenant_id
+
+    collection = get_collection_for_user_or_403(
+        db=db,
+        current_user=current_user,
+        tenant_id=tenant_id,
+        collection_name=req.collection_name,
+    )
+    creds = get_drive_credentials_for_tenant(tenant_id, db)
+
+    def _service_factory():
+        return build_drive_service(creds)
+
+    job = create_ingest_job(tenant_id, req.collection_name, req.folder_id)
+    background_tasks.add_task(
+        run_drive_folder_ingest,
+        job,
+        collection_id=collection.id,
+        user_id=current_user.id,
+        service_factory=_service_factory,
+        download_fn=download_drive_file,
+        store=store,
+        tables_store=tables_store,
+        recursive=req.recursive,
+        extract_executor=get_extract_process_pool(),
+    )
+    return {"status": "accepted", "job_id": job["job_id"]}
+
+
+@router.get("/ingest-jobs/{job_id}")
+def get_drive_ingest_job(
+    job_id: str,
+    current_user: DBUser = Depends(require_tenant_admin),
+):
+    job = get_ingest_job(current_user.tenant_id, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    return job
+
+
 @router.post("/disconnect", status_code=status.HTTP_204_NO_CONTENT)
 def disconnect_google_drive(
     db: Session = Depends(get_db),
@@ -604,10 +694,96 @@ def disconnect_google_drive(
             # Do not block disconnect on revoke failure
             pass
 
+    # The changes cursor belongs to the disconnected account
+    sync_state = db.query(DriveSyncState).filter_by(tenant_id=tenant_id).first()
+    if sync_state:
+        db.delete(sync_state)
+
     db.delete(cfg)
     db.commit()
+    drive_tree_cache.invalidate(tenant_id)
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post("/sync")
+async def sync_google_drive(
+    full: bool = False,
+    db: Session = Depends(get_db),
+    store: MultiTenantChromaStoreManager = Depends(get_store),
+    tables_store: TenantTabularStore = Depends(get_tabular_store),
+    current_user: DBUser = Depends(require_tenant_admin),
+    tenant: Tenant = Depends(ensure_tenant_active),
+):
+    """
+    Re-index this tenant's ingested Drive files that changed since the last
+    sync and delete the ones removed from Drive.
+
+    - Uses the stored Drive changes cursor; full=True re-checks every tracked file.
+    - The same sync runs periodically for every connected tenant when
+      DRIVE_SYNC_INTERVAL_S is set.
+    - 409 while a sync for this tenant is running in any worker (scheduled or manual).
+    """
+    tenant_id = current_user.tenant_id
+    service = get_drive_service_for_tenant(tenant_id=tenant_id, db=db)
+
+    result = await sync_tenant_drive(
+        db,
+        tenant_id=tenant_id,
+        service=service,
+        store=store,
+        tables_store=tables_store,
+        download_fn=download_drive_file,
+        full=full,
+    )
+    if result["status"] == "busy":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A Google Drive sync is already running for this tenant.",
+        )
+
+    write_audit_log(
+        db=db,
+        user=current_user,
+        action="drive_sync",
+        resource_type="tenant",
+        resource_id=tenant_id,
+        metadata={k: result[k] for k in ("mode", "updated", "removed", "unchanged")},
+    )
+    return result
+
+
+async def sync_all_connected_tenants() -> List[dict]:
+    """
+    One scheduled sync pass over every tenant with a Drive connection.
+    """
+    with Session(engine) as db:
+        tenant_ids = [cfg.tenant_id for cfg in db.query(TenantGoogleDriveConfig).all()]
+
+    results = []
+    for tenant_id in tenant_ids:
+        try:
+            with Session(engine) as db:
+                service = get_drive_service_for_tenant(tenant_id=tenant_id, db=db)
+                results.append(
+                    await sync_tenant_drive(
+                        db,
+                        tenant_id=tenant_id,
+                        service=service,
+                        store=vector_store,
+                        tables_store=get_tabular_store(),
+                        download_fn=download_drive_file,
+                    )
+                )
+        except Exception:
+            logger.warning("Scheduled Drive sync failed for tenant %s", tenant_id, exc_info=True)
+    return results
+
+
+async def drive_sync_loop(interval_s: float = DRIVE_SYNC_INTERVAL_S) -> None:
+    while True:
+        await asyncio.sleep(interval_s)
+        await sync_all_connected_tenants()
         
 
            
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, UploadFile, File, Form, HTTPException, status
 from pydantic import BaseModel
 from typing import List, Optional
 import uuid
@@ -8,8 +8,7 @@ from Vector_setup.user.db import get_db, Tenant, Collection
 from Vector_setup.user.auth_jwt import ensure_tenant_active, get_current_user
 from Vector_setup.access.collections_acl import user_can_access_collection
 from Vector_setup.user.db import DBUser, Collection
-from Vector_setup.API.collections_router import _ensure_collection_admin
-from Vector_setup.schema.schema_signature import CollectionOut, CompanyOut, OrganizationOut
+from Vector_setup.schema.schema_signature import CollectionOut, CompanyOut, OrganizationOut, DocumentOut
 
 
 import logging
@@ -22,9 +21,38 @@ from Vector_setup.base.db_setup_management import (
     CompanyProvisionRequest,
     CompanyCreateRequest,
 )
+from Vector_setup.base.tabular_store_management import TenantTabularStore
 from Vector_setup.user.auth_store import  get_current_db_user
 from Vector_setup.base.auth_models import UserOut
-from Vector_setup.services.extraction_documents_service import extract_text_from_upload
+from Vector_setup.services.extraction_documents_service import extract_document_for_indexing, is_supported_upload
+from Vector_setup.services.upload_spool_service import (
+    spool_upload_file,
+    expand_zip_upload,
+    is_zip_upload,
+    UploadTooLargeError,
+    too_large_http_error,
+    MAX_BULK_FILES,
+    MAX_BULK_UPLOAD_BYTES,
+)
+from Vector_setup.services.document_dedup_service import (
+    find_document_by_hash,
+    find_duplicate_upload,
+    record_duplicate,
+    dedup_stats,
+)
+from Vector_setup.services.document_registry_service import (
+    find_foreign_document,
+    record_indexed_document,
+    list_documents,
+    get_document,
+    delete_document_record,
+    chunk_ids_for,
+)
+from Vector_setup.services.ingestion_pipeline_service import IngestionPipeline
+from Vector_setup.services.document_deletion_service import (
+    purge_document_data,
+    DELETE_ASYNC_CHUNK_THRESHOLD,
+)
 from Vector_setup.user.roles import COLLECTION_MANAGE_ROLES, UPLOAD_ROLES, VENDOR_ROLES
 
 router = APIRouter()
@@ -37,6 +65,14 @@ def get_store() -> MultiTenantChromaStoreManager:
     return vector_store
 
 
+# Single shared structured store for spreadsheet/CSV data
+tabular_store = TenantTabularStore()
+
+
+def get_tabular_store() -> TenantTabularStore:
+    return tabular_store
+
+
 # ---------- Role helpers ----------
 def require_vendor(current_user: UserOut = Depends(get_current_user)) -> UserOut:
     if current_user.role not in VENDOR_ROLES:
@@ -268,26 +304,16 @@ def list_company_collections(
         if user_can_access_collection(current_user, c)
     ]
 
-    # Optionally get doc_count from Chroma
+    # doc_count is maintained in SQL by the documents registry (no Chroma round-trips)
     collections_out: List[CollectionOut] = []
     for c in visible:
-        doc_count = 0
-        try:
-            chroma_col = store.get_collection(
-                tenant_id=tenant_id,
-                collection_name=c.name,
-            )
-            doc_count = chroma_col.count()
-        except Exception:
-            doc_count = 0
-
         collections_out.append(
             CollectionOut(
                 id=c.id,
                 tenant_id=c.tenant_id,
                 organization_id=c.organization_id,
                 name=c.name,
-                doc_count=doc_count,
+                doc_count=c.doc_count,
                 visibility=c.visibility,
                 allowed_roles=c.allowed_roles,
                 allowed_user_ids=c.allowed_user_ids,
@@ -337,6 +363,7 @@ async def upload_document(
     doc_id: Optional[str] = Form(None),
     file: UploadFile = File(...),
     store: MultiTenantChromaStoreManager = Depends(get_store),
+    tables_store: TenantTabularStore = Depends(get_tabular_store),
     db: Session = Depends(get_db),
     current_user: UserOut = Depends(require_uploader),
     # tenant: Tenant = Depends(ensure_tenant_active),
@@ -370,10 +397,27 @@ async def upload_document(
         collection_name=collection_name,
     )
 
-    # Read raw bytes
-    raw_bytes = await file.read()
+    # A re-upload may only target a document of this collection; doc_id is the
+    # registry key, so reusing another tenant's / collection's id would take it over
+    if doc_id and find_foreign_document(db, collection, doc_id) is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="doc_id is already used by another document.",
+        )
+
+    # Stream to a size-bounded spool (memory for small files, temp file for large ones)
+    spooled = await spool_upload_file(file)
+    with spooled:
+        # Identical content already indexed in this collection: link instead of re-embedding
+        # (an update of doc_id is only skipped when doc_id itself already has these bytes)
+        existing = find_duplicate_upload(db, tenant_id, collection_name, spooled.content_hash, doc_id)
+        if existing is not None:
+            return record_duplicate(db, existing, filename=file.filename, source="upload")
+
+        source = spooled.source()
 
-    text = extract_text_from_upload(file.filename, raw_bytes)
+        # Tabular sources (xlsx/csv) are chunked by row groups; others go through text extraction
+        text, tables, table_chunks = extract_document_for_indexing(file.filename, source)
     
     # Defensive checks in case any extractor changes
     if not isinstance(text, str):
@@ -400,7 +444,7 @@ async def upload_document(
         "filename": file.filename,
         "title": title or file.filename,
         "content_type": file.content_type,
-        "size_bytes": len(raw_bytes),
+        "size_bytes": spooled.size,
         "tenant_id": tenant_id,
         "collection": collection_name,
          "collection_display_name": collection_display_name,
@@ -409,13 +453,16 @@ async def upload_document(
         "organization_id": collection.organization_id,
     }
 
-    # Delegate to vector store (chunking + embeddings)
-    result = await store.add_document(
+    # Delegate to vector store (chunking + embeddings).
+    # An explicit doc_id is a re-upload: only changed chunks are re-embedded and stale ones removed.
+    index_document = store.upsert_document if doc_id else store.add_document
+    result = await index_document(
         tenant_id=tenant_id,
         collection_name=collection_name,
         doc_id=final_doc_id,
         text=text,
         metadata=metadata,
+        table_chunks=table_chunks,
     )
 
     if result.get("status") != "ok":
@@ -423,6 +470,32 @@ async def upload_document(
             status_code=500,
             detail=result.get("message", "Indexing failed"),
         )
+
+    record_indexed_document(
+        db,
+        collection=collection,
+        doc_id=final_doc_id,
+        source="upload",
+        filename=file.filename,
+        chunk_count=result.get("chunks_indexed", 0),
+        size_bytes=spooled.size,
+        content_hash=spooled.content_hash,
+        title=title,
+        content_type=file.content_type,
+    )
+
+    # Mirror tabular sources into the structured store for exact aggregations
+    if tables:
+        try:
+            tables_store.load_tables(
+                tenant_id=tenant_id,
+                collection_name=collection_name,
+                doc_id=final_doc_id,
+                tables=tables,
+                title=title or file.filename,
+            )
+        except Exception:
+            logger.warning("Failed to load tables for doc %s", final_doc_id, exc_info=True)
     
     # add to audit log
     write_audit_log(
@@ -444,6 +517,331 @@ async def upload_document(
     return result
 
 
+@router.post("/documents/upload/bulk")
+async def upload_documents_bulk(
+    tenant_id: str = Form(...),
+    collection_name: str = Form(...),
+    files: List[UploadFile] = File(...),
+    store: MultiTenantChromaStoreManager = Depends(get_store),
+    tables_store: TenantTabularStore = Depends(get_tabular_store),
+    db: Session = Depends(get_db),
+    current_user: UserOut = Depends(require_uploader),
+):
+    """
+    Upload many documents (and/or ZIP archives of documents) into one collection.
+
+    - Tenant, collection and ACL are resolved once for the whole batch.
+    - Files go through the staged IngestionPipeline: extraction (bounded by
+      INGEST_EXTRACT_CONCURRENCY), chunking, batched embedding and Chroma writes overlap.
+    - A failing file is reported in the response and does not abort the batch.
+    - One summarized audit entry is written for the batch.
+    """
+    if tenant_id != current_user.tenant_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed to upload into this tenant.",
+        )
+
+    if not tenant_id.replace("-", "").replace("_", "").isalnum():
+        raise HTTPException(status_code=400, detail="Invalid tenant_id")
+
+    if not collection_name.replace("-", "").replace("_", "").isalnum():
+        raise HTTPException(status_code=400, detail="Invalid collection name")
+
+    if len(files) > MAX_BULK_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files. Maximum is {MAX_BULK_FILES} per request.",
+        )
+
+    # 1) Resolve collection + ACL + display info once for the batch
+    collection = get_collection_for_user_or_403(
+        db=db,
+        current_user=current_user,
+        tenant_id=tenant_id,
+        collection_name=collection_name,
+    )
+    collection_info = store.get_collection_info(tenant_id, collection_name)
+    collection_display_name = collection_info.get("display_name", collection_name)
+    high_level_topic = collection_info.get("topic")
+
+    failures: List[dict] = []
+    duplicates: List[dict] = []
+    spools = []  # (filename, content_type, SpooledUpload)
+
+    try:
+        # 2) Spool uploads; expand ZIP archives into their members
+        for upload in files:
+            try:
+                spooled = await spool_upload_file(upload)
+            except HTTPException as exc:
+                failures.append({"filename": upload.filename, "error": exc.detail})
+                continue
+
+            if not is_zip_upload(upload.filename):
+                spools.append((upload.filename, upload.content_type, spooled))
+                continue
+
+            with spooled:
+                try:
+                    members = expand_zip_upload(spooled, max_files=MAX_BULK_FILES - len(spools))
+                except UploadTooLargeError:
+                    failures.append({
+                        "filename": upload.filename,
+                        "error": too_large_http_error(MAX_BULK_UPLOAD_BYTES).detail,
+                    })
+                    continue
+                except ValueError as exc:
+                    failures.append({"filename": upload.filename, "error": str(exc)})
+                    continue
+            spools.extend((name, None, member) for name, member in members)
+
+        # 2b) Skip content already indexed in this collection or repeated within the batch
+        to_extract = []
+        batch_duplicates = []  # (filename, content_hash) of repeats inside this request
+        seen_hashes = set()
+        for filename, content_type, spooled in spools:
+            content_hash = spooled.content_hash
+            existing = find_document_by_hash(db, tenant_id, collection_name, content_hash)
+            if existing is not None:
+                duplicates.append(record_duplicate(db, existing, filename=filename, source="bulk_upload"))
+            elif content_hash in seen_hashes:
+                batch_duplicates.append((filename, content_hash))
+            else:
+                seen_hashes.add(content_hash)
+                to_extract.append((filename, content_type, spooled))
+
+        # 3) Staged pipeline: extract / chunk / embed / write overlap across files;
+        #    each file is isolated from the others' errors
+        items: List[dict] = []
+        for filename, content_type, spooled in to_extract:
+            if not is_supported_upload(filename):
+                failures.append({"filename": filename, "error": "Unsupported file type."})
+                continue
+            items.append({
+                "doc_id": str(uuid.uuid4()),
+                "filename": filename,
+                "source": spooled.source(),
+                "content_hash": spooled.content_hash,
+                "metadata": {
+                    "filename": filename,
+                    "title": filename,
+                    "content_type": content_type,
+                    "size_bytes": spooled.size,
+                    "tenant_id": tenant_id,
+                    "collection": collection_name,
+                    "collection_display_name": collection_display_name,
+                    "high_level_topic": high_level_topic,
+                    "collection_id": collection.id,
+                    "organization_id": collection.organization_id,
+                },
+            })
+
+        result = {"documents": {}, "chunks_indexed": 0}
+        if items:
+            result = await IngestionPipeline(store).run(tenant_id, collection_name, items)
+    finally:
+        for _, _, spooled in spools:
+            spooled.close()
+
+    # 4) Mirror tabular sources into the structured store
+    for item in items:
+        tables = result["documents"].get(item["doc_id"], {}).pop("tables", None)
+        if not tables or result["documents"][item["doc_id"]]["status"] != "ok":
+            continue
+        try:
+            tables_store.load_tables(
+                tenant_id=tenant_id,
+                collection_name=collection_name,
+                doc_id=item["doc_id"],
+                tables=tables,
+                title=item["filename"],
+            )
+        except Exception:
+            logger.warning("Failed to load tables for doc %s", item["doc_id"], exc_info=True)
+
+    # 5) SQL registry + per-file outcome
+    indexed = []
+    for item in items:
+        doc_result = result["documents"].get(item["doc_id"], {})
+        if doc_result.get("status") == "ok":
+            record_indexed_document(
+                db,
+                collection=collection,
+                doc_id=item["doc_id"],
+                source="bulk_upload",
+                filename=item["filename"],
+                chunk_count=doc_result["chunks_indexed"],
+                size_bytes=item["metadata"]["size_bytes"],
+                content_hash=item["content_hash"],
+                content_type=item["metadata"]["content_type"],
+            )
+            indexed.append({
+                "doc_id": item["doc_id"],
+                "filename": item["filename"],
+                "chunks_indexed": doc_result["chunks_indexed"],
+            })
+        else:
+            failures.append({
+                "filename": item["filename"],
+                "error": doc_result.get("error", "Indexing failed"),
+            })
+
+    # Repeats inside this request point at the copy that was just indexed
+    for filename, content_hash in batch_duplicates:
+        existing = find_document_by_hash(db, tenant_id, collection_name, content_hash)
+        if existing is not None:
+            duplicates.append(record_duplicate(db, existing, filename=filename, source="bulk_upload"))
+        else:
+            failures.append({"filename": filename, "error": "Duplicate of a file that failed to index."})
+
+    # 7) One audit entry for the whole batch
+    write_audit_log(
+        db=db,
+        user=current_user,
+        action="document_bulk_ingest",
+        resource_type="collection",
+        resource_id=collection.id,
+        metadata={
+            "tenant_id": tenant_id,
+            "collection_name": collection.name,
+            "documents_indexed": len(indexed),
+            "documents_failed": len(failures),
+            "documents_deduplicated": len(duplicates),
+            "chunks_indexed": result.get("chunks_indexed", 0),
+            "doc_ids": [d["doc_id"] for d in indexed],
+            "filenames": [d["filename"] for d in indexed],
+            "source": "bulk_upload",
+        },
+    )
+
+    return {
+        "status": "ok" if indexed or duplicates else "error",
+        "tenant_id": tenant_id,
+        "collection_name": collection_name,
+        "documents_indexed": len(indexed),
+        "documents_failed": len(failures),
+        "documents_deduplicated": len(duplicates),
+        "chunks_indexed": result.get("chunks_indexed", 0),
+        "stats": result.get("stats"),
+        "documents": indexed,
+        "duplicates": duplicates,
+        "failures": failures,
+    }
+
+
+@router.get("/documents", response_model=List[DocumentOut])
+def list_tenant_documents(
+    collection_name: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0,
+    db: Session = Depends(get_db),
+    current_user: DBUser = Depends(get_current_db_user),
+):
+    """
+    List indexed documents of the current tenant from the SQL registry (newest first).
+
+    - collection_name: restrict to one collection (ACL enforced).
+    - Without it, only documents of collections the user can access are returned.
+    """
+    limit = max(1, min(limit, 500))
+    tenant_id = current_user.tenant_id
+
+    if collection_name:
+        collection = get_collection_for_user_or_403(
+            db=db,
+            current_user=current_user,
+            tenant_id=tenant_id,
+            collection_name=collection_name,
+        )
+        allowed_ids = [collection.id]
+    else:
+        collections = db.exec(select(Collection).where(Collection.tenant_id == tenant_id)).all()
+        allowed_ids = [c.id for c in collections if user_can_access_collection(current_user, c)]
+
+    docs = list_documents(db, tenant_id, collection_ids=allowed_ids, limit=limit, offset=offset)
+
+    return [DocumentOut(**d.model_dump()) for d in docs]
+
+
+@router.delete("/documents/{doc_id}")
+def delete_document(
+    doc_id: str,
+    background_tasks: BackgroundTasks,
+    collection_name: Optional[str] = None,
+    store: MultiTenantChromaStoreManager = Depends(get_store),
+    tables_store: TenantTabularStore = Depends(get_tabular_store),
+    db: Session = Depends(get_db),
+    current_user: UserOut = Depends(require_uploader),
+):
+    """
+    Delete one document: its chunks (batched id deletes), structured tables and SQL rows.
+
+    - The collection is resolved from the documents registry; `collection_name` is
+      only needed for documents indexed before the registry existed.
+    - Large documents are removed from Chroma in the background (status "accepted");
+      the SQL mirrors are updated before the response either way.
+    """
+    tenant_id = current_user.tenant_id
+
+    doc = get_document(db, tenant_id, doc_id)
+    if doc is not None:
+        collection_name = doc.collection_name
+        chunk_ids = chunk_ids_for(doc.doc_id, doc.chunk_count)
+    elif collection_name:
+        chunk_ids = None  # looked up by doc_id metadata
+    else:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    collection = get_collection_for_user_or_403(
+        db=db,
+        current_user=current_user,
+        tenant_id=tenant_id,
+        collection_name=collection_name,
+    )
+
+    run_async = chunk_ids is not None and len(chunk_ids) > DELETE_ASYNC_CHUNK_THRESHOLD
+    if run_async:
+        background_tasks.add_task(
+            purge_document_data, store, tables_store, tenant_id, collection_name, doc_id, chunk_ids
+        )
+        purged = {"doc_id": doc_id, "chunks_deleted": len(chunk_ids)}
+    else:
+        purged = purge_document_data(store, tables_store, tenant_id, collection_name, doc_id, chunk_ids)
+
+    if doc is not None:
+        delete_document_record(db, doc)
+
+    write_audit_log(
+        db=db,
+        user=current_user,
+        action="document_delete",
+        resource_type="collection",
+        resource_id=collection.id,
+        metadata={
+            "tenant_id": tenant_id,
+            "collection_name": collection.name,
+            "doc_id": doc_id,
+            "chunks_deleted": purged["chunks_deleted"],
+            "background": run_async,
+        },
+    )
+
+    return {"status": "accepted" if run_async else "ok", **purged}
+
+
+@router.get("/documents/dedup/stats")
+def get_dedup_stats(
+    db: Session = Depends(get_db),
+    current_user: UserOut = Depends(require_uploader),
+):
+    """
+    Deduplication savings for the current tenant: unique documents, skipped
+    duplicate uploads, and the bytes / vectors they would have added.
+    """
+    return dedup_stats(db, current_user.tenant_id)
+
+
 @router.get("/collections/old", response_model=List[CollectionOut])
 def list_collections_for_current_user(
     db: Session = Depends(get_db),
@@ -460,7 +858,7 @@ def list_collections_for_current_user(
         if user_can_access_collection(current_user, c)
     ]
 
-    # If you have doc_count from SQL or Chroma, compute it here; else 0.
+    # doc_count is maintained in SQL by the documents registry.
     result: List[CollectionOut] = []
     for c in visible:
         result.append(
@@ -469,7 +867,7 @@ def list_collections_for_current_user(
                 tenant_id=c.tenant_id,            # fixed: was c.tenant
                 organization_id=c.organization_id,
                 name=c.name,
-                doc_count=0,                      # or real count if available
+                doc_count=c.doc_count,
                 visibility=c.visibility,
                 allowed_roles=c.allowed_roles,
                 allowed_user_ids=c.allowed_user_ids,
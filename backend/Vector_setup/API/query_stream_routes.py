@@ -1,15 +1,18 @@
 from fastapi import APIRouter, Depends, Request, HTTPException
 from fastapi.responses import StreamingResponse
 from sqlmodel import Session, select 
-from typing import Optional, AsyncGenerator, List,  Dict, Any
+from typing import Optional, AsyncGenerator, Awaitable, Callable, List,  Dict, Any
+import asyncio
 import json
+import time
 
 #from LLM_Config.system_user_prompt import create_suggestion_prompt
 #from LLM_Config.llm_setup import suggestion_llm_client
 
 
-from Vector_setup.user.db import get_db, Tenant, DBUser, Collection
-from Vector_setup.API.ingest_routes import get_store
+from Vector_setup.user.db import get_db, engine, Tenant, DBUser, Collection
+from Vector_setup.API.ingest_routes import get_store, get_tabular_store
+from Vector_setup.base.tabular_store_management import TenantTabularStore
 from Vector_setup.base.db_setup_management import MultiTenantChromaStoreManager
 from Vector_setup.user.auth_jwt import (
     get_current_db_user_from_header_or_query,
@@ -17,9 +20,14 @@ from Vector_setup.user.auth_jwt import (
 )
 from Vector_setup.chat_history.chat_store import get_last_n_turns, save_chat_turn, get_last_doc_id
 from LLM_Config.llm_pipeline import llm_pipeline_stream
+from LLM_Config.llm_cache import llm_response_cache
+from LLM_Config.answer_cache import answer_cache
+from LLM_Config.llm_scheduler import llm_scheduler
 from Vector_setup.user.auth_jwt import ensure_tenant_active
 from Vector_setup.access.collections_acl import get_allowed_collections_for_user
 from Vector_setup.user.audit import write_audit_log
+from Vector_setup.services.post_answer_service import run_post_answer_stages
+from Vector_setup.user.roles import VENDOR_ROLES
 
 import logging
 
@@ -28,6 +36,41 @@ logger.setLevel(logging.INFO)
 
 router = APIRouter()
 
+
+@router.get("/query/cache/stats")
+def get_llm_cache_stats(
+    current_user: DBUser = Depends(get_current_db_user_from_header_or_query),
+):
+    """
+    LLM response cache and semantic answer cache counters for the caller's tenant
+    (hits / misses / hit rate / entries). Vendor roles also get the process-wide
+    totals, which cover every tenant.
+    """
+    stats = {
+        "tenant": llm_response_cache.stats(current_user.tenant_id),
+        "answers": answer_cache.stats(current_user.tenant_id),
+    }
+    if current_user.role in VENDOR_ROLES:
+        stats["process"] = llm_response_cache.stats()
+        stats["process_answers"] = answer_cache.stats()
+    return stats
+
+
+@router.get("/query/scheduler/stats")
+def get_llm_scheduler_stats(
+    current_user: DBUser = Depends(get_current_db_user_from_header_or_query),
+):
+    """
+    LLM scheduler queue times for the caller's tenant (calls, average / max wait,
+    calls waiting now). Vendor roles also get the process-wide slots in use,
+    waiters per priority class and waits per class, which cover every tenant.
+    """
+    stats = {"tenant": llm_scheduler.stats(current_user.tenant_id)}
+    if current_user.role in VENDOR_ROLES:
+        stats["process"] = llm_scheduler.stats()
+    return stats
+
+
 import json
 @router.get("/query/stream")
 async def query_knowledge_stream(
@@ -38,8 +81,10 @@ async def query_knowledge_stream(
     collection_name: Optional[str] = None,
     current_user: TokenUser = Depends(get_current_db_user_from_header_or_query),
     store: MultiTenantChromaStoreManager = Depends(get_store),
+    tabular_store: TenantTabularStore = Depends(get_tabular_store),
     db: Session = Depends(get_db),
 ) -> StreamingResponse:
+    request_started = time.perf_counter()
     if not conversation_id:
         raise HTTPException(status_code=403, detail="Session has expired!")
 
@@ -102,6 +147,7 @@ async def query_knowledge_stream(
     async def event_generator() -> AsyncGenerator[str, None]:
         full_answer: List[str] = []
         result_holder: Dict[str, Any] = {}
+        ttft_ms: Optional[float] = None
 
         # 1) Understand question
         yield send_status("Analyzing your question…")
@@ -114,23 +160,30 @@ async def query_knowledge_stream(
         yield send_status("Generating final answer…")
         
         disconnected = False
+        answer_stream = llm_pipeline_stream(
+            store=store,
+            tenant_id=current_user.tenant_id,
+            question=question,
+            history=history_turns,
+            top_k=top_k,
+            result_holder=result_holder,
+            last_doc_id=last_doc_id,
+            collection_names=collection_names,
+            tabular_store=tabular_store,
+            defer_charts=True,
+            collection_ids=collection_ids,
+            content_generations={c.name: c.content_generation or 0 for c in allowed_collections},
+        )
         try:
-            async for chunk in llm_pipeline_stream(
-                store=store,
-                tenant_id=current_user.tenant_id,
-                question=question,
-                history=history_turns,
-                top_k=top_k,
-                result_holder=result_holder,
-                last_doc_id=last_doc_id,
-                collection_names=collection_names,
-            ):
+            async for chunk in answer_stream:
                 if await request.is_disconnected():
                     disconnected = True
                     break
                 if not chunk:
                     continue
 
+                if ttft_ms is None:
+                    ttft_ms = round((time.perf_counter() - request_started) * 1000, 1)
                 full_answer.append(chunk)
                 safe_chunk = chunk.replace("\n", "<|n|>")
                 yield f"event: token\ndata: {safe_chunk}\n\n"
@@ -139,87 +192,116 @@ async def query_knowledge_stream(
             yield send_status("An error occurred while generating the answer.")
             yield "event: done\ndata: END\n\n"
             return
+        finally:
+            # Closes the LLM stream now (frees its scheduler slot and HTTP response)
+            # instead of whenever the abandoned generator is garbage collected
+            await answer_stream.aclose()
         if disconnected:
             logger.info("Client disconnected during streaming response")
             return # Skip save_chart_turn, suggestions, charts, audit log
         
         answer_str = "".join(full_answer)
 
-        # 4) Save conversation turn only if there is an answer
-        if answer_str:
-            yield send_status("Saving this conversation…")
+        # Time to first token as seen by this endpoint, plus the pipeline's own timings
+        metrics = {
+            "ttft_ms": ttft_ms,
+            "answer_ms": round((time.perf_counter() - request_started) * 1000, 1),
+            **{f"pipeline_{k}": v for k, v in (result_holder.get("metrics") or {}).items()},
+        }
+        logger.info("QUERY_STREAM_METRICS tenant=%s %s", current_user.tenant_id, metrics)
+        yield f"event: metrics\ndata: {json.dumps(metrics)}\n\n"
 
-            primary_doc_id = result_holder.get("primary_doc_id")
+        # 4) Post-answer stages run concurrently; each SSE event is sent as its stage
+        #    completes. DB writes use their own session in a worker thread; charts and
+        #    suggestions are optional and dropped after POST_ANSWER_DEADLINE_S.
+        primary_doc_id = result_holder.get("primary_doc_id")
 
-            save_chat_turn(
-                db=db,
-                tenant_id=current_user.tenant_id,
-                user_id=current_user.email,
-                user_message=question,
-                assistant_message=answer_str,
-                conversation_id=conversation_id,
-                primary_doc_id=primary_doc_id,
-            )
+        def _save_turn() -> None:
+            with Session(engine) as session:
+                save_chat_turn(
+                    db=session,
+                    tenant_id=current_user.tenant_id,
+                    user_id=current_user.email,
+                    user_message=question,
+                    assistant_message=answer_str,
+                    conversation_id=conversation_id,
+                    primary_doc_id=primary_doc_id,
+                )
 
-            # 5) Follow-up suggestions
-            yield send_status("Generating related follow-up questions…")
+        def _write_audit() -> None:
+            with Session(engine) as session:
+                write_audit_log(
+                    db=session,
+                    user=current_user,
+                    action="query",
+                    resource_type="collection_query",
+                    resource_id=",".join(collection_ids),
+                    metadata={
+                        "question": question,
+                        "top_k": top_k,
+                        "tenant_id": current_user.tenant_id,
+                        "organization_id": current_user.organization_id,
+                        "user_id": current_user.id,
+                        "user_role": current_user.role,
+                        "conversation_id": conversation_id,
+                        "collection_ids": collection_ids,
+                        "collection_names": collection_names,
+                        "client_ip": request.client.host,
+                        "ttft_ms": ttft_ms,
+                    },
+                )
 
-            suggestions_list: List[str] = []
+        async def _suggestions() -> List[str]:
             try:
                 #suggestion_messages = create_suggestion_prompt(question, answer_str)
                 raw = [] # suggestion_llm_client.invoke(suggestion_messages)
                 raw_content = getattr(raw, "content", None) or str(raw)
                 suggestions_list = json.loads(raw_content)
                 if not isinstance(suggestions_list, list):
-                    suggestions_list = []
-                else:
-                    suggestions_list = [
-                        s for s in suggestions_list
-                        if isinstance(s, str) and s.strip()
-                    ]
+                    return []
+                return [s for s in suggestions_list if isinstance(s, str) and s.strip()]
             except Exception:
-                suggestions_list = []
+                return []
 
-            if suggestions_list:
-                payload = json.dumps(suggestions_list)
-                yield f"event: suggestions\ndata: {payload}\n\n"
+        async def _charts() -> List[dict]:
+            chart_stage = result_holder.get("chart_stage")
+            if chart_stage is not None:
+                await chart_stage()
+            return result_holder.get("chart_specs") or []
 
-            # 6) Chart event (optional)
-            chart_spec = result_holder.get("chart_specs")
-            if chart_spec:
+        stages: Dict[str, Callable[[], Awaitable[Any]]] = {"audit": lambda: asyncio.to_thread(_write_audit)}
+        if answer_str:
+            yield send_status("Saving this conversation…")
+            stages.update(
+                save=lambda: asyncio.to_thread(_save_turn),
+                suggestions=_suggestions,
+                charts=_charts,
+            )
+
+        stage_report: Dict[str, str] = {}
+        async for stage in run_post_answer_stages(stages, optional={"suggestions", "charts"}):
+            stage_report[stage["stage"]] = f"{stage['status']}@{stage['ms']}ms"
+            if stage["status"] != "ok" or not stage["result"]:
+                continue
+            if stage["stage"] == "suggestions":
+                payload = json.dumps(stage["result"])
+                yield f"event: suggestions\ndata: {payload}\n\n"
+            elif stage["stage"] == "charts":
                 try:
-                    chart_payload = json.dumps({"charts": chart_spec})
+                    chart_payload = json.dumps({"charts": stage["result"]})
                     logger.info("CHART_DEBUG emitting chart SSE: %s", chart_payload)
                     yield f"event: chart\ndata: {chart_payload}\n\n"
                 except Exception:
                     logger.warning("Failed to serialize chart_spec for SSE")
-
-        # 7) Audit log (once per request)
-        try:
-            write_audit_log(
-                db=db,
-                user=current_user,
-                action="query",
-                resource_type="collection_query",
-                resource_id=",".join(collection_ids),
-                metadata={
-                    "question": question,
-                    "top_k": top_k,
-                    "tenant_id": current_user.tenant_id,
-                    "organization_id": current_user.organization_id,
-                    "user_id": current_user.id,
-                    "user_role": current_user.role,
-                    "conversation_id": conversation_id,
-                    "collection_ids": collection_ids,
-                    "collection_names": collection_names,
-                    "client_ip": request.client.host,
-                },
-            )
-        except Exception:
-            logger.warning("Failed to write audit log for query", exc_info=True)
+        logger.info("QUERY_STREAM_POST_ANSWER tenant=%s %s", current_user.tenant_id, stage_report)
 
         yield send_status("Finalizing…")
         yield "event: done\ndata: END\n\n"
 
     # Only users with allowed_collections ever get here; SSE/LLM never start otherwise
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+    # No caching/proxy buffering, so tokens reach the client as they are produced
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
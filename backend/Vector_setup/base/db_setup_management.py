@@ -1,6 +1,7 @@
 
 from __future__ import annotations
 import os
+import hashlib
 import logging
 from pathlib import Path
 from typing import Optional, List, Dict, Any, Tuple
@@ -14,6 +15,11 @@ from Vector_setup.embeddings.embedding_service import EmbeddingService
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Bulk ingest batching: texts per embedding call / records per Chroma add
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+CHROMA_ADD_BATCH_SIZE = int(os.getenv("CHROMA_ADD_BATCH_SIZE", "1000"))
+CHROMA_DELETE_BATCH_SIZE = int(os.getenv("CHROMA_DELETE_BATCH_SIZE", "5000"))
+
 class CompanyCreateRequest(BaseModel):
     tenant_id: str
     name: str | None = None
@@ -75,6 +81,10 @@ def _clean_metadata(meta: dict | None) -> dict:
     return cleaned
 
 
+def _chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
 class MultiTenantChromaStoreManager:
     """
     Production ChromaDB manager with in-process embedding service.
@@ -87,6 +97,7 @@ class MultiTenantChromaStoreManager:
         self,
         persist_dir: str | None = None,
         embedding_model_name: str = "BAAI/bge-small-en-v1.5",
+        embedding_service: Optional[EmbeddingService] = None,
     ):
         # Resolve persistent directory: env > arg > default
         raw_dir = persist_dir or os.getenv(
@@ -96,8 +107,8 @@ class MultiTenantChromaStoreManager:
         self.persist_dir = Path(raw_dir).resolve()
         self.persist_dir.mkdir(parents=True, exist_ok=True)  # mkdir -p[web:394]
 
-        # Embeddings
-        self._embedding_service = EmbeddingService(model_name=embedding_model_name)
+        # Embeddings (an injected service, e.g. the benchmarks' deterministic fake, skips model loading)
+        self._embedding_service = embedding_service or EmbeddingService(model_name=embedding_model_name)
 
         # Shared Chroma settings (used also by reset)
         self._settings = Settings(
@@ -111,8 +122,8 @@ class MultiTenantChromaStoreManager:
             settings=self._settings,
         )
 
-        # Tokenizer for chunking/token counting
-        self._encoding = tiktoken.get_encoding("o200k_base")
+        # Tokenizer for chunking/token counting (loaded on first use, see _encoding)
+        self._tokenizer: Optional[tiktoken.Encoding] = None
 
         # Cache for collection-level metadata: (tenant_id, collection_name) -> info
         self._collection_meta_cache: Dict[Tuple[str, str], dict] = {}
@@ -145,6 +156,24 @@ class MultiTenantChromaStoreManager:
         """
         return self._embedding_service.embed_batch(texts)
 
+    @property
+    def _encoding(self) -> tiktoken.Encoding:
+        # Only token chunking needs it; pre-built table chunks and queries do not
+        if self._tokenizer is None:
+            self._tokenizer = tiktoken.get_encoding("o200k_base")
+        return self._tokenizer
+
+    @property
+    def embedding_model_name(self) -> str:
+        return self._embedding_service.model_name
+
+    async def embed_query(self, text: str) -> Optional[List[float]]:
+        """
+        Embedding of one query; pass it to query_policies(query_embedding=...) to reuse it.
+        """
+        embeddings = await self._get_embeddings_batch([text])
+        return embeddings[0] if embeddings else None
+
     def _tenant_collection_name(self, tenant_id: str, collection_name: str) -> str:
         return f"{tenant_id}__{collection_name}"
 
@@ -296,6 +325,47 @@ class MultiTenantChromaStoreManager:
     # -----------------------
     # Ingest / query
     # -----------------------
+    def build_chunk_records(
+        self,
+        tenant_id: str,
+        collection_name: str,
+        doc_id: str,
+        text: str,
+        metadata: Optional[dict] = None,
+        table_chunks: Optional[List[dict]] = None,
+    ) -> Tuple[List[str], List[str], List[dict]]:
+        """
+        Chunk a document and build (ids, chunk texts, chunk metadatas) for Chroma.
+
+        - table_chunks: optional pre-built row-group chunks ({"text", "metadata"})
+          for tabular sources; used instead of token chunking and their metadata
+          (sheet, row range, year/month) is merged into each chunk.
+        """
+        if table_chunks:
+            chunks = [c["text"] for c in table_chunks]
+            per_chunk_meta = [c.get("metadata") or {} for c in table_chunks]
+        else:
+            chunks = self._chunk_text_tokens(text, max_tokens=512, overlap_tokens=64)
+            per_chunk_meta = [{} for _ in chunks]
+
+        chunk_ids = [f"{doc_id}__chunk_{i}" for i in range(len(chunks))]
+
+        chunk_metadatas = []
+        for idx, _chunk_text in enumerate(chunks):
+            base_meta = metadata or {}
+            meta = {
+                **base_meta,          # doc-level metadata from router
+                **per_chunk_meta[idx],  # row-group metadata for tabular chunks
+                "tenant_id": tenant_id,
+                "collection": collection_name,
+                "doc_id": doc_id,
+                "chunk_index": idx,
+                "chunk_count": len(chunks),
+            }
+            chunk_metadatas.append(_clean_metadata(meta))
+
+        return chunk_ids, chunks, chunk_metadatas
+
     async def add_document(
         self,
         tenant_id: str,
@@ -303,8 +373,14 @@ class MultiTenantChromaStoreManager:
         doc_id: str,
         text: str,
         metadata: Optional[dict] = None,
+        table_chunks: Optional[List[dict]] = None,
     ) -> dict:
-        chunks = self._chunk_text_tokens(text, max_tokens=512, overlap_tokens=64)
+        """
+        Chunk, embed and index a document (see build_chunk_records for table_chunks).
+        """
+        chunk_ids, chunks, chunk_metadatas = self.build_chunk_records(
+            tenant_id, collection_name, doc_id, text, metadata, table_chunks
+        )
         if not chunks:
             return {
                 "status": "error",
@@ -318,31 +394,114 @@ class MultiTenantChromaStoreManager:
                 "message": "Failed to compute embeddings for document.",
             }
 
-        full_name = self._tenant_collection_name(tenant_id, collection_name)
-        collection = self._client.get_or_create_collection(full_name)
+        new_count = self.write_chunks(
+            tenant_id, collection_name, chunk_ids, chunks, embeddings, chunk_metadatas
+        )
 
-        chunk_ids = [f"{doc_id}__chunk_{i}" for i in range(len(chunks))]
-        
-        chunk_metadatas = []
-        for idx, _chunk_text in enumerate(chunks):
-            base_meta = metadata or {}
-            meta = {
-                **base_meta,          # doc-level metadata from router
-                "tenant_id": tenant_id,
-                "collection": collection_name,
-                "doc_id": doc_id,
-                "chunk_index": idx,
-                "chunk_count": len(chunks),
+        return {
+            "status": "ok",
+            "tenant_id": tenant_id,
+            "collection_name": collection_name,
+            "doc_id": doc_id,
+            "chunks_indexed": len(chunks),
+            "new_collection_count": new_count,
+        }
+
+    async def upsert_document(
+        self,
+        tenant_id: str,
+        collection_name: str,
+        doc_id: str,
+        text: str,
+        metadata: Optional[dict] = None,
+        table_chunks: Optional[List[dict]] = None,
+    ) -> dict:
+        """
+        Re-index an existing document incrementally.
+
+        - Chunks already stored for doc_id are compared by content hash.
+        - Only chunks whose text is new are embedded; a chunk whose text moved
+          to another position reuses its stored embedding.
+        - Positions with changed text are upserted, positions past the new chunk
+          count are deleted, unchanged positions only get a metadata update when
+          their metadata differs.
+        """
+        chunk_ids, chunks, chunk_metadatas = self.build_chunk_records(
+            tenant_id, collection_name, doc_id, text, metadata, table_chunks
+        )
+        if not chunks:
+            return {
+                "status": "error",
+                "message": "Document has no text content after processing.",
             }
-            chunk_metadatas.append(_clean_metadata(meta))
 
-        
-        collection.add(
-            ids=chunk_ids,
-            documents=chunks,
-            embeddings=embeddings,
-            metadatas=chunk_metadatas,
+        full_name = self._tenant_collection_name(tenant_id, collection_name)
+        collection = self._client.get_or_create_collection(full_name)
+
+        # 1) What is stored for this doc today
+        stored = collection.get(
+            where={"doc_id": doc_id},
+            include=["documents", "metadatas", "embeddings"],
         )
+        stored_ids = stored.get("ids") or []
+        stored_docs = stored.get("documents") or []
+        stored_metas = stored.get("metadatas") or []
+        stored_embs = stored.get("embeddings")
+        if stored_embs is None:
+            stored_embs = []
+
+        stored_by_id: Dict[str, Tuple[str, dict]] = {}
+        embedding_by_hash: Dict[str, List[float]] = {}
+        for i, sid in enumerate(stored_ids):
+            doc_text = stored_docs[i] if i < len(stored_docs) else ""
+            stored_by_id[sid] = (_chunk_hash(doc_text), stored_metas[i] if i < len(stored_metas) else {})
+            if i < len(stored_embs):
+                embedding_by_hash[_chunk_hash(doc_text)] = list(stored_embs[i])
+
+        # 2) Diff by position
+        changed: List[int] = []
+        meta_only: List[int] = []
+        unchanged = 0
+        for i, cid in enumerate(chunk_ids):
+            prev = stored_by_id.get(cid)
+            if prev is None or prev[0] != _chunk_hash(chunks[i]):
+                changed.append(i)
+            elif prev[1] != chunk_metadatas[i]:
+                meta_only.append(i)
+            else:
+                unchanged += 1
+
+        new_ids = set(chunk_ids)
+        removed_ids = [sid for sid in stored_ids if sid not in new_ids]
+
+        # 3) Embed only text not seen before for this doc
+        reused = sum(1 for i in changed if _chunk_hash(chunks[i]) in embedding_by_hash)
+        to_embed = sorted({chunks[i] for i in changed if _chunk_hash(chunks[i]) not in embedding_by_hash})
+        if to_embed:
+            new_embeddings = await self._get_embeddings_batch(to_embed)
+            if not new_embeddings:
+                return {
+                    "status": "error",
+                    "message": "Failed to compute embeddings for document.",
+                }
+            for chunk_text, emb in zip(to_embed, new_embeddings):
+                embedding_by_hash[_chunk_hash(chunk_text)] = list(emb)
+
+        # 4) Apply
+        if changed:
+            collection.upsert(
+                ids=[chunk_ids[i] for i in changed],
+                documents=[chunks[i] for i in changed],
+                embeddings=[embedding_by_hash[_chunk_hash(chunks[i])] for i in changed],
+                metadatas=[chunk_metadatas[i] for i in changed],
+            )
+        if meta_only:
+            collection.update(
+                ids=[chunk_ids[i] for i in meta_only],
+                metadatas=[chunk_metadatas[i] for i in meta_only],
+            )
+        if removed_ids:
+            collection.delete(ids=removed_ids)
 
         return {
             "status": "ok",
@@ -350,9 +509,93 @@ class MultiTenantChromaStoreManager:
             "collection_name": collection_name,
             "doc_id": doc_id,
             "chunks_indexed": len(chunks),
+            "chunks_upserted": len(changed),
+            "chunks_embedded": len(to_embed),
+            "chunks_reused": reused,
+            "chunks_metadata_updated": len(meta_only),
+            "chunks_unchanged": unchanged,
+            "chunks_deleted": len(removed_ids),
             "new_collection_count": collection.count(),
         }
 
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Synchronous embedding call, for callers that run it in a worker thread
+        (see services/ingestion_pipeline_service.py).
+        """
+        return self._embedding_service.embed_batch(texts)
+
+    def write_chunks(
+        self,
+        tenant_id: str,
+        collection_name: str,
+        ids: List[str],
+        documents: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[dict],
+    ) -> int:
+        """
+        Add pre-embedded chunks in CHROMA_ADD_BATCH_SIZE slices. Returns the new collection count.
+        """
+        full_name = self._tenant_collection_name(tenant_id, collection_name)
+        collection = self._client.get_or_create_collection(full_name)
+
+        for start in range(0, len(ids), CHROMA_ADD_BATCH_SIZE):
+            end = start + CHROMA_ADD_BATCH_SIZE
+            collection.add(
+                ids=ids[start:end],
+                documents=documents[start:end],
+                embeddings=embeddings[start:end],
+                metadatas=metadatas[start:end],
+            )
+        return collection.count()
+
+    def delete_document_chunks(
+        self,
+        tenant_id: str,
+        collection_name: str,
+        doc_id: str,
+        chunk_ids: Optional[List[str]] = None,
+    ) -> int:
+        """
+        Remove a document's chunks with batched id deletes.
+
+        - chunk_ids: known ids (from the SQL documents registry); when omitted they
+          are looked up once by doc_id metadata.
+        - Returns the number of ids deleted (0 if the collection does not exist).
+        """
+        full_name = self._tenant_collection_name(tenant_id, collection_name)
+        try:
+            collection = self._client.get_collection(full_name)
+        except Exception:
+            return 0
+
+        if chunk_ids is None:
+            chunk_ids = collection.get(where={"doc_id": doc_id}, include=[]).get("ids") or []
+
+        for start in range(0, len(chunk_ids), CHROMA_DELETE_BATCH_SIZE):
+            collection.delete(ids=chunk_ids[start: start + CHROMA_DELETE_BATCH_SIZE])
+
+        logger.info("Deleted %d chunks of doc %s from %s", len(chunk_ids), doc_id, full_name)
+        return len(chunk_ids)
+
+    def delete_collection(self, tenant_id: str, collection_name: str) -> int:
+        """
+        Drop a tenant collection and all its vectors. Returns the number of vectors dropped.
+        """
+        full_name = self._tenant_collection_name(tenant_id, collection_name)
+        try:
+            collection = self._client.get_collection(full_name)
+        except Exception:
+            return 0
+
+        count = collection.count()
+        self._client.delete_collection(full_name)
+        self._collection_meta_cache.pop((tenant_id, collection_name), None)
+
+        logger.info("Dropped collection %s (%d vectors)", full_name, count)
+        return count
+
     async def query_policies(
         self,
         tenant_id: str,
@@ -361,6 +604,7 @@ class MultiTenantChromaStoreManager:
         top_k: int = 100,
         where: Optional[dict] = None,
         collection_names: Optional[List[str]] = None, # NEW
+        query_embedding: Optional[List[float]] = None,
     ) -> dict:
         """
         Vector search within tenant collections.
@@ -368,10 +612,14 @@ class MultiTenantChromaStoreManager:
         - if collection_names provided: restrict to those UI names.
         - Single collection if collection_name provided
         - All tenant collections if None
+        - query_embedding (from embed_query) skips embedding `query` again
         """
         hits: list[dict] = []
 
-        query_embeddings = await self._get_embeddings_batch([query])
+        if query_embedding is not None:
+            query_embeddings = [list(query_embedding)]
+        else:
+            query_embeddings = await self._get_embeddings_batch([query])
         if not query_embeddings:
             return {"query": query, "results": []}
 
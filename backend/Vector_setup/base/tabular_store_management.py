@@ -0,0 +1,465 @@
+from __future__ import annotations
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import logging
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
+
+import pandas as pd
+
+from Vector_setup.services.table_chunking_service import (
+    _detect_row_period,
+    YEAR_COL_NAMES,
+    MONTH_COL_NAMES,
+)
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+CATALOG_TABLE = "_tables"
+
+# Caps so the exact-figures block stays small compared to raw chunks
+MAX_METRIC_COLUMNS = 6
+MAX_GROUP_ROWS = 36
+MAX_TABLES_PER_QUESTION = 3
+
+YEAR_REGEX = re.compile(r"\b(20[0-4][0-9])\b")  # 2000–2049
+GROUP_BY_REGEX = re.compile(r"\b(?:by|per|for each|each)\s+([a-z_ ]{2,40})")
+
+# Period columns are used for filtering/grouping, never as metrics
+PERIOD_COLUMNS = YEAR_COL_NAMES | MONTH_COL_NAMES
+
+
+def _normalize_column(name: str) -> str:
+    norm = re.sub(r"[^0-9a-zA-Z]+", "_", str(name).strip()).strip("_").lower()
+    if not norm:
+        norm = "col"
+    if norm[0].isdigit():
+        norm = f"c_{norm}"
+    return norm
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _coerce_numeric_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Same heuristic as the Excel sheet description: >70% numeric -> numeric column."""
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+            continue
+        non_na = series.dropna()
+        if non_na.empty:
+            continue
+        cleaned = non_na.astype(str).str.replace(",", "", regex=False).str.strip()
+        numeric = pd.to_numeric(cleaned, errors="coerce")
+        if numeric.notna().mean() > 0.7:
+            df[col] = pd.to_numeric(
+                series.astype(str).str.replace(",", "", regex=False).str.strip(),
+                errors="coerce",
+            )
+    return df
+
+
+def _fmt_number(val: Any) -> str:
+    if val is None:
+        return ""
+    if isinstance(val, float):
+        if val.is_integer():
+            return f"{int(val):,}"
+        return f"{val:,.2f}"
+    if isinstance(val, int):
+        return f"{val:,}"
+    return str(val)
+
+
+def _markdown_table(headers: List[str], rows: List[Tuple[Any, ...]]) -> str:
+    lines = [
+        "| " + " | ".join(headers) + " |",
+        "|" + "|".join("---" for _ in headers) + "|",
+    ]
+    for row in rows:
+        lines.append("| " + " | ".join(_fmt_number(v) for v in row) + " |")
+    return "\n".join(lines)
+
+
+class TenantTabularStore:
+    """
+    Embedded analytical store for spreadsheet/CSV data.
+
+    - One SQLite file per tenant: "<persist_dir>/<tenant_id>.sqlite".
+    - One table per (doc_id, sheet), registered in a `_tables` catalog with the
+      collection it belongs to, so queries can be restricted to ACL-allowed collections.
+    - Every table gets derived `_year` (TEXT) / `_month` (INTEGER) columns using the
+      same period detection as the row-group chunker.
+    """
+
+    def __init__(self, persist_dir: str | None = None):
+        raw_dir = persist_dir or os.getenv("TABULAR_STORE_PATH", "./data/tabular_store")
+        self.persist_dir = Path(raw_dir).resolve()
+        self.persist_dir.mkdir(parents=True, exist_ok=True)
+        logger.info("TenantTabularStore initialized at %s", self.persist_dir)
+
+    def _db_path(self, tenant_id: str) -> Path:
+        if not tenant_id.replace("-", "").replace("_", "").isalnum():
+            raise ValueError("tenant_id must be alphanumeric and may include '-' or '_'.")
+        return self.persist_dir / f"{tenant_id}.sqlite"
+
+    def _connect(self, tenant_id: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self._db_path(tenant_id)))
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {CATALOG_TABLE} (
+                table_name TEXT PRIMARY KEY,
+                doc_id TEXT NOT NULL,
+                collection_name TEXT NOT NULL,
+                sheet TEXT,
+                title TEXT,
+                columns_json TEXT NOT NULL,
+                row_count INTEGER NOT NULL,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_tables_doc ON {CATALOG_TABLE}(doc_id)"
+        )
+        return conn
+
+    @staticmethod
+    def _table_name(doc_id: str, sheet: str) -> str:
+        digest = hashlib.sha1(f"{doc_id}\x00{sheet}".encode("utf-8")).hexdigest()[:16]
+        return f"t_{digest}"
+
+    # -----------------------
+    # Ingest
+    # -----------------------
+
+    def load_tables(
+        self,
+        tenant_id: str,
+        collection_name: str,
+        doc_id: str,
+        tables: Dict[str, pd.DataFrame],
+        title: Optional[str] = None,
+    ) -> dict:
+        """
+        Replace all tables stored for `doc_id` with the given sheets.
+        """
+        loaded = 0
+        rows_total = 0
+        with closing(self._connect(tenant_id)) as conn:
+            self._drop_doc_tables(conn, doc_id)
+
+            for sheet, df in tables.items():
+                if df is None or df.empty:
+                    continue
+                df = df.dropna(how="all").copy()
+                if df.empty:
+                    continue
+
+                original_cols = [str(c).strip() for c in df.columns]
+                periods = [_detect_row_period(row) for _, row in df.iterrows()]
+
+                seen: Dict[str, int] = {}
+                columns: Dict[str, str] = {}
+                for col in original_cols:
+                    norm = _normalize_column(col)
+                    if norm in seen or norm in {"_year", "_month"}:
+                        seen[norm] = seen.get(norm, 0) + 1
+                        norm = f"{norm}_{seen[norm]}"
+                    else:
+                        seen[norm] = 0
+                    columns[norm] = col
+                df.columns = list(columns.keys())
+
+                df = _coerce_numeric_columns(df)
+                for col in df.columns:
+                    if pd.api.types.is_datetime64_any_dtype(df[col]):
+                        df[col] = df[col].dt.strftime("%Y-%m-%d")
+                df["_year"] = [y for y, _ in periods]
+                df["_month"] = [m for _, m in periods]
+
+                table_name = self._table_name(doc_id, str(sheet))
+                df.to_sql(table_name, conn, if_exists="replace", index=False)
+                conn.execute(
+                    f"""
+                    INSERT OR REPLACE INTO {CATALOG_TABLE}
+                    (table_name, doc_id, collection_name, sheet, title, columns_json, row_count, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        table_name,
+                        doc_id,
+                        collection_name,
+                        str(sheet).strip(),
+                        title,
+                        json.dumps(columns),
+                        len(df),
+                        datetime.utcnow().isoformat(),
+                    ),
+                )
+                loaded += 1
+                rows_total += len(df)
+            conn.commit()
+
+        return {"status": "ok", "doc_id": doc_id, "tables": loaded, "rows": rows_total}
+
+    def _drop_doc_tables(self, conn: sqlite3.Connection, doc_id: str) -> int:
+        rows = conn.execute(
+            f"SELECT table_name FROM {CATALOG_TABLE} WHERE doc_id = ?", (doc_id,)
+        ).fetchall()
+        for (table_name,) in rows:
+            conn.execute(f"DROP TABLE IF EXISTS {_quote(table_name)}")
+        conn.execute(f"DELETE FROM {CATALOG_TABLE} WHERE doc_id = ?", (doc_id,))
+        return len(rows)
+
+    # -----------------------
+    # Query
+    # -----------------------
+
+    def list_tables(
+        self,
+        tenant_id: str,
+        collection_names: Optional[List[str]] = None,
+    ) -> List[dict]:
+        if not self._db_path(tenant_id).exists():
+            return []
+        with closing(self._connect(tenant_id)) as conn:
+            sql = (
+                f"SELECT table_name, doc_id, collection_name, sheet, title, columns_json, row_count "
+                f"FROM {CATALOG_TABLE}"
+            )
+            params: List[Any] = []
+            if collection_names:
+                sql += f" WHERE collection_name IN ({','.join('?' for _ in collection_names)})"
+                params.extend(collection_names)
+            rows = conn.execute(sql, params).fetchall()
+
+        return [
+            {
+                "table_name": r[0],
+                "doc_id": r[1],
+                "collection_name": r[2],
+                "sheet": r[3],
+                "title": r[4],
+                "columns": json.loads(r[5]),
+                "row_count": r[6],
+            }
+            for r in rows
+        ]
+
+    @staticmethod
+    def _column_mentioned(norm: str, original: str, text: str) -> bool:
+        if norm in PERIOD_COLUMNS:
+            return False
+        if len(original) >= 3 and original.lower() in text:
+            return True
+        words = [w for w in norm.split("_") if len(w) >= 3]
+        return bool(words) and all(re.search(rf"\b{re.escape(w)}", text) for w in words)
+
+    def _numeric_columns(self, conn: sqlite3.Connection, table_name: str) -> List[str]:
+        info = conn.execute(f"PRAGMA table_info({_quote(table_name)})").fetchall()
+        return [
+            row[1]
+            for row in info
+            if (row[2] or "").upper() in {"INTEGER", "REAL", "FLOAT", "NUMERIC"}
+            and not row[1].startswith("_")
+            and row[1] not in PERIOD_COLUMNS
+        ]
+
+    def build_numeric_context(
+        self,
+        tenant_id: str,
+        collection_names: Optional[List[str]],
+        question: str,
+        by_period: bool = False,
+    ) -> Optional[dict]:
+        """
+        Compute exact aggregates over the tabular data relevant to `question`.
+
+        - Picks tables whose columns are mentioned in the question (max 3).
+        - Applies a year filter when the question names a year.
+        - Emits totals / averages / min / max per metric column, plus a per-month
+          breakdown for year-level questions and a breakdown by a mentioned text column
+          ("by department", "per region").
+
+        Returns {"text": markdown, "sources": [titles], "tables": n} or None.
+        """
+        tables = self.list_tables(tenant_id, collection_names)
+        if not tables:
+            return None
+
+        text = (question or "").lower()
+        year_match = YEAR_REGEX.search(text)
+        year = year_match.group(1) if year_match else None
+
+        scored: List[Tuple[int, dict]] = []
+        for t in tables:
+            hits = sum(
+                1 for norm, orig in t["columns"].items()
+                if self._column_mentioned(norm, orig, text)
+            )
+            if hits:
+                scored.append((hits, t))
+        if not scored:
+            return None
+        scored.sort(key=lambda x: -x[0])
+
+        blocks: List[str] = []
+        sources: List[str] = []
+
+        with closing(self._connect(tenant_id)) as conn:
+            for _, t in scored[:MAX_TABLES_PER_QUESTION]:
+                block = self._table_block(conn, t, text, year, by_period)
+                if block:
+                    blocks.append(block)
+                    sources.append(t["title"] or t["sheet"] or t["doc_id"])
+
+        if not blocks:
+            return None
+
+        header = (
+            "Exact figures computed over the full spreadsheet data "
+            "(authoritative; prefer these over partial rows in other sources):"
+        )
+        return {
+            "text": header + "\n\n" + "\n\n".join(blocks),
+            "sources": sources,
+            "tables": len(blocks),
+        }
+
+    def _table_block(
+        self,
+        conn: sqlite3.Connection,
+        table: dict,
+        text: str,
+        year: Optional[str],
+        by_period: bool,
+    ) -> Optional[str]:
+        table_name = _quote(table["table_name"])
+        columns: Dict[str, str] = table["columns"]
+
+        numeric = self._numeric_columns(conn, table["table_name"])
+        if not numeric:
+            return None
+
+        mentioned = [c for c in numeric if self._column_mentioned(c, columns.get(c, c), text)]
+        metrics = (mentioned or numeric)[:MAX_METRIC_COLUMNS]
+
+        where = ""
+        params: List[Any] = []
+        if year:
+            has_year = conn.execute(
+                f"SELECT 1 FROM {table_name} WHERE _year IS NOT NULL LIMIT 1"
+            ).fetchone()
+            if has_year:
+                where = " WHERE _year = ?"
+                params.append(year)
+
+        label = table["title"] or table["doc_id"]
+        scope = f", year {year}" if where else ""
+        parts: List[str] = [f"Table: {label} / sheet {table['sheet']}{scope}"]
+
+        # 1) Overall aggregates per metric
+        select_parts = ["COUNT(*)"]
+        for m in metrics:
+            q = _quote(m)
+            select_parts += [f"SUM({q})", f"AVG({q})", f"MIN({q})", f"MAX({q})"]
+        row = conn.execute(
+            f"SELECT {', '.join(select_parts)} FROM {table_name}{where}", params
+        ).fetchone()
+        if not row or not row[0]:
+            return None
+
+        agg_rows: List[Tuple[Any, ...]] = []
+        for i, m in enumerate(metrics):
+            base = 1 + i * 4
+            agg_rows.append((columns.get(m, m), *row[base: base + 4]))
+        parts.append(f"Rows: {row[0]}")
+        parts.append(_markdown_table(["Metric", "Total", "Average", "Min", "Max"], agg_rows))
+
+        metric_sums = ", ".join(f"SUM({_quote(m)})" for m in metrics)
+        metric_headers = [columns.get(m, m) for m in metrics]
+
+        # 2) Per-period breakdown for year-level questions
+        has_month = conn.execute(
+            f"SELECT 1 FROM {table_name} WHERE _month IS NOT NULL LIMIT 1"
+        ).fetchone()
+        if by_period and has_month:
+            period_rows = conn.execute(
+                f"SELECT _year, _month, {metric_sums} FROM {table_name}{where} "
+                f"GROUP BY _year, _month ORDER BY _year, _month LIMIT {MAX_GROUP_ROWS}",
+                params,
+            ).fetchall()
+            if period_rows:
+                parts.append("By month:")
+                parts.append(_markdown_table(["Year", "Month", *metric_headers], period_rows))
+
+        # 3) Breakdown by a text column the user asked to group by
+        group_col = self._group_by_column(conn, table, text, set(numeric))
+        if group_col:
+            group_rows = conn.execute(
+                f"SELECT {_quote(group_col)}, {metric_sums} FROM {table_name}{where} "
+                f"GROUP BY {_quote(group_col)} ORDER BY 2 DESC LIMIT {MAX_GROUP_ROWS}",
+                params,
+            ).fetchall()
+            if group_rows:
+                parts.append(f"By {columns.get(group_col, group_col)}:")
+                parts.append(
+                    _markdown_table([columns.get(group_col, group_col), *metric_headers], group_rows)
+                )
+
+        return "\n".join(parts)
+
+    def _group_by_column(
+        self,
+        conn: sqlite3.Connection,
+        table: dict,
+        text: str,
+        numeric: set,
+    ) -> Optional[str]:
+        candidates = [
+            c for c in table["columns"]
+            if c not in numeric and not c.startswith("_")
+        ]
+        for match in GROUP_BY_REGEX.finditer(text):
+            phrase = match.group(1)
+            for c in candidates:
+                if self._column_mentioned(c, table["columns"][c], phrase):
+                    return c
+        return None
+
+    # -----------------------
+    # Maintenance
+    # -----------------------
+
+    def delete_document(self, tenant_id: str, doc_id: str) -> int:
+        if not self._db_path(tenant_id).exists():
+            return 0
+        with closing(self._connect(tenant_id)) as conn:
+            dropped = self._drop_doc_tables(conn, doc_id)
+            conn.commit()
+        return dropped
+
+    def delete_collection(self, tenant_id: str, collection_name: str) -> int:
+        if not self._db_path(tenant_id).exists():
+            return 0
+        with closing(self._connect(tenant_id)) as conn:
+            doc_ids = [
+                row[0]
+                for row in conn.execute(
+                    f"SELECT DISTINCT doc_id FROM {CATALOG_TABLE} WHERE collection_name = ?",
+                    (collection_name,),
+                )
+            ]
+            dropped = sum(self._drop_doc_tables(conn, doc_id) for doc_id in doc_ids)
+            conn.commit()
+        return dropped
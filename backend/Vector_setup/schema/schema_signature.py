@@ -21,6 +21,23 @@ class CollectionOut(BaseModel):
     created_at: datetime
 
 
+class DocumentOut(BaseModel):
+    doc_id: str
+    tenant_id: str
+    collection_id: str
+    collection_name: str
+    source: str
+    filename: str
+    title: Optional[str] = None
+    content_type: Optional[str] = None
+    content_hash: Optional[str] = None
+    drive_file_id: Optional[str] = None
+    chunk_count: int
+    size_bytes: int
+    ingested_at: datetime
+    updated_at: datetime
+
+
 class CompanyOut(BaseModel):
     tenant_id: str
     display_name: str | None = None
@@ -0,0 +1,180 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import Session, select, func
+
+from Vector_setup.user.db import DocumentContentHash, DocumentAlias
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def find_document_by_hash(
+    db: Session,
+    tenant_id: str,
+    collection_name: str,
+    content_hash: str,
+) -> Optional[DocumentContentHash]:
+    """
+    Registry lookup scoped to one collection: identical content in another
+    collection is indexed again, since collections carry their own ACL.
+    """
+    stmt = select(DocumentContentHash).where(
+        DocumentContentHash.tenant_id == tenant_id,
+        DocumentContentHash.collection_name == collection_name,
+        DocumentContentHash.content_hash == content_hash,
+    )
+    return db.exec(stmt).first()
+
+
+def find_duplicate_upload(
+    db: Session,
+    tenant_id: str,
+    collection_name: str,
+    content_hash: str,
+    doc_id: Optional[str] = None,
+) -> Optional[DocumentContentHash]:
+    """
+    Registry entry an upload may be short-circuited to. An explicit doc_id is an
+    update of that document, so identical content indexed under another doc_id
+    does not count: the caller's document must still be re-indexed.
+    """
+    existing = find_document_by_hash(db, tenant_id, collection_name, content_hash)
+    if existing is not None and doc_id is not None and existing.doc_id != doc_id:
+        return None
+    return existing
+
+
+def register_document(
+    db: Session,
+    tenant_id: str,
+    collection_name: str,
+    content_hash: str,
+    doc_id: str,
+    filename: str,
+    size_bytes: int,
+    chunk_count: int,
+) -> DocumentContentHash:
+    """
+    Record a freshly indexed document. Re-registering the same hash repoints
+    the entry to the new doc_id; entries for older contents of the same doc_id
+    (an updated re-upload) are dropped so they no longer short-circuit.
+    """
+    stale = db.exec(
+        select(DocumentContentHash).where(
+            DocumentContentHash.tenant_id == tenant_id,
+            DocumentContentHash.collection_name == collection_name,
+            DocumentContentHash.doc_id == doc_id,
+            DocumentContentHash.content_hash != content_hash,
+        )
+    ).all()
+    for row in stale:
+        db.delete(row)
+
+    record = find_document_by_hash(db, tenant_id, collection_name, content_hash)
+    if record is None:
+        record = DocumentContentHash(
+            tenant_id=tenant_id,
+            collection_name=collection_name,
+            content_hash=content_hash,
+            doc_id=doc_id,
+            filename=filename,
+        )
+    record.doc_id = doc_id
+    record.filename = filename
+    record.size_bytes = size_bytes
+    record.chunk_count = chunk_count
+    record.last_seen_at = datetime.utcnow()
+
+    db.add(record)
+    db.commit()
+    db.refresh(record)
+    return record
+
+
+def record_duplicate(
+    db: Session,
+    record: DocumentContentHash,
+    filename: str,
+    source: str,
+) -> dict:
+    """
+    Link a skipped duplicate upload to the canonical document and count the savings.
+    """
+    record.duplicate_count += 1
+    record.last_seen_at = datetime.utcnow()
+    db.add(record)
+    db.add(
+        DocumentAlias(
+            tenant_id=record.tenant_id,
+            doc_id=record.doc_id,
+            content_hash=record.content_hash,
+            filename=filename,
+            source=source,
+        )
+    )
+    db.commit()
+
+    logger.info(
+        "Duplicate upload %s for tenant=%s linked to doc %s",
+        filename, record.tenant_id, record.doc_id,
+    )
+    return {
+        "status": "duplicate",
+        "tenant_id": record.tenant_id,
+        "collection_name": record.collection_name,
+        "doc_id": record.doc_id,
+        "duplicate_of": record.filename,
+        "chunks_indexed": 0,
+        "chunks_reused": record.chunk_count,
+    }
+
+
+def forget_document(db: Session, tenant_id: str, doc_id: str) -> int:
+    """
+    Remove registry entries and aliases for a deleted document.
+    """
+    records = db.exec(
+        select(DocumentContentHash).where(
+            DocumentContentHash.tenant_id == tenant_id,
+            DocumentContentHash.doc_id == doc_id,
+        )
+    ).all()
+    aliases = db.exec(
+        select(DocumentAlias).where(
+            DocumentAlias.tenant_id == tenant_id,
+            DocumentAlias.doc_id == doc_id,
+        )
+    ).all()
+    for row in [*records, *aliases]:
+        db.delete(row)
+    db.commit()
+    return len(records)
+
+
+def dedup_stats(db: Session, tenant_id: str) -> dict:
+    """
+    Totals for the tenant: unique documents, skipped duplicates and what they would have cost.
+    """
+    row = db.exec(
+        select(
+            func.count(DocumentContentHash.id),
+            func.coalesce(func.sum(DocumentContentHash.duplicate_count), 0),
+            func.coalesce(func.sum(DocumentContentHash.size_bytes * DocumentContentHash.duplicate_count), 0),
+            func.coalesce(func.sum(DocumentContentHash.chunk_count * DocumentContentHash.duplicate_count), 0),
+            func.coalesce(func.sum(DocumentContentHash.size_bytes), 0),
+            func.coalesce(func.sum(DocumentContentHash.chunk_count), 0),
+        ).where(DocumentContentHash.tenant_id == tenant_id)
+    ).one()
+
+    unique_documents, duplicates, bytes_saved, vectors_saved, bytes_indexed, vectors_indexed = row
+    return {
+        "tenant_id": tenant_id,
+        "unique_documents": int(unique_documents),
+        "duplicate_uploads": int(duplicates),
+        "bytes_indexed": int(bytes_indexed),
+        "vectors_indexed": int(vectors_indexed),
+        "bytes_saved": int(bytes_saved),
+        "vectors_saved": int(vectors_saved),
+    }
@@ -0,0 +1,63 @@
+import os
+from typing import List, Optional
+
+from Vector_setup.base.db_setup_management import MultiTenantChromaStoreManager
+from Vector_setup.base.tabular_store_management import TenantTabularStore
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Deletes touching more chunks than this run as a background task after the response
+DELETE_ASYNC_CHUNK_THRESHOLD = int(os.getenv("DELETE_ASYNC_CHUNK_THRESHOLD", "5000"))
+
+
+def purge_document_data(
+    store: MultiTenantChromaStoreManager,
+    tables_store: TenantTabularStore,
+    tenant_id: str,
+    collection_name: str,
+    doc_id: str,
+    chunk_ids: Optional[List[str]] = None,
+) -> dict:
+    """
+    Remove a document's vectors and structured tables (SQL mirrors are handled by the caller).
+    Safe to run as a FastAPI background task.
+    """
+    chunks_deleted = store.delete_document_chunks(
+        tenant_id=tenant_id,
+        collection_name=collection_name,
+        doc_id=doc_id,
+        chunk_ids=chunk_ids,
+    )
+    tables_deleted = 0
+    try:
+        tables_deleted = tables_store.delete_document(tenant_id, doc_id)
+    except Exception:
+        logger.warning("Failed to delete tables for doc %s", doc_id, exc_info=True)
+
+    return {"doc_id": doc_id, "chunks_deleted": chunks_deleted, "tables_deleted": tables_deleted}
+
+
+def purge_collection_data(
+    store: MultiTenantChromaStoreManager,
+    tables_store: TenantTabularStore,
+    tenant_id: str,
+    collection_name: str,
+) -> dict:
+    """
+    Drop a collection's vectors and structured tables. Safe to run as a background task.
+    """
+    vectors_deleted = store.delete_collection(tenant_id, collection_name)
+    tables_deleted = 0
+    try:
+        tables_deleted = tables_store.delete_collection(tenant_id, collection_name)
+    except Exception:
+        logger.warning("Failed to delete tables for collection %s", collection_name, exc_info=True)
+
+    return {
+        "collection_name": collection_name,
+        "vectors_deleted": vectors_deleted,
+        "tables_deleted": tables_deleted,
+    }
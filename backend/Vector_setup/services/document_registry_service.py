@@ -0,0 +1,213 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlmodel import Session, select, func
+
+from Vector_setup.user.db import Collection, Document, DocumentContentHash, DocumentAlias, IngestedDriveFile
+from Vector_setup.services.document_dedup_service import register_document, forget_document
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_ids_for(doc_id: str, chunk_count: int) -> List[str]:
+    """
+    Chroma ids of a document's chunks (same scheme as MultiTenantChromaStoreManager).
+    """
+    return [f"{doc_id}__chunk_{i}" for i in range(chunk_count)]
+
+
+def refresh_collection_doc_count(db: Session, collection: Collection) -> int:
+    """
+    Recompute Collection.doc_count from the documents table (indexed count, no Chroma call).
+    Caller commits.
+    """
+    count = db.exec(
+        select(func.count(Document.doc_id)).where(Document.collection_id == collection.id)
+    ).one()
+    collection.doc_count = int(count)
+    db.add(collection)
+    return collection.doc_count
+
+
+def find_foreign_document(db: Session, collection: Collection, doc_id: str) -> Optional[Document]:
+    """
+    The registry row using doc_id when it belongs to another tenant or collection
+    (doc_id is the table's only key, so indexing under it would take that row over).
+    """
+    doc = db.get(Document, doc_id)
+    if doc is None or (doc.tenant_id, doc.collection_id) == (collection.tenant_id, collection.id):
+        return None
+    return doc
+
+
+def bump_content_generation(db: Session, collection: Collection) -> None:
+    """
+    Mark the collection's content as changed (an atomic increment in the caller's
+    transaction; answer-cache entries computed before it are retired). Caller commits.
+    """
+    collection.content_generation = Collection.content_generation + 1
+    db.add(collection)
+
+
+def record_indexed_document(
+    db: Session,
+    collection: Collection,
+    doc_id: str,
+    source: str,
+    filename: str,
+    chunk_count: int,
+    size_bytes: int,
+    content_hash: Optional[str] = None,
+    title: Optional[str] = None,
+    content_type: Optional[str] = None,
+    drive_file_id: Optional[str] = None,
+) -> Document:
+    """
+    Write (or update, for re-uploads of the same doc_id) the SQL row for an
+    indexed document, register its content hash for deduplication and keep
+    Collection.doc_count in sync.
+
+    Raises ValueError when doc_id is already used in another tenant or collection.
+    """
+    if find_foreign_document(db, collection, doc_id) is not None:
+        raise ValueError(f"doc_id {doc_id} is already used by another document.")
+
+    now = datetime.utcnow()
+    doc = db.get(Document, doc_id)
+    if doc is None:
+        doc = Document(
+            doc_id=doc_id,
+            tenant_id=collection.tenant_id,
+            collection_id=collection.id,
+            collection_name=collection.name,
+            source=source,
+            filename=filename,
+            ingested_at=now,
+        )
+    doc.source = source
+    doc.filename = filename
+    doc.title = title or filename
+    doc.content_type = content_type
+    doc.content_hash = content_hash
+    doc.drive_file_id = drive_file_id
+    doc.chunk_count = chunk_count
+    doc.size_bytes = size_bytes
+    doc.updated_at = now
+    db.add(doc)
+    db.flush()
+
+    refresh_collection_doc_count(db, collection)
+    bump_content_generation(db, collection)
+    db.commit()
+    db.refresh(doc)
+
+    if content_hash:
+        register_document(
+            db,
+            tenant_id=collection.tenant_id,
+            collection_name=collection.name,
+            content_hash=content_hash,
+            doc_id=doc_id,
+            filename=filename,
+            size_bytes=size_bytes,
+            chunk_count=chunk_count,
+        )
+    return doc
+
+
+def list_documents(
+    db: Session,
+    tenant_id: str,
+    collection_ids: Optional[List[str]] = None,
+    limit: int = 100,
+    offset: int = 0,
+) -> List[Document]:
+    """
+    Newest-first page of a tenant's documents, optionally restricted to some collections.
+    """
+    stmt = select(Document).where(Document.tenant_id == tenant_id)
+    if collection_ids is not None:
+        stmt = stmt.where(Document.collection_id.in_(collection_ids))
+    stmt = stmt.order_by(Document.ingested_at.desc()).offset(offset).limit(limit)
+    return list(db.exec(stmt).all())
+
+
+def get_document(db: Session, tenant_id: str, doc_id: str) -> Optional[Document]:
+    doc = db.get(Document, doc_id)
+    if doc is None or doc.tenant_id != tenant_id:
+        return None
+    return doc
+
+
+def delete_document_record(db: Session, doc: Document) -> None:
+    """
+    Remove a document's SQL row (and its dedup entries) and refresh its
+    collection's doc_count. Caller removes the Chroma chunks (see chunk_ids_for).
+    """
+    collection = db.get(Collection, doc.collection_id)
+    forget_document(db, doc.tenant_id, doc.doc_id)
+    _forget_drive_file(db, doc)
+    db.delete(doc)
+    db.flush()
+    if collection is not None:
+        refresh_collection_doc_count(db, collection)
+        bump_content_generation(db, collection)
+    db.commit()
+
+
+def _forget_drive_file(db: Session, doc: Document) -> None:
+    # So the Drive picker no longer shows the file as "already ingested"
+    if not doc.drive_file_id:
+        return
+    for row in db.exec(
+        select(IngestedDriveFile).where(
+            IngestedDriveFile.tenant_id == doc.tenant_id,
+            IngestedDriveFile.drive_file_id == doc.drive_file_id,
+        )
+    ).all():
+        db.delete(row)
+
+
+def collection_chunk_total(db: Session, collection: Collection) -> int:
+    total = db.exec(
+        select(func.coalesce(func.sum(Document.chunk_count), 0)).where(
+            Document.collection_id == collection.id
+        )
+    ).one()
+    return int(total)
+
+
+def delete_collection_records(db: Session, collection: Collection) -> int:
+    """
+    Remove a collection and every SQL row hanging off it (documents, dedup
+    hashes and aliases, Drive "ingested" markers). Returns the number of documents removed.
+    """
+    docs = db.exec(select(Document).where(Document.collection_id == collection.id)).all()
+    doc_ids = [d.doc_id for d in docs]
+
+    for doc in docs:
+        _forget_drive_file(db, doc)
+        db.delete(doc)
+
+    for row in db.exec(
+        select(DocumentContentHash).where(
+            DocumentContentHash.tenant_id == collection.tenant_id,
+            DocumentContentHash.collection_name == collection.name,
+        )
+    ).all():
+        db.delete(row)
+
+    if doc_ids:
+        for row in db.exec(
+            select(DocumentAlias).where(
+                DocumentAlias.tenant_id == collection.tenant_id,
+                DocumentAlias.doc_id.in_(doc_ids),
+            )
+        ).all():
+            db.delete(row)
+
+    db.delete(collection)
+    db.commit()
+    return len(doc_ids)
@@ -1,6 +1,6 @@
 import re
 from io import BytesIO
-from typing import List
+from typing import List, Union
 
 import pandas as pd
 
@@ -89,7 +89,7 @@ def _describe_excel_sheet_shape(df: pd.DataFrame) -> str:
 
 
 
-def _extract_excel_with_pandas(raw_bytes: bytes, filename: str) -> str:
+def _extract_excel_with_pandas(source: Union[bytes, str], filename: str) -> str:
     """
     Extracts human-readable text from an Excel file.
 
@@ -101,7 +101,8 @@ def _extract_excel_with_pandas(raw_bytes: bytes, filename: str) -> str:
     - Inserts blank lines between year blocks when a Year-like column exists.
     - Separates sheets with a blank line.
     """
-    buffer = BytesIO(raw_bytes)
+    # bytes are wrapped in memory; a path lets openpyxl read straight from disk
+    buffer = BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
 
     # sheet_name=None -> dict[str, DataFrame] for all sheets.
     sheets = pd.read_excel(buffer, sheet_name=None, engine="openpyxl")
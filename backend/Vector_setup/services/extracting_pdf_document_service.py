@@ -1,15 +1,22 @@
 
 
-from typing import List
+from typing import List, Union
 import fitz  # PyMuPDF
 
 
 #  ---------- Pdf Text extraction helpers ----------
 
-def _extract_pdf_with_pymupdf(raw_bytes: bytes) -> str:
+def _open_pdf(source: Union[bytes, str]):
+    """Open from memory for bytes, or lazily from disk for a file path."""
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype="pdf")  # type: ignore[arg-type]
+    return fitz.open(source, filetype="pdf")
+
+
+def _extract_pdf_with_pymupdf(source: Union[bytes, str]) -> str:
     parts: List[str] = []
 
-    with fitz.open(stream=raw_bytes, filetype="pdf") as doc:  # type: ignore[arg-type]
+    with _open_pdf(source) as doc:
         for page_idx, page  in  enumerate(doc, start=1):
             text = page.get_text("text") or ""
             if text.strip():
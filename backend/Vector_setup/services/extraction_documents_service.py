@@ -1,46 +1,71 @@
 from io import BytesIO
 from docx import Document
-from typing import List
+from typing import List, Optional, Tuple, Union
 import csv
 from io import StringIO
 
 
 from Vector_setup.services.extracting_excel_document_service import _extract_excel_with_pandas
 from Vector_setup.services.extracting_pdf_document_service import _extract_pdf_with_pymupdf
+from Vector_setup.services.table_chunking_service import read_tables_from_upload, chunk_tables
 
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+# Extensions extract_text_from_upload knows how to handle
+SUPPORTED_UPLOAD_EXTENSIONS = (".md", ".txt", ".pdf", ".xlsx", ".xlsm", ".xls", ".csv", ".docx")
+
+
+def is_supported_upload(filename: str) -> bool:
+    return (filename or "").lower().endswith(SUPPORTED_UPLOAD_EXTENSIONS)
+
+
+def _read_text(source: Union[bytes, str]) -> str:
+    if isinstance(source, (bytes, bytearray)):
+        return source.decode("utf-8", errors="ignore")
+    with open(source, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
 # ---------- Main text extraction function ----------
-def extract_text_from_upload(filename: str, raw_bytes: bytes) -> str:
+def extract_text_from_upload(filename: str, source: Union[bytes, str]) -> str:
+    """
+    Extract text from an uploaded file.
+
+    `source` is either the raw bytes or a path to the spooled file on disk
+    (see upload_spool_service.SpooledUpload.source), so large files are not
+    loaded into memory before the extractor needs them.
+    """
     name = filename.lower()
 
     if name.endswith(".md") or name.endswith(".txt"):
-        return raw_bytes.decode("utf-8", errors="ignore")
+        return _read_text(source)
 
     if name.endswith(".pdf"):
-        return _extract_pdf_with_pymupdf(raw_bytes)
+        return _extract_pdf_with_pymupdf(source)
     
     if name.endswith((".xlsx", ".xlsm", ".xls")):
-        return _extract_excel_with_pandas(raw_bytes, name)
+        return _extract_excel_with_pandas(source, name)
     
     if name.endswith(".csv"):
-        # Decode bytes → text
-        text = raw_bytes.decode("utf-8", errors="ignore")
-        buffer = StringIO(text)
+        if isinstance(source, (bytes, bytearray)):
+            buffer = StringIO(source.decode("utf-8", errors="ignore"))
+        else:
+            buffer = open(source, "r", encoding="utf-8", errors="ignore", newline="")
 
-        reader = csv.reader(buffer)
-        rows = []
-        for row in reader:
-            # join columns with separator; tweak as you like
-            rows.append(" | ".join(col.strip() for col in row if col is not None))
+        with buffer:
+            reader = csv.reader(buffer)
+            rows = []
+            for row in reader:
+                # join columns with separator; tweak as you like
+                rows.append(" | ".join(col.strip() for col in row if col is not None))
 
         return "\n".join(rows) 
 
     if name.endswith(".docx"):
-        doc = Document(BytesIO(raw_bytes))
+        doc = Document(BytesIO(source) if isinstance(source, (bytes, bytearray)) else source)
         parts: List[str] = []
 
         for p in doc.paragraphs:
@@ -59,4 +84,25 @@ def extract_text_from_upload(filename: str, raw_bytes: bytes) -> str:
         return "\n".join(parts)
     
     logger.warning("Unsupported file type for text extraction: %s", filename)
-    return ""
\ No newline at end of file
+    return ""
+
+
+def extract_document_for_indexing(
+    filename: str,
+    source: Union[bytes, str],
+) -> Tuple[str, Optional[dict], Optional[List[dict]]]:
+    """
+    Shared extraction step for every ingest path (upload, bulk upload, Drive).
+
+    Returns (text, tables, table_chunks):
+    - tabular sources (xlsx/csv) are chunked by row groups and `tables` is kept
+      for the structured store;
+    - everything else goes through extract_text_from_upload (tables/table_chunks None).
+    """
+    tables = read_tables_from_upload(filename, source)
+    table_chunks = chunk_tables(tables) if tables else None
+    if table_chunks:
+        text = "\n\n".join(c["text"] for c in table_chunks)
+    else:
+        text = extract_text_from_upload(filename, source)
+    return text, tables, table_chunks
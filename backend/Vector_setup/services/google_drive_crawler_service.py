@@ -0,0 +1,158 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Google-native types are exported (Docs -> docx, Sheets -> xlsx, Slides -> pdf)
+GOOGLE_DOC_MIME = "application/vnd.google-apps.document"
+GOOGLE_SHEET_MIME = "application/vnd.google-apps.spreadsheet"
+GOOGLE_SLIDE_MIME = "application/vnd.google-apps.presentation"
+GOOGLE_FOLDER_MIME = "application/vnd.google-apps.folder"
+
+SUPPORTED_MIME_TYPES = {
+    "application/pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/msword",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/vnd.ms-excel",
+    "text/plain",
+    "text/markdown",
+    # Google Workspace native types that you export:
+    GOOGLE_DOC_MIME,
+    GOOGLE_SHEET_MIME,
+    GOOGLE_SLIDE_MIME,
+}
+DRIVE_LIST_FIELDS = "nextPageToken, files(id, name, mimeType, parents, size, modifiedTime, md5Checksum)"
+# Drive API maximum page size
+DRIVE_MAX_PAGE_SIZE = 1000
+# Folders listed at once while crawling a tree
+DRIVE_LIST_CONCURRENCY = int(os.getenv("DRIVE_LIST_CONCURRENCY", "8"))
+# How long a crawled folder tree is reused for the same tenant/root
+DRIVE_TREE_CACHE_TTL_S = float(os.getenv("DRIVE_TREE_CACHE_TTL_S", "300"))
+# Listings kept at once (least recently used dropped first)
+DRIVE_TREE_CACHE_MAX_ENTRIES = int(os.getenv("DRIVE_TREE_CACHE_MAX_ENTRIES", "256"))
+
+
+def folder_query(folder_id: Optional[str]) -> str:
+    q_parts = ["trashed = false"]
+    if folder_id:
+        q_parts.append(f"'{folder_id}' in parents")
+    return " and ".join(q_parts)
+
+
+def list_all_pages(service, query: str, page_size: int = DRIVE_MAX_PAGE_SIZE) -> List[dict]:
+    """
+    files.list with full nextPageToken pagination (a single call stops at page_size items).
+    """
+    files: List[dict] = []
+    page_token: Optional[str] = None
+    while True:
+        results = (
+            service.files()
+            .list(
+                q=query,
+                pageSize=min(max(page_size, 1), DRIVE_MAX_PAGE_SIZE),
+                fields=DRIVE_LIST_FIELDS,
+                pageToken=page_token,
+            )
+            .execute()
+        )
+        files.extend(results.get("files", []))
+        page_token = results.get("nextPageToken")
+        if not page_token:
+            return files
+
+
+def crawl_drive_tree(
+    service_factory: Callable[[], object],
+    root_folder_id: Optional[str],
+    page_size: int = DRIVE_MAX_PAGE_SIZE,
+    max_workers: int = DRIVE_LIST_CONCURRENCY,
+) -> List[dict]:
+    """
+    Breadth-first crawl of a folder tree; each level's folders are listed concurrently.
+
+    - service_factory builds a Drive service; one is created per worker thread
+      because googleapiclient services are not thread-safe.
+    - root_folder_id None crawls from "root" (My Drive).
+    - Folders are visited once even if they appear under several parents.
+    """
+    local = threading.local()
+
+    def _list_folder(folder_id: str) -> List[dict]:
+        service = getattr(local, "service", None)
+        if service is None:
+            service = local.service = service_factory()
+        return list_all_pages(service, folder_query(folder_id), page_size)
+
+    root = root_folder_id or "root"
+    files: List[dict] = []
+    visited = {root}
+    frontier = [root]
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        while frontier:
+            next_frontier: List[str] = []
+            for children in pool.map(_list_folder, frontier):
+                for f in children:
+                    files.append(f)
+                    if f.get("mimeType") == GOOGLE_FOLDER_MIME and f["id"] not in visited:
+                        visited.add(f["id"])
+                        next_frontier.append(f["id"])
+            frontier = next_frontier
+
+    logger.info("Crawled Drive tree %s: %d items, %d folders", root, len(files), len(visited))
+    return files
+
+
+class DriveTreeCache:
+    """
+    Per-tenant TTL cache of crawled listings, keyed by (tenant_id, folder_id, recursive).
+
+    - Bounded to max_entries listings, least recently used evicted first.
+    - Expired listings are dropped when read and on every insert.
+    """
+
+    def __init__(self, ttl_s: float = DRIVE_TREE_CACHE_TTL_S, max_entries: int = DRIVE_TREE_CACHE_MAX_ENTRIES):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, Optional[str], bool], Tuple[float, List[dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, tenant_id: str, folder_id: Optional[str], recursive: bool) -> Optional[List[dict]]:
+        key = (tenant_id, folder_id, recursive)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, tenant_id: str, folder_id: Optional[str], recursive: bool, files: List[dict]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for key in [k for k, (expires, _) in self._entries.items() if expires < now]:
+                del self._entries[key]
+            key = (tenant_id, folder_id, recursive)
+            self._entries[key] = (now + self.ttl_s, files)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tenant_id: str) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == tenant_id]:
+                del self._entries[key]
+
+
+drive_tree_cache = DriveTreeCache()
@@ -0,0 +1,309 @@
+import asyncio
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Executor
+from typing import Callable, Dict, List, Optional
+
+from sqlmodel import Session, select
+
+from Vector_setup.base.db_setup_management import MultiTenantChromaStoreManager
+from Vector_setup.base.tabular_store_management import TenantTabularStore
+from Vector_setup.user.db import Collection, DBUser, DocumentContentHash, IngestedDriveFile, engine
+from Vector_setup.user.audit import write_audit_log
+from Vector_setup.services.document_dedup_service import find_document_by_hash, record_duplicate
+from Vector_setup.services.document_registry_service import record_indexed_document
+from Vector_setup.services.google_drive_crawler_service import (
+    GOOGLE_FOLDER_MIME,
+    SUPPORTED_MIME_TYPES,
+    crawl_drive_tree,
+    folder_query,
+    list_all_pages,
+)
+from Vector_setup.services.google_drive_sync_service import (
+    DownloadFn,
+    drive_document_metadata,
+    mark_file_ingested,
+)
+from Vector_setup.services.ingestion_pipeline_service import IngestionPipeline
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Drive files downloaded at once by a folder ingest
+DRIVE_DOWNLOAD_CONCURRENCY = int(os.getenv("DRIVE_DOWNLOAD_CONCURRENCY", "8"))
+# Finished folder-ingest jobs stay queryable this long
+DRIVE_INGEST_JOB_TTL_S = float(os.getenv("DRIVE_INGEST_JOB_TTL_S", "3600"))
+
+_jobs: Dict[str, dict] = {}
+
+
+def create_ingest_job(tenant_id: str, collection_name: str, folder_id: Optional[str]) -> dict:
+    now = time.time()
+    for job_id in [
+        jid for jid, j in _jobs.items()
+        if j["finished_at"] is not None and now - j["finished_at"] > DRIVE_INGEST_JOB_TTL_S
+    ]:
+        del _jobs[job_id]
+
+    job = {
+        "job_id": str(uuid.uuid4()),
+        "tenant_id": tenant_id,
+        "collection_name": collection_name,
+        "folder_id": folder_id,
+        "status": "listing",  # listing -> running -> done | failed
+        "files_total": 0,
+        "files_done": 0,
+        "chunks_indexed": 0,
+        "indexed": [],
+        "duplicates": [],
+        "skipped": [],
+        "failures": [],
+        "stats": None,
+        "error": None,
+        "started_at": now,
+        "finished_at": None,
+    }
+    _jobs[job["job_id"]] = job
+    return job
+
+
+def get_ingest_job(tenant_id: str, job_id: str) -> Optional[dict]:
+    job = _jobs.get(job_id)
+    if job is None or job["tenant_id"] != tenant_id:
+        return None
+    return job
+
+
+async def run_drive_folder_ingest(
+    job: dict,
+    collection_id: str,
+    user_id: str,
+    service_factory: Callable[[], object],
+    download_fn: DownloadFn,
+    store: MultiTenantChromaStoreManager,
+    tables_store: TenantTabularStore,
+    recursive: bool = True,
+    extract_executor: Optional[Executor] = None,
+    session_factory: Callable[[], Session] = lambda: Session(engine),
+) -> dict:
+    """
+    Ingest every supported file of a Drive folder into one collection; progress
+    is published on `job` (see create_ingest_job / get_ingest_job).
+
+    - The folder (and its subfolders when recursive) is listed with the concurrent crawler.
+    - Files already ingested into this collection are skipped (POST /google-drive/sync
+      keeps those up to date); identical content is linked as a duplicate, not re-indexed.
+    - Downloads run DRIVE_DOWNLOAD_CONCURRENCY at a time, each thread with its own
+      Drive client, feeding the staged IngestionPipeline (extraction in
+      extract_executor, chunks of many files embedded per batch).
+    - A failing file is recorded in job["failures"] and does not stop the others.
+    """
+    tenant_id, collection_name = job["tenant_id"], job["collection_name"]
+    try:
+        with session_factory() as db:
+            collection = db.get(Collection, collection_id)
+            already_ingested = {
+                row.drive_file_id
+                for row in db.exec(
+                    select(IngestedDriveFile).where(
+                        IngestedDriveFile.tenant_id == tenant_id,
+                        IngestedDriveFile.collection_name == collection_name,
+                    )
+                ).all()
+            }
+            known_hashes = {
+                row.content_hash
+                for row in db.exec(
+                    select(DocumentContentHash).where(
+                        DocumentContentHash.tenant_id == tenant_id,
+                        DocumentContentHash.collection_name == collection_name,
+                    )
+                ).all()
+            }
+
+            # 1) List the folder
+            if recursive:
+                files = await asyncio.to_thread(crawl_drive_tree, service_factory, job["folder_id"])
+            else:
+                files = await asyncio.to_thread(
+                    lambda: list_all_pages(service_factory(), folder_query(job["folder_id"] or "root"))
+                )
+
+            items: List[dict] = []
+            for f in files:
+                mime_type = f.get("mimeType", "")
+                if mime_type == GOOGLE_FOLDER_MIME:
+                    continue
+                if mime_type not in SUPPORTED_MIME_TYPES:
+                    job["skipped"].append({"drive_file_id": f["id"], "filename": f["name"], "reason": "unsupported"})
+                elif f["id"] in already_ingested:
+                    job["skipped"].append({"drive_file_id": f["id"], "filename": f["name"], "reason": "already_ingested"})
+                else:
+                    items.append({
+                        "doc_id": str(uuid.uuid4()),
+                        "filename": f["name"],
+                        "name": f["name"],
+                        "drive_file": f,
+                        "metadata": drive_document_metadata(
+                            store, collection, f["id"], f["name"], None, mime_type, int(f.get("size") or 0)
+                        ),
+                    })
+            job["files_total"] = len(items)
+            job["status"] = "running"
+
+            # 2) Download -> extract -> chunk -> embed -> write, overlapped across files
+            local = threading.local()
+            seen_lock = threading.Lock()
+            seen_hashes = set()
+
+            def _fetch(item: dict) -> Optional[dict]:
+                service = getattr(local, "service", None)
+                if service is None:
+                    service = local.service = service_factory()
+                spooled, filename = download_fn(service, item["drive_file"])
+                item["content_hash"] = spooled.content_hash
+                with seen_lock:
+                    duplicate = spooled.content_hash in known_hashes or spooled.content_hash in seen_hashes
+                    seen_hashes.add(spooled.content_hash)
+                if duplicate:
+                    spooled.close()
+                    return None
+                item.update(filename=filename, source=spooled.source(), spool=spooled)
+                item["metadata"]["size_bytes"] = spooled.size
+                return item
+
+            def _progress(event: dict) -> None:
+                job["files_done"] = event["done"]
+
+            pipeline = IngestionPipeline(
+                store,
+                fetch_fn=_fetch,
+                fetch_concurrency=DRIVE_DOWNLOAD_CONCURRENCY,
+                extract_executor=extract_executor,
+            )
+            try:
+                result = await pipeline.run(tenant_id, collection_name, items, on_progress=_progress)
+            finally:
+                for item in items:
+                    if item.get("spool") is not None:
+                        item["spool"].close()
+
+            # 3) Registry, tables and "ingested" markers for indexed files
+            duplicates = []
+            for item in items:
+                doc_result = result["documents"].get(item["doc_id"], {})
+                meta = item["drive_file"]
+                if doc_result.get("status") == "skipped":
+                    duplicates.append(item)
+                    continue
+                if doc_result.get("status") != "ok":
+                    job["failures"].append({
+                        "drive_file_id": meta["id"],
+                        "filename": item["name"],
+                        "error": doc_result.get("error", "Indexing failed"),
+                    })
+                    continue
+
+                record_indexed_document(
+                    db,
+                    collection=collection,
+                    doc_id=item["doc_id"],
+                    source="google_drive",
+                    filename=item["name"],
+                    chunk_count=doc_result["chunks_indexed"],
+                    size_bytes=item["metadata"]["size_bytes"],
+                    content_hash=item["content_hash"],
+                    content_type=meta.get("mimeType"),
+                    drive_file_id=meta["id"],
+                )
+                tables = doc_result.pop("tables", None)
+                if tables:
+                    try:
+                        tables_store.load_tables(
+                            tenant_id=tenant_id,
+                            collection_name=collection_name,
+                            doc_id=item["doc_id"],
+                            tables=tables,
+                            title=item["name"],
+                        )
+                    except Exception:
+                        logger.warning("Failed to load tables for doc %s", item["doc_id"], exc_info=True)
+                mark_file_ingested(
+                    db,
+                    tenant_id=tenant_id,
+                    drive_file_id=meta["id"],
+                    filename=item["name"],
+                    mime_type=meta.get("mimeType", ""),
+                    doc_id=item["doc_id"],
+                    collection_name=collection_name,
+                    modified_time=meta.get("modifiedTime"),
+                    md5_checksum=meta.get("md5Checksum"),
+                )
+                job["indexed"].append({
+                    "doc_id": item["doc_id"],
+                    "drive_file_id": meta["id"],
+                    "filename": item["name"],
+                    "chunks_indexed": doc_result["chunks_indexed"],
+                })
+
+            # Duplicates (of existing documents or of another file in this folder)
+            # are linked once the canonical copy is registered
+            for item in duplicates:
+                meta = item["drive_file"]
+                existing = find_document_by_hash(db, tenant_id, collection_name, item["content_hash"])
+                if existing is None:
+                    job["failures"].append({
+                        "drive_file_id": meta["id"],
+                        "filename": item["name"],
+                        "error": "Duplicate of a file that failed to index.",
+                    })
+                    continue
+                job["duplicates"].append({
+                    "drive_file_id": meta["id"],
+                    "filename": item["name"],
+                    **record_duplicate(db, existing, filename=item["name"], source="google_drive"),
+                })
+                mark_file_ingested(
+                    db,
+                    tenant_id=tenant_id,
+                    drive_file_id=meta["id"],
+                    filename=item["name"],
+                    mime_type=meta.get("mimeType", ""),
+                    collection_name=collection_name,
+                )
+
+            job["chunks_indexed"] = result["chunks_indexed"]
+            job["stats"] = result.get("stats")
+
+            user = db.get(DBUser, user_id)
+            if user is not None:
+                write_audit_log(
+                    db=db,
+                    user=user,
+                    action="drive_folder_ingest",
+                    resource_type="collection",
+                    resource_id=collection_id,
+                    metadata={
+                        "tenant_id": tenant_id,
+                        "collection_name": collection_name,
+                        "folder_id": job["folder_id"],
+                        "documents_indexed": len(job["indexed"]),
+                        "documents_failed": len(job["failures"]),
+                        "documents_deduplicated": len(job["duplicates"]),
+                        "chunks_indexed": job["chunks_indexed"],
+                        "source": "google_drive",
+                    },
+                )
+        job["status"] = "done"
+    except Exception as exc:
+        logger.exception("Drive folder ingest %s failed", job["job_id"])
+        job["status"] = "failed"
+        job["error"] = str(exc)
+    finally:
+        job["finished_at"] = time.time()
+
+    return job
@@ -0,0 +1,428 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from Vector_setup.base.db_setup_management import MultiTenantChromaStoreManager
+from Vector_setup.base.tabular_store_management import TenantTabularStore
+from Vector_setup.user.db import Collection, Document, DriveSyncState, IngestedDriveFile
+from Vector_setup.services.extraction_documents_service import extract_document_for_indexing
+from Vector_setup.services.document_registry_service import delete_document_record, record_indexed_document
+from Vector_setup.services.document_deletion_service import purge_document_data
+from Vector_setup.services.google_drive_crawler_service import DRIVE_MAX_PAGE_SIZE
+from Vector_setup.services.upload_spool_service import SpooledUpload
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Scheduled sync period for every connected tenant; 0 disables the scheduler
+DRIVE_SYNC_INTERVAL_S = float(os.getenv("DRIVE_SYNC_INTERVAL_S", "0"))
+# A sync lease older than this is taken to belong to a crashed worker and can be
+# taken over; keep it well above the longest sync
+DRIVE_SYNC_LEASE_S = float(os.getenv("DRIVE_SYNC_LEASE_S", "3600"))
+DRIVE_FILE_FIELDS = "id, name, mimeType, size, modifiedTime, md5Checksum, trashed"
+DRIVE_CHANGE_FIELDS = f"nextPageToken, newStartPageToken, changes(fileId, removed, file({DRIVE_FILE_FIELDS}))"
+
+# (service, file_meta) -> (spooled content, filename to extract as); raises on Drive errors
+DownloadFn = Callable[[object, dict], Tuple[SpooledUpload, str]]
+
+def mark_file_ingested(
+    db: Session,
+    tenant_id: str,
+    drive_file_id: str,
+    filename: str,
+    mime_type: str,
+    doc_id: Optional[str] = None,
+    collection_name: Optional[str] = None,
+    modified_time: Optional[str] = None,
+    md5_checksum: Optional[str] = None,
+) -> None:
+    existing = (
+        db.query(IngestedDriveFile)
+        .filter_by(tenant_id=tenant_id, drive_file_id=drive_file_id)
+        .first()
+    )
+    if existing is None:
+        existing = IngestedDriveFile(
+            tenant_id=tenant_id,
+            drive_file_id=drive_file_id,
+            filename=filename,
+            mime_type=mime_type,
+        )
+    existing.filename = filename
+    existing.mime_type = mime_type
+    if doc_id is not None:
+        existing.doc_id = doc_id
+    if collection_name is not None:
+        existing.collection_name = collection_name
+    existing.modified_time = modified_time
+    existing.md5_checksum = md5_checksum
+    existing.last_ingested_at = datetime.utcnow()
+    db.add(existing)
+    db.commit()
+
+
+def tracked_drive_document(
+    db: Session,
+    tenant_id: str,
+    drive_file_id: str,
+    collection: Collection,
+) -> Optional[Document]:
+    """
+    The document a Drive file was last ingested as, if it is indexed in `collection`;
+    a re-ingest updates it in place instead of indexing a second copy.
+    """
+    row = (
+        db.query(IngestedDriveFile)
+        .filter_by(tenant_id=tenant_id, drive_file_id=drive_file_id)
+        .first()
+    )
+    doc = db.get(Document, row.doc_id) if row is not None and row.doc_id else None
+    if doc is None or doc.tenant_id != tenant_id or doc.collection_id != collection.id:
+        return None
+    return doc
+
+
+def drive_document_metadata(
+    store: MultiTenantChromaStoreManager,
+    collection: Collection,
+    file_id: str,
+    filename: str,
+    title: Optional[str],
+    mime_type: str,
+    size_bytes: int,
+) -> dict:
+    """
+    Chunk metadata for a document indexed from Google Drive.
+    """
+    collection_info = store.get_collection_info(collection.tenant_id, collection.name)
+    return {
+        "filename": filename,
+        "title": title or filename,
+        "content_type": mime_type,
+        "size_bytes": size_bytes,
+        "source": "google_drive",
+        "drive_file_id": file_id,
+        "tenant_id": collection.tenant_id,
+        "collection": collection.name,
+        "collection_display_name": collection_info.get("display_name", collection.name),
+        "high_level_topic": collection_info.get("topic"),
+        "collection_id": collection.id,
+        "organization_id": collection.organization_id,
+    }
+
+
+def acquire_sync_lease(
+    db: Session,
+    tenant_id: str,
+    lease_s: float = DRIVE_SYNC_LEASE_S,
+) -> Optional[datetime]:
+    """
+    Claim the tenant's Drive sync across worker processes with a conditional
+    UPDATE on DriveSyncState.running_since. Returns the lease (pass it to
+    release_sync_lease), or None while another sync holds a live lease.
+    """
+    if db.exec(select(DriveSyncState.id).where(DriveSyncState.tenant_id == tenant_id)).first() is None:
+        db.add(DriveSyncState(tenant_id=tenant_id))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # another worker created it first
+
+    now = datetime.utcnow()
+    claimed = db.exec(
+        update(DriveSyncState)
+        .where(
+            DriveSyncState.tenant_id == tenant_id,
+            or_(
+                DriveSyncState.running_since.is_(None),
+                DriveSyncState.running_since < now - timedelta(seconds=lease_s),
+            ),
+        )
+        .values(running_since=now)
+    )
+    db.commit()
+    return now if claimed.rowcount == 1 else None
+
+
+def release_sync_lease(db: Session, tenant_id: str, lease: datetime) -> None:
+    # Only our own lease: after a takeover it belongs to the other worker
+    db.exec(
+        update(DriveSyncState)
+        .where(DriveSyncState.tenant_id == tenant_id, DriveSyncState.running_since == lease)
+        .values(running_since=None)
+    )
+    db.commit()
+
+
+def file_is_unchanged(row: IngestedDriveFile, meta: dict) -> bool:
+    """
+    md5Checksum decides for binary files; Google-native files only have modifiedTime.
+    """
+    if meta.get("md5Checksum") and row.md5_checksum:
+        return meta["md5Checksum"] == row.md5_checksum
+    return bool(row.modified_time) and meta.get("modifiedTime") == row.modified_time
+
+
+def _is_not_found(exc: Exception) -> bool:
+    resp = getattr(exc, "resp", None)
+    return getattr(resp, "status", None) in (404, 410)
+
+
+def _fetch_changes(service, page_token: str) -> Tuple[Dict[str, Optional[dict]], str]:
+    """
+    Drain changes.list from page_token. Returns {file_id: file meta, or None when removed}
+    (last change per file wins) and the cursor for the next sync.
+    """
+    changed: Dict[str, Optional[dict]] = {}
+    token = page_token
+    while True:
+        resp = (
+            service.changes()
+            .list(
+                pageToken=token,
+                pageSize=DRIVE_MAX_PAGE_SIZE,
+                includeRemoved=True,
+                fields=DRIVE_CHANGE_FIELDS,
+            )
+            .execute()
+        )
+        for change in resp.get("changes", []):
+            file_meta = change.get("file")
+            changed[change["fileId"]] = None if change.get("removed") or not file_meta else file_meta
+        if resp.get("newStartPageToken"):
+            return changed, resp["newStartPageToken"]
+        token = resp["nextPageToken"]
+
+
+def _fetch_tracked_files(service, file_ids: List[str]) -> Dict[str, Optional[dict]]:
+    # Full reconcile: current metadata of every tracked file (None when it no longer exists)
+    current: Dict[str, Optional[dict]] = {}
+    for file_id in file_ids:
+        try:
+            current[file_id] = service.files().get(fileId=file_id, fields=DRIVE_FILE_FIELDS).execute()
+        except Exception as exc:
+            if not _is_not_found(exc):
+                raise
+            current[file_id] = None
+    return current
+
+
+def _remove_synced_file(
+    db: Session,
+    store: MultiTenantChromaStoreManager,
+    tables_store: TenantTabularStore,
+    row: IngestedDriveFile,
+) -> None:
+    doc = db.get(Document, row.doc_id) if row.doc_id else None
+    if doc is not None:
+        purge_document_data(store, tables_store, doc.tenant_id, doc.collection_name, doc.doc_id, None)
+        delete_document_record(db, doc)  # also drops the IngestedDriveFile row
+    else:
+        db.delete(row)
+        db.commit()
+
+
+def _refresh_synced_file_row(db: Session, row: IngestedDriveFile, meta: dict) -> None:
+    # Same content (e.g. a rename): keep the version and name current without re-indexing
+    doc = db.get(Document, row.doc_id)
+    if doc is not None and meta.get("name"):
+        doc.filename = meta["name"]
+        db.add(doc)
+    mark_file_ingested(
+        db,
+        tenant_id=row.tenant_id,
+        drive_file_id=row.drive_file_id,
+        filename=meta.get("name", row.filename),
+        mime_type=meta.get("mimeType", row.mime_type),
+        modified_time=meta.get("modifiedTime"),
+        md5_checksum=meta.get("md5Checksum"),
+    )
+
+
+async def _reindex_synced_file(
+    db: Session,
+    service,
+    store: MultiTenantChromaStoreManager,
+    tables_store: TenantTabularStore,
+    row: IngestedDriveFile,
+    meta: dict,
+    download_fn: DownloadFn,
+) -> str:
+    doc = db.get(Document, row.doc_id)
+    collection = db.get(Collection, doc.collection_id) if doc is not None else None
+    if collection is None:
+        raise ValueError(f"Indexed document {row.doc_id} for Drive file {row.drive_file_id} no longer exists.")
+
+    name = meta.get("name", row.filename)
+    mime_type = meta.get("mimeType", row.mime_type)
+
+    # 1) Download; same bytes under a new modifiedTime (e.g. rename) only refreshes the row
+    spooled, filename = await asyncio.to_thread(download_fn, service, meta)
+    with spooled:
+        if spooled.content_hash == doc.content_hash:
+            outcome = "unchanged"
+        else:
+            # 2) Extract and re-index incrementally under the same doc_id
+            text, tables, table_chunks = await asyncio.to_thread(
+                extract_document_for_indexing, filename, spooled.source()
+            )
+            if not isinstance(text, str) or not text.strip():
+                raise ValueError("No text could be extracted from the Google Drive file.")
+
+            metadata = drive_document_metadata(
+                store, collection, row.drive_file_id, name, doc.title, mime_type, spooled.size
+            )
+            result = await store.upsert_document(
+                tenant_id=collection.tenant_id,
+                collection_name=collection.name,
+                doc_id=doc.doc_id,
+                text=text,
+                metadata=metadata,
+                table_chunks=table_chunks,
+            )
+            if result.get("status") != "ok":
+                raise ValueError(result.get("message", "Indexing failed!"))
+
+            record_indexed_document(
+                db,
+                collection=collection,
+                doc_id=doc.doc_id,
+                source="google_drive",
+                filename=name,
+                chunk_count=result.get("chunks_indexed", 0),
+                size_bytes=spooled.size,
+                content_hash=spooled.content_hash,
+                title=doc.title,
+                content_type=mime_type,
+                drive_file_id=row.drive_file_id,
+            )
+
+            # 3) Structured tables follow the new content
+            try:
+                if tables:
+                    tables_store.load_tables(
+                        tenant_id=collection.tenant_id,
+                        collection_name=collection.name,
+                        doc_id=doc.doc_id,
+                        tables=tables,
+                        title=doc.title,
+                    )
+                else:
+                    tables_store.delete_document(collection.tenant_id, doc.doc_id)
+            except Exception:
+                logger.warning("Failed to refresh tables for doc %s", doc.doc_id, exc_info=True)
+            outcome = "updated"
+
+    mark_file_ingested(
+        db,
+        tenant_id=row.tenant_id,
+        drive_file_id=row.drive_file_id,
+        filename=name,
+        mime_type=mime_type,
+        modified_time=meta.get("modifiedTime"),
+        md5_checksum=meta.get("md5Checksum"),
+    )
+    return outcome
+
+
+async def sync_tenant_drive(
+    db: Session,
+    tenant_id: str,
+    service,
+    store: MultiTenantChromaStoreManager,
+    tables_store: TenantTabularStore,
+    download_fn: DownloadFn,
+    full: bool = False,
+) -> dict:
+    """
+    Bring a tenant's indexed Drive files up to date with Drive.
+
+    - Only files already ingested with a doc_id are synced; nothing new is ingested.
+    - With a stored cursor, only files reported by changes.list are looked at;
+      the first sync (or full=True) checks every tracked file with files.get.
+    - Changed files (md5Checksum, else modifiedTime) are re-downloaded and
+      re-indexed incrementally under their doc_id; removed or trashed files
+      have their vectors, tables and SQL rows deleted.
+    - A failing file does not stop the others; the cursor only advances when
+      every file succeeded, so failures are retried on the next run.
+    - One sync per tenant across all worker processes (see acquire_sync_lease);
+      a concurrent call returns status "busy".
+    """
+    lease = acquire_sync_lease(db, tenant_id)
+    if lease is None:
+        return {"status": "busy", "tenant_id": tenant_id}
+
+    try:
+        state = db.exec(select(DriveSyncState).where(DriveSyncState.tenant_id == tenant_id)).first()
+
+        tracked = {
+            row.drive_file_id: row
+            for row in db.exec(
+                select(IngestedDriveFile).where(
+                    IngestedDriveFile.tenant_id == tenant_id,
+                    IngestedDriveFile.doc_id.is_not(None),
+                )
+            ).all()
+        }
+
+        # 1) Which files to look at, and the cursor to store afterwards
+        mode = "full" if full or not state.page_token else "changes"
+        if mode == "full":
+            # Take the cursor first so edits made during the reconcile show up next time
+            start = await asyncio.to_thread(lambda: service.changes().getStartPageToken().execute())
+            next_token = start["startPageToken"]
+            candidates = await asyncio.to_thread(_fetch_tracked_files, service, list(tracked))
+        else:
+            changed, next_token = await asyncio.to_thread(_fetch_changes, service, state.page_token)
+            candidates = {fid: meta for fid, meta in changed.items() if fid in tracked}
+
+        # 2) Apply per file
+        counts = {"updated": 0, "removed": 0, "unchanged": 0}
+        errors: List[dict] = []
+        for file_id, meta in candidates.items():
+            row = tracked[file_id]
+            try:
+                if meta is None or meta.get("trashed"):
+                    _remove_synced_file(db, store, tables_store, row)
+                    counts["removed"] += 1
+                elif file_is_unchanged(row, meta):
+                    if meta.get("name", row.filename) != row.filename or meta.get("modifiedTime") != row.modified_time:
+                        _refresh_synced_file_row(db, row, meta)
+                    counts["unchanged"] += 1
+                else:
+                    outcome = await _reindex_synced_file(
+                        db, service, store, tables_store, row, meta, download_fn
+                    )
+                    counts[outcome] += 1
+            except Exception as exc:
+                db.rollback()
+                logger.warning("Drive sync failed for file %s (tenant %s)", file_id, tenant_id, exc_info=True)
+                errors.append({"drive_file_id": file_id, "error": str(exc)})
+
+        # 3) Persist the cursor
+        if not errors:
+            state.page_token = next_token
+        state.last_synced_at = datetime.utcnow()
+        state.last_status = "partial" if errors else "ok"
+        db.add(state)
+        db.commit()
+    finally:
+        db.rollback()
+        release_sync_lease(db, tenant_id, lease)
+
+    return {
+        "status": state.last_status,
+        "tenant_id": tenant_id,
+        "mode": mode,
+        "files_tracked": len(tracked),
+        "files_checked": len(candidates),
+        **counts,
+        "errors": errors,
+    }
@@ -0,0 +1,289 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from Vector_setup.base.db_setup_management import MultiTenantChromaStoreManager, EMBED_BATCH_SIZE
+from Vector_setup.services.extraction_documents_service import extract_document_for_indexing
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Files extracted at once (extraction runs in worker threads)
+INGEST_EXTRACT_CONCURRENCY = int(os.getenv("INGEST_EXTRACT_CONCURRENCY", str(min(8, os.cpu_count() or 4))))
+# Capacity of each inter-stage queue (items / chunk batches); bounds memory held in flight
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "16"))
+# Items fetched at once when the pipeline downloads its sources (fetch_fn)
+INGEST_FETCH_CONCURRENCY = int(os.getenv("INGEST_FETCH_CONCURRENCY", "8"))
+# Worker processes for CPU-bound extraction (see get_extract_process_pool); 0 keeps threads
+INGEST_PROCESS_WORKERS = int(os.getenv("INGEST_PROCESS_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_DONE = object()
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_extract_process_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Shared process pool for document extraction (PDF/DOCX parsing holds the GIL),
+    created on first use; None when INGEST_PROCESS_WORKERS is 0.
+    """
+    global _process_pool
+    if INGEST_PROCESS_WORKERS <= 0:
+        return None
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=INGEST_PROCESS_WORKERS)
+    return _process_pool
+
+
+class IngestionPipeline:
+    """
+    Staged ingestion engine: [fetch ->] extract -> chunk -> embed -> write.
+
+    Each stage is an asyncio task connected to the next by a bounded queue, and
+    the blocking work of each stage runs in a worker thread, so PDF/DOCX extraction
+    of the next files, embedding of the current batch and the Chroma write of the
+    previous batch overlap. Chunks of several documents are packed into one
+    embedding batch; a document counts as indexed once all its chunks are written.
+
+    items: [{"doc_id", "filename", "source" (bytes | path), "metadata"}, ...]
+
+    - fetch_fn (optional, blocking): called for each item before extraction,
+      at most fetch_concurrency at a time; returns the item with "source" filled in
+      (and optionally a "spool" closed once extracted), or None to skip the item.
+    - extract_executor (optional): executor for extraction, e.g. a process pool;
+      extract_fn and the sources must then be picklable. Defaults to threads.
+    """
+
+    def __init__(
+        self,
+        store: MultiTenantChromaStoreManager,
+        extract_concurrency: int = INGEST_EXTRACT_CONCURRENCY,
+        embed_batch_size: int = EMBED_BATCH_SIZE,
+        queue_size: int = INGEST_QUEUE_SIZE,
+        extract_fn: Callable[[str, Any], tuple] = extract_document_for_indexing,
+        fetch_fn: Optional[Callable[[dict], Optional[dict]]] = None,
+        fetch_concurrency: int = INGEST_FETCH_CONCURRENCY,
+        extract_executor: Optional[Executor] = None,
+    ):
+        self.store = store
+        self.extract_concurrency = max(1, extract_concurrency)
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.queue_size = max(1, queue_size)
+        self.extract_fn = extract_fn
+        self.fetch_fn = fetch_fn
+        self.fetch_concurrency = max(1, fetch_concurrency)
+        self.extract_executor = extract_executor
+
+    async def run(
+        self,
+        tenant_id: str,
+        collection_name: str,
+        items: List[dict],
+        on_progress: Optional[Callable[[dict], None]] = None,
+    ) -> dict:
+        """
+        Ingest all items; per-document errors are reported, not raised.
+
+        - on_progress: called with {"doc_id", "status", "done", "total"} each time
+          a document finishes (indexed, failed or skipped by fetch_fn).
+        """
+        results: Dict[str, dict] = {
+            item["doc_id"]: {"status": "pending", "filename": item["filename"]} for item in items
+        }
+        expected: Dict[str, int] = {}
+        written: Dict[str, int] = {}
+        busy = {"fetch": 0.0, "extract": 0.0, "chunk": 0.0, "embed": 0.0, "write": 0.0}
+        finished = 0
+        started = time.perf_counter()
+
+        in_q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        extract_q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size) if self.fetch_fn else in_q
+        chunk_q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        embed_q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        write_q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+
+        def _finish(doc_id: str, status: str, **extra) -> None:
+            nonlocal finished
+            if results[doc_id]["status"] in ("ok", "error", "skipped"):
+                return
+            results[doc_id].update(status=status, **extra)
+            finished += 1
+            if on_progress is not None:
+                try:
+                    on_progress({"doc_id": doc_id, "status": status, "done": finished, "total": len(items)})
+                except Exception:
+                    logger.warning("Ingest progress callback failed", exc_info=True)
+
+        async def _timed(stage: str, fn, *args, executor: Optional[Executor] = None):
+            t0 = time.perf_counter()
+            try:
+                if executor is not None:
+                    return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+                return await asyncio.to_thread(fn, *args)
+            finally:
+                busy[stage] += time.perf_counter() - t0
+
+        async def feed() -> None:
+            for item in items:
+                await in_q.put(item)
+            for _ in range(self.fetch_concurrency if self.fetch_fn else self.extract_concurrency):
+                await in_q.put(_DONE)
+
+        open_fetchers = self.fetch_concurrency
+
+        async def fetch_worker() -> None:
+            nonlocal open_fetchers
+            while True:
+                item = await in_q.get()
+                if item is _DONE:
+                    open_fetchers -= 1
+                    if open_fetchers == 0:
+                        for _ in range(self.extract_concurrency):
+                            await extract_q.put(_DONE)
+                    return
+                try:
+                    fetched = await _timed("fetch", self.fetch_fn, item)
+                except Exception as exc:
+                    logger.warning("Fetching %s failed: %s", item["filename"], exc)
+                    _finish(item["doc_id"], "error", error=str(exc) or "Download failed.")
+                    continue
+                if fetched is None:
+                    _finish(item["doc_id"], "skipped")
+                    continue
+                await extract_q.put(fetched)
+
+        async def extract_worker() -> None:
+            while True:
+                item = await extract_q.get()
+                if item is _DONE:
+                    await chunk_q.put(_DONE)
+                    return
+                try:
+                    text, tables, table_chunks = await _timed(
+                        "extract", self.extract_fn, item["filename"], item["source"],
+                        executor=self.extract_executor,
+                    )
+                except Exception as exc:
+                    logger.warning("Extraction failed for %s: %s", item["filename"], exc)
+                    _finish(item["doc_id"], "error", error=str(exc) or "Extraction failed.")
+                    continue
+                finally:
+                    # Downloaded content is no longer needed once extracted
+                    if item.get("spool") is not None:
+                        item["spool"].close()
+                if not isinstance(text, str) or not text.strip():
+                    _finish(item["doc_id"], "error", error="No text could be extracted from the document")
+                    continue
+                if tables:
+                    results[item["doc_id"]]["tables"] = tables
+                await chunk_q.put((item, text, table_chunks))
+
+        async def chunk_stage() -> None:
+            pending = {"ids": [], "texts": [], "metas": [], "doc_ids": []}
+            open_workers = self.extract_concurrency
+            while open_workers:
+                entry = await chunk_q.get()
+                if entry is _DONE:
+                    open_workers -= 1
+                    continue
+                item, text, table_chunks = entry
+                ids, chunks, metas = await _timed(
+                    "chunk",
+                    self.store.build_chunk_records,
+                    tenant_id, collection_name, item["doc_id"], text, item.get("metadata"), table_chunks,
+                )
+                if not chunks:
+                    _finish(item["doc_id"], "error", error="Document has no text content after processing.")
+                    continue
+                expected[item["doc_id"]] = len(chunks)
+                for cid, chunk, meta in zip(ids, chunks, metas):
+                    pending["ids"].append(cid)
+                    pending["texts"].append(chunk)
+                    pending["metas"].append(meta)
+                    pending["doc_ids"].append(item["doc_id"])
+                    if len(pending["ids"]) >= self.embed_batch_size:
+                        await embed_q.put(pending)
+                        pending = {"ids": [], "texts": [], "metas": [], "doc_ids": []}
+            if pending["ids"]:
+                await embed_q.put(pending)
+            await embed_q.put(_DONE)
+
+        async def embed_stage() -> None:
+            while True:
+                batch = await embed_q.get()
+                if batch is _DONE:
+                    await write_q.put(_DONE)
+                    return
+                try:
+                    embeddings = await _timed("embed", self.store.embed_texts, batch["texts"])
+                except Exception:
+                    logger.warning("Embedding batch failed", exc_info=True)
+                    embeddings = []
+                if len(embeddings) != len(batch["texts"]):
+                    for doc_id in set(batch["doc_ids"]):
+                        _finish(doc_id, "error", error="Failed to compute embeddings for document.")
+                    continue
+                batch["embeddings"] = embeddings
+                await write_q.put(batch)
+
+        async def write_stage() -> None:
+            while True:
+                batch = await write_q.get()
+                if batch is _DONE:
+                    return
+                try:
+                    await _timed(
+                        "write",
+                        self.store.write_chunks,
+                        tenant_id, collection_name,
+                        batch["ids"], batch["texts"], batch["embeddings"], batch["metas"],
+                    )
+                except Exception:
+                    logger.warning("Chroma write failed", exc_info=True)
+                    for doc_id in set(batch["doc_ids"]):
+                        _finish(doc_id, "error", error="Indexing failed")
+                    continue
+                for doc_id in batch["doc_ids"]:
+                    written[doc_id] = written.get(doc_id, 0) + 1
+                for doc_id in set(batch["doc_ids"]):
+                    if written[doc_id] == expected.get(doc_id):
+                        _finish(doc_id, "ok", chunks_indexed=written[doc_id])
+
+        tasks = [
+            asyncio.create_task(feed()),
+            *(asyncio.create_task(fetch_worker()) for _ in range(self.fetch_concurrency if self.fetch_fn else 0)),
+            *(asyncio.create_task(extract_worker()) for _ in range(self.extract_concurrency)),
+            asyncio.create_task(chunk_stage()),
+            asyncio.create_task(embed_stage()),
+            asyncio.create_task(write_stage()),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        # Documents that failed after some of their chunks were written leave no partial vectors
+        for doc_id, count in written.items():
+            if results[doc_id]["status"] != "ok":
+                self.store.delete_document_chunks(tenant_id, collection_name, doc_id)
+
+        elapsed = time.perf_counter() - started
+        docs_ok = sum(1 for r in results.values() if r["status"] == "ok")
+        chunks_ok = sum(r.get("chunks_indexed", 0) for r in results.values())
+        stats = {
+            "documents": len(items),
+            "documents_indexed": docs_ok,
+            "chunks_indexed": chunks_ok,
+            "elapsed_s": round(elapsed, 3),
+            "docs_per_minute": round(docs_ok * 60.0 / elapsed, 2) if elapsed > 0 else 0.0,
+            "chunks_per_second": round(chunks_ok / elapsed, 2) if elapsed > 0 else 0.0,
+            "stage_busy_s": {k: round(v, 3) for k, v in busy.items()},
+        }
+        logger.info("Ingestion pipeline for %s/%s: %s", tenant_id, collection_name, stats)
+
+        return {"documents": results, "chunks_indexed": chunks_ok, "stats": stats}
@@ -0,0 +1,79 @@
+import asyncio
+import os
+import time
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Iterable, Set
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Total time the post-answer stages get once the answer is complete; optional
+# stages still running after it are dropped, required ones are always awaited
+POST_ANSWER_DEADLINE_S = float(os.getenv("POST_ANSWER_DEADLINE_S", "8"))
+
+# Required stages that outlive a disconnected client (keeps them referenced until done)
+_background: Set[asyncio.Task] = set()
+
+
+async def run_post_answer_stages(
+    stages: Dict[str, Callable[[], Awaitable[Any]]],
+    optional: Iterable[str] = (),
+    deadline_s: float = POST_ANSWER_DEADLINE_S,
+) -> AsyncGenerator[dict, None]:
+    """
+    Run the post-answer stages concurrently; yields one event per stage as it finishes.
+
+    - Each event is {"stage", "status": "ok" | "failed" | "dropped", "result", "ms"}.
+    - Optional stages still pending at the deadline are cancelled and reported as
+      "dropped"; required stages are awaited however long they take.
+    - A failing stage is reported as "failed" and does not affect the others.
+    - If the consumer stops early, optional stages are cancelled and required
+      ones keep running in the background.
+    """
+    optional = set(optional)
+    started = time.perf_counter()
+    tasks: Dict[asyncio.Task, str] = {
+        asyncio.create_task(fn(), name=f"post_answer:{name}"): name
+        for name, fn in stages.items()
+    }
+    pending = set(tasks)
+
+    def _event(name: str, status: str, result: Any = None) -> dict:
+        return {
+            "stage": name,
+            "status": status,
+            "result": result,
+            "ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    try:
+        while pending:
+            remaining = deadline_s - (time.perf_counter() - started)
+            if remaining <= 0:
+                for task in [t for t in pending if tasks[t] in optional]:
+                    task.cancel()
+                    pending.discard(task)
+                    logger.warning("Post-answer stage %s dropped after %.1fs", tasks[task], deadline_s)
+                    yield _event(tasks[task], "dropped")
+                if not pending:
+                    break
+                remaining = None
+
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                name = tasks[task]
+                if task.exception() is not None:
+                    logger.warning("Post-answer stage %s failed", name, exc_info=task.exception())
+                    yield _event(name, "failed")
+                else:
+                    yield _event(name, "ok", task.result())
+    finally:
+        for task in pending:
+            if tasks[task] in optional:
+                task.cancel()
+            else:
+                _background.add(task)
+                task.add_done_callback(_background.discard)
@@ -0,0 +1,244 @@
+import os
+import re
+from io import BytesIO
+from typing import List, Optional, Tuple, Dict, Any, Union
+
+import pandas as pd
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Number of data rows grouped into one chunk (header is repeated in each chunk)
+TABLE_ROWS_PER_CHUNK = int(os.getenv("TABLE_ROWS_PER_CHUNK", "25"))
+
+YEAR_VALUE_REGEX = re.compile(r"\b(20[0-4][0-9])\b")  # same range as the pipeline's YEAR_REGEX
+ISO_MONTH_REGEX = re.compile(r"\b20[0-4][0-9][/-](\d{1,2})\b")  # 2023-03-05, 2024/3
+
+YEAR_COL_NAMES = {"year", "fiscal_year", "fy"}
+MONTH_COL_NAMES = {"month", "month_name"}
+DATE_COL_NAMES = {
+    "date",
+    "period",
+    "posting_date",
+    "txn_date",
+    "transaction_date",
+}
+
+MONTH_NUMBERS = {
+    "jan": 1, "january": 1,
+    "feb": 2, "february": 2,
+    "mar": 3, "march": 3,
+    "apr": 4, "april": 4,
+    "may": 5,
+    "jun": 6, "june": 6,
+    "jul": 7, "july": 7,
+    "aug": 8, "august": 8,
+    "sep": 9, "sept": 9, "september": 9,
+    "oct": 10, "october": 10,
+    "nov": 11, "november": 11,
+    "dec": 12, "december": 12,
+}
+
+
+def _cell_to_str(val: Any) -> str:
+    if isinstance(val, float) and val.is_integer():
+        return str(int(val))
+    if isinstance(val, pd.Timestamp):
+        return val.strftime("%Y-%m-%d")
+    return str(val).strip()
+
+
+def _year_from_value(val: Any) -> Optional[str]:
+    if isinstance(val, pd.Timestamp):
+        return str(val.year)
+    match = YEAR_VALUE_REGEX.search(_cell_to_str(val))
+    return match.group(1) if match else None
+
+
+def _month_from_value(val: Any) -> Optional[int]:
+    if isinstance(val, pd.Timestamp):
+        return val.month
+    s = _cell_to_str(val).lower()
+    if s.isdigit() and 1 <= int(s) <= 12:
+        return int(s)
+    if s in MONTH_NUMBERS:
+        return MONTH_NUMBERS[s]
+    iso = ISO_MONTH_REGEX.search(s)
+    if iso and 1 <= int(iso.group(1)) <= 12:
+        return int(iso.group(1))
+    # "Jan-23", "March 2024"
+    head = re.split(r"[\s\-/]", s, maxsplit=1)[0]
+    return MONTH_NUMBERS.get(head)
+
+
+def _detect_row_period(row: pd.Series) -> Tuple[Optional[str], Optional[int]]:
+    """
+    Best-effort (year, month) for a row.
+
+    Explicit Year/Month columns win over values parsed from date-like columns.
+    """
+    year: Optional[str] = None
+    month: Optional[int] = None
+    date_year: Optional[str] = None
+    date_month: Optional[int] = None
+
+    for col, val in row.items():
+        if pd.isna(val):
+            continue
+        col_lower = str(col).strip().lower()
+
+        if col_lower in YEAR_COL_NAMES:
+            year = _year_from_value(val) or year
+        elif col_lower in MONTH_COL_NAMES:
+            month = _month_from_value(val) or month
+        elif col_lower in DATE_COL_NAMES or isinstance(val, pd.Timestamp):
+            if date_year is None:
+                date_year = _year_from_value(val)
+            if date_month is None and (
+                isinstance(val, pd.Timestamp) or not _cell_to_str(val).isdigit()
+            ):
+                date_month = _month_from_value(val)
+
+    return year or date_year, month or date_month
+
+
+def _format_row(row: pd.Series) -> str:
+    parts: List[str] = []
+    for col, val in row.items():
+        if pd.isna(val):
+            continue
+        parts.append(f"{col}: {_cell_to_str(val)}")
+    return "  |  ".join(parts)
+
+
+def chunk_table_rows(
+    sheet_name: str,
+    df: pd.DataFrame,
+    rows_per_chunk: int = TABLE_ROWS_PER_CHUNK,
+) -> List[Dict[str, Any]]:
+    """
+    Group the rows of one sheet/table into chunks of at most `rows_per_chunk` rows.
+
+    - Every chunk repeats the sheet name and the column header.
+    - A new chunk is started whenever the detected year changes, so each chunk
+      carries at most one `year` and the pipeline's `{"year": ...}` filter can match.
+    - Returns a list of {"text": str, "metadata": dict} with sheet, row range,
+      and year/month where detected (year as str, month as int).
+    """
+    if df.empty:
+        return []
+
+    df = df.copy()
+    df.columns = [str(c).strip() for c in df.columns]
+    clean_sheet_name = str(sheet_name).strip()
+    header_line = " | ".join(df.columns)
+    rows_per_chunk = max(1, rows_per_chunk)
+
+    chunks: List[Dict[str, Any]] = []
+    current_lines: List[str] = []
+    current_rows: List[int] = []
+    current_periods: List[Tuple[Optional[str], Optional[int]]] = []
+    current_year: Optional[str] = None
+
+    def _flush() -> None:
+        if not current_lines:
+            return
+        years = {y for y, _ in current_periods}
+        months = {m for _, m in current_periods}
+        row_start, row_end = current_rows[0], current_rows[-1]
+        text = (
+            f"Sheet: {clean_sheet_name}\n"
+            f"Columns: {header_line}\n"
+            f"Rows {row_start}-{row_end}:\n"
+            + "\n".join(current_lines)
+        )
+        meta: Dict[str, Any] = {
+            "content_kind": "table_rows",
+            "sheet": clean_sheet_name,
+            "row_start": row_start,
+            "row_end": row_end,
+        }
+        if len(years) == 1 and None not in years:
+            meta["year"] = years.pop()
+        if len(months) == 1 and None not in months:
+            meta["month"] = months.pop()
+        chunks.append({"text": text, "metadata": meta})
+
+    # Row numbers are 1-based data rows (header excluded), blank rows keep their number
+    for row_number, (_, row) in enumerate(df.iterrows(), start=1):
+        if row.isna().all():
+            continue
+        year, month = _detect_row_period(row)
+
+        year_changed = (
+            year is not None
+            and current_year is not None
+            and year != current_year
+        )
+        if current_lines and (len(current_lines) >= rows_per_chunk or year_changed):
+            _flush()
+            current_lines, current_rows, current_periods = [], [], []
+            current_year = None
+
+        current_lines.append(_format_row(row))
+        current_rows.append(row_number)
+        current_periods.append((year, month))
+        if year is not None:
+            current_year = year
+
+    _flush()
+    return chunks
+
+
+def read_tables_from_upload(
+    filename: str,
+    source: Union[bytes, str],
+) -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    Parse tabular uploads (Excel / CSV) into {sheet_name: DataFrame}.
+
+    `source` is raw bytes or a path to the spooled file on disk.
+
+    Returns None for non-tabular files or when the file cannot be parsed as a table,
+    so callers fall back to the plain text extraction + token chunking path.
+    """
+    name = filename.lower()
+    buffer = BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+    try:
+        if name.endswith((".xlsx", ".xlsm", ".xls")):
+            return pd.read_excel(buffer, sheet_name=None, engine="openpyxl")
+
+        if name.endswith(".csv"):
+            sheet = os.path.splitext(os.path.basename(filename))[0] or "csv"
+            return {sheet: pd.read_csv(buffer, encoding_errors="ignore")}
+    except Exception as e:
+        logger.warning("Table parsing failed for %s, falling back to text: %s", filename, e)
+
+    return None
+
+
+def chunk_tables(
+    tables: Dict[str, pd.DataFrame],
+    rows_per_chunk: int = TABLE_ROWS_PER_CHUNK,
+) -> Optional[List[Dict[str, Any]]]:
+    chunks: List[Dict[str, Any]] = []
+    for sheet_name, df in tables.items():
+        chunks.extend(chunk_table_rows(sheet_name, df, rows_per_chunk=rows_per_chunk))
+
+    return chunks or None
+
+
+def extract_table_chunks_from_upload(
+    filename: str,
+    source: Union[bytes, str],
+    rows_per_chunk: int = TABLE_ROWS_PER_CHUNK,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Row-group chunks for tabular uploads (Excel / CSV), or None for other files.
+    """
+    tables = read_tables_from_upload(filename, source)
+    if tables is None:
+        return None
+    return chunk_tables(tables, rows_per_chunk=rows_per_chunk)
@@ -0,0 +1,212 @@
+import hashlib
+import os
+import tempfile
+import zipfile
+from io import BytesIO
+from typing import List, Optional, Tuple, Union
+
+from fastapi import HTTPException, UploadFile, status
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Hard cap for a single uploaded / downloaded document
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(100 * 1024 * 1024)))
+# Files up to this size stay in memory; larger ones roll over to a temp file on disk
+SPOOL_MAX_MEMORY_BYTES = int(os.getenv("SPOOL_MAX_MEMORY_BYTES", str(8 * 1024 * 1024)))
+# Read / download granularity
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None  # None -> system temp dir
+# Bulk upload: cap on the whole request / total uncompressed ZIP content, and on file count
+MAX_BULK_UPLOAD_BYTES = int(os.getenv("MAX_BULK_UPLOAD_BYTES", str(500 * 1024 * 1024)))
+MAX_BULK_FILES = int(os.getenv("MAX_BULK_FILES", "200"))
+
+
+class UploadTooLargeError(Exception):
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        super().__init__(f"File exceeds the maximum allowed size of {max_bytes} bytes.")
+
+
+def too_large_http_error(max_bytes: int = MAX_UPLOAD_BYTES) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File is too large. Maximum allowed size is {max_bytes // (1024 * 1024)} MB.",
+    )
+
+
+class SpooledUpload:
+    """
+    Write-once buffer for an incoming file.
+
+    - Keeps small files in memory and rolls over to a named temp file on disk
+      once `max_memory_bytes` is exceeded, so extractors can open large files by path.
+    - Enforces `max_bytes` while writing (raises UploadTooLargeError).
+    - Exposes `write()` so it can be used directly as a MediaIoBaseDownload target.
+    - Hashes the content while writing (`content_hash`, sha256) for deduplication.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = MAX_UPLOAD_BYTES,
+        max_memory_bytes: int = SPOOL_MAX_MEMORY_BYTES,
+        suffix: str = "",
+    ):
+        self.max_bytes = max_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.suffix = suffix
+        self.size = 0
+        self.path: Optional[str] = None
+        self._buffer: Optional[BytesIO] = BytesIO()
+        self._file = None
+        self._sha256 = hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        if self.size + len(data) > self.max_bytes:
+            raise UploadTooLargeError(self.max_bytes)
+
+        if self._buffer is not None and self.size + len(data) > self.max_memory_bytes:
+            self._rollover()
+
+        if self._buffer is not None:
+            self._buffer.write(data)
+        else:
+            self._file.write(data)
+        self._sha256.update(data)
+        self.size += len(data)
+        return len(data)
+
+    def _rollover(self) -> None:
+        self._file = tempfile.NamedTemporaryFile(
+            prefix="upload_", suffix=self.suffix, dir=UPLOAD_SPOOL_DIR, delete=False
+        )
+        self.path = self._file.name
+        self._file.write(self._buffer.getvalue())
+        self._buffer = None
+
+    @property
+    def content_hash(self) -> str:
+        return self._sha256.hexdigest()
+
+    @property
+    def on_disk(self) -> bool:
+        return self.path is not None
+
+    def source(self) -> Union[bytes, str]:
+        """
+        What extractors should read: raw bytes for small files, a file path for large ones.
+        """
+        if self._buffer is not None:
+            return self._buffer.getvalue()
+        self._file.flush()
+        return self.path
+
+    def close(self) -> None:
+        if self._file is not None:
+            try:
+                self._file.close()
+            finally:
+                try:
+                    os.unlink(self.path)
+                except OSError:
+                    pass
+            self._file = None
+        self._buffer = None
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+async def spool_upload_file(
+    file: UploadFile,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+) -> SpooledUpload:
+    """
+    Stream an UploadFile into a SpooledUpload in fixed-size chunks.
+
+    Rejects with 413 before reading when the declared size is already over the limit,
+    and while reading as soon as the limit is crossed.
+    """
+    declared = getattr(file, "size", None)
+    if declared is not None and declared > max_bytes:
+        raise too_large_http_error(max_bytes)
+
+    suffix = os.path.splitext(file.filename or "")[1]
+    spooled = SpooledUpload(max_bytes=max_bytes, suffix=suffix)
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            spooled.write(chunk)
+    except UploadTooLargeError:
+        spooled.close()
+        raise too_large_http_error(max_bytes)
+    except Exception:
+        spooled.close()
+        raise
+
+    return spooled
+
+
+def is_zip_upload(filename: str) -> bool:
+    return (filename or "").lower().endswith(".zip")
+
+
+def expand_zip_upload(
+    spooled: SpooledUpload,
+    max_files: int = MAX_BULK_FILES,
+    max_total_bytes: int = MAX_BULK_UPLOAD_BYTES,
+    max_member_bytes: int = MAX_UPLOAD_BYTES,
+) -> List[Tuple[str, SpooledUpload]]:
+    """
+    Stream the members of a spooled ZIP archive into their own SpooledUploads.
+
+    - Skips directories, macOS resource forks (__MACOSX/) and hidden files.
+    - Member names are flattened to their basename (no paths from the archive are used).
+    - Limits are enforced on the bytes actually decompressed, not on the sizes
+      declared in the archive, so a crafted ZIP cannot exceed them.
+    - Raises UploadTooLargeError / ValueError (too many files, bad archive);
+      already-expanded members are closed before raising.
+    """
+    source = spooled.source()
+    members: List[Tuple[str, SpooledUpload]] = []
+    total = 0
+
+    try:
+        with zipfile.ZipFile(BytesIO(source) if isinstance(source, bytes) else source) as zf:
+            for info in zf.infolist():
+                name = os.path.basename(info.filename)
+                if info.is_dir() or not name or name.startswith(".") or info.filename.startswith("__MACOSX/"):
+                    continue
+
+                if len(members) >= max_files:
+                    raise ValueError(f"Archive contains more than {max_files} files.")
+
+                out = SpooledUpload(
+                    max_bytes=min(max_member_bytes, max_total_bytes - total),
+                    suffix=os.path.splitext(name)[1],
+                )
+                members.append((name, out))
+                with zf.open(info) as fh:
+                    while True:
+                        chunk = fh.read(UPLOAD_CHUNK_BYTES)
+                        if not chunk:
+                            break
+                        out.write(chunk)
+                total += out.size
+    except zipfile.BadZipFile as exc:
+        for _, out in members:
+            out.close()
+        raise ValueError("Invalid ZIP archive.") from exc
+    except Exception:
+        for _, out in members:
+            out.close()
+        raise
+
+    return members
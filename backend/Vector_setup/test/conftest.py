@@ -1,4 +1,8 @@
+import asyncio
+import os
 import uuid
+from types import SimpleNamespace
+
 import pytest
 from sqlmodel import SQLModel, create_engine, Session
 
@@ -16,3 +20,80 @@ def engine():
 def db(engine):
     with Session(engine) as session:
         yield session
+
+
+class FakePipeline:
+    """
+    Runs llm_pipeline_stream against a fake store and fake LLM calls.
+
+    - documents: (text, title) pairs every retrieval returns; answer_parts: the
+      tokens the answer stream yields.
+    - embedder: optional embedding service for the query embedding / intent
+      classifier; without one the store has no embeddings and keyword rules decide.
+    - retrieval_calls / llm_calls / stream_calls hold the kwargs of each call;
+      events interleaves ("llm", token) as generated with ("client", text) as received.
+    """
+
+    def __init__(self, monkeypatch):
+        os.environ.setdefault("OPENAI_API_KEY", "test-key")
+        import LLM_Config.llm_pipeline as pipeline
+
+        self.pipeline = pipeline
+        self.documents = [("Annual leave is 20 days.", "HR Policy")]
+        self.answer_parts = ["Employees get 20 days."]
+        self.embedder = None
+        self.retrieval_calls, self.llm_calls, self.stream_calls, self.events = [], [], [], []
+        monkeypatch.setattr(pipeline, "call_llm", self._call_llm)
+        monkeypatch.setattr(pipeline, "stream_llm", self._stream_llm)
+
+    async def _call_llm(self, **kwargs):
+        self.llm_calls.append(kwargs)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="[0]"))])
+
+    async def _stream_llm(self, **kwargs):
+        self.stream_calls.append(kwargs)
+
+        async def gen():
+            for part in self.answer_parts:
+                self.events.append(("llm", part))
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=part))])
+            yield SimpleNamespace(choices=[])  # trailing usage-only chunk
+        return gen()
+
+    @property
+    def store(self):
+        harness = self
+
+        class _Store:
+            embedding_model_name = getattr(harness.embedder, "model_name", None)
+
+            def embed_texts(self, texts):
+                return harness.embedder.embed_batch(texts)
+
+            async def embed_query(self, text):
+                return harness.embedder.embed_batch([text])[0] if harness.embedder else None
+
+            async def query_policies(self, **kwargs):
+                harness.retrieval_calls.append(kwargs)
+                return {"results": [{"document": d, "metadata": {"title": t}} for d, t in harness.documents]}
+
+        return _Store()
+
+    def ask(self, question: str, tenant_id: str = "t1", **kwargs) -> dict:
+        """
+        Consume one answer; returns the pipeline's result_holder.
+        """
+        async def consume():
+            holder = {}
+            async for piece in self.pipeline.llm_pipeline_stream(
+                store=self.store, tenant_id=tenant_id, question=question, result_holder=holder, **kwargs
+            ):
+                self.events.append(("client", piece))
+            return holder
+
+        return asyncio.run(consume())
+
+
+@pytest.fixture
+def fake_pipeline(monkeypatch) -> FakePipeline:
+    return FakePipeline(monkeypatch)
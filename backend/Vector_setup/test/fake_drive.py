@@ -0,0 +1,153 @@
+"""
+In-memory stand-in for the googleapiclient Drive v3 service used by the tests.
+
+Supports files().list (with "'<id>' in parents" queries and nextPageToken paging),
+files().get, and changes().getStartPageToken / changes().list. Every add /
+update / trash / delete is appended to a change log the way Drive reports it.
+"""
+import hashlib
+import re
+import threading
+from typing import Dict, List, Optional
+
+from Vector_setup.services.upload_spool_service import SpooledUpload
+
+FOLDER_MIME = "application/vnd.google-apps.folder"
+
+
+class FakeHttpError(Exception):
+    def __init__(self, status: int):
+        self.resp = type("Resp", (), {"status": status})()
+        super().__init__(f"HTTP {status}")
+
+
+class _Request:
+    def __init__(self, fn):
+        self._fn = fn
+
+    def execute(self):
+        return self._fn()
+
+
+class FakeDrive:
+    def __init__(self):
+        self.files_by_id: Dict[str, dict] = {}
+        self.contents: Dict[str, bytes] = {}
+        self.change_log: List[dict] = []
+        self.list_calls = 0
+        self.downloads: List[str] = []
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def add(self, file_id: str, name: str, parent: str = "root", mime_type: str = "text/plain", **extra) -> dict:
+        f = {"id": file_id, "name": name, "mimeType": mime_type, "parents": [parent], **extra}
+        self.files_by_id[file_id] = f
+        self._touch(f)
+        return f
+
+    def add_folder(self, file_id: str, name: str, parent: str = "root") -> dict:
+        return self.add(file_id, name, parent, FOLDER_MIME)
+
+    def add_file(self, file_id: str, name: str, content: bytes, parent: str = "root", mime_type: str = "text/plain") -> dict:
+        self.contents[file_id] = content
+        return self.add(file_id, name, parent, mime_type, size=str(len(content)))
+
+    def update(self, file_id: str, content: Optional[bytes] = None, name: Optional[str] = None) -> None:
+        f = self.files_by_id[file_id]
+        if content is not None:
+            self.contents[file_id] = content
+            f["size"] = str(len(content))
+        if name is not None:
+            f["name"] = name
+        self._touch(f)
+
+    def trash(self, file_id: str) -> None:
+        f = self.files_by_id[file_id]
+        f["trashed"] = True
+        self._touch(f)
+
+    def delete(self, file_id: str) -> None:
+        del self.files_by_id[file_id]
+        self.contents.pop(file_id, None)
+        self.change_log.append({"fileId": file_id, "removed": True})
+
+    def _touch(self, f: dict) -> None:
+        self._version += 1
+        f["modifiedTime"] = f"2024-01-01T00:00:{self._version:02d}.000Z"
+        if f["id"] in self.contents:
+            f["md5Checksum"] = hashlib.md5(self.contents[f["id"]]).hexdigest()
+        self.change_log.append({"fileId": f["id"], "removed": False, "file": dict(f)})
+
+    def service(self) -> "FakeDriveService":
+        return FakeDriveService(self)
+
+    def download(self, service, file_meta: dict):
+        # Same contract as google_drive_router.download_drive_file
+        self.downloads.append(file_meta["id"])
+        spooled = SpooledUpload()
+        spooled.write(self.contents[file_meta["id"]])
+        return spooled, file_meta["name"]
+
+    def _list(self, q: str, pageSize: int, pageToken: Optional[str]) -> dict:
+        with self._lock:
+            self.list_calls += 1
+        m = re.search(r"'([^']+)' in parents", q or "")
+        items: List[dict] = [
+            f for f in self.files_by_id.values()
+            if not f.get("trashed") and (m is None or m.group(1) in f["parents"])
+        ]
+        start = int(pageToken or 0)
+        page = items[start:start + pageSize]
+        result = {"files": [dict(f) for f in page]}
+        if start + pageSize < len(items):
+            result["nextPageToken"] = str(start + pageSize)
+        return result
+
+    def _get(self, file_id: str) -> dict:
+        if file_id not in self.files_by_id:
+            raise FakeHttpError(404)
+        return dict(self.files_by_id[file_id])
+
+    def _changes(self, page_token: str, page_size: int) -> dict:
+        start = int(page_token)
+        page = self.change_log[start:start + page_size]
+        end = start + len(page)
+        result = {"changes": [dict(c) for c in page]}
+        if end < len(self.change_log):
+            result["nextPageToken"] = str(end)
+        else:
+            result["newStartPageToken"] = str(end)
+        return result
+
+
+class FakeDriveService:
+    def __init__(self, drive: FakeDrive):
+        self._drive = drive
+
+    def files(self):
+        return _FakeFiles(self._drive)
+
+    def changes(self):
+        return _FakeChanges(self._drive)
+
+
+class _FakeFiles:
+    def __init__(self, drive: FakeDrive):
+        self._drive = drive
+
+    def list(self, q: str = "", pageSize: int = 100, fields: str = "", pageToken: Optional[str] = None, **_):
+        return _Request(lambda: self._drive._list(q, pageSize, pageToken))
+
+    def get(self, fileId: str, fields: str = "", **_):
+        return _Request(lambda: self._drive._get(fileId))
+
+
+class _FakeChanges:
+    def __init__(self, drive: FakeDrive):
+        self._drive = drive
+
+    def getStartPageToken(self, **_):
+        return _Request(lambda: {"startPageToken": str(len(self._drive.change_log))})
+
+    def list(self, pageToken: str, pageSize: int = 100, **_):
+        return _Request(lambda: self._drive._changes(pageToken, pageSize))
@@ -0,0 +1,72 @@
+from benchmarks.fake_embedder import HashEmbeddingService
+from LLM_Config.answer_cache import SemanticAnswerCache, answer_cache_scope
+
+
+EMBEDDER = HashEmbeddingService()
+QUESTION = "What was the total revenue in 2023?"
+
+
+def _embed(text):
+    return EMBEDDER.embed_batch([text])[0]
+
+
+def test_lookup_matches_scope_numbers_and_generations():
+    cache = SemanticAnswerCache(similarity=0.8, ttl_s=60)
+    scope = answer_cache_scope("cache-t1", ["c2", "c1"])
+    generations = (("finance", 0),)
+    cache.store(scope, _embed(QUESTION), QUESTION, "NUMERIC_ANALYSIS", generations, "$1.2M", ["Finance"])
+
+    hit = cache.lookup(scope, _embed("what was the total revenue in 2023"), "what was the total revenue in 2023",
+                       "NUMERIC_ANALYSIS", generations)
+    assert hit["answer"] == "$1.2M" and hit["sources"] == ["Finance"] and hit["similarity"] >= 0.8
+
+    # Same collections in another order share the scope; another set / tenant does not
+    assert cache.lookup(answer_cache_scope("cache-t1", ["c1", "c2"]), _embed(QUESTION), QUESTION,
+                        "NUMERIC_ANALYSIS", generations) is not None
+    assert cache.lookup(answer_cache_scope("cache-t1", ["c1"]), _embed(QUESTION), QUESTION,
+                        "NUMERIC_ANALYSIS", generations) is None
+    assert cache.lookup(answer_cache_scope("cache-t2", ["c1", "c2"]), _embed(QUESTION), QUESTION,
+                        "NUMERIC_ANALYSIS", generations) is None
+
+    # Near-identical embedding but a different year is a different question
+    other_year = "What was the total revenue in 2024?"
+    assert cache.lookup(scope, _embed(other_year), other_year, "NUMERIC_ANALYSIS", generations) is None
+
+    # Re-ingesting a collection in scope retires the entry
+    fresh = (("finance", 1),)
+    assert cache.lookup(scope, _embed(QUESTION), QUESTION, "NUMERIC_ANALYSIS", fresh) is None
+    assert cache.stats()["stale"] == 1 and cache.stats()["entries"] == 0
+
+    # Per-tenant figures only count that tenant's lookups
+    assert cache.stats("cache-t2")["misses"] == 1 and cache.stats("cache-t2")["hits"] == 0
+    assert cache.stats("cache-t1")["hits"] == 2 and cache.stats("cache-t1")["misses"] == 3
+
+
+def test_pipeline_serves_repeat_questions_without_retrieval_or_llm(fake_pipeline, monkeypatch):
+    fake_pipeline.embedder = EMBEDDER
+    fake_pipeline.documents = [("Revenue 2023: $1.2M", "Finance")]
+    fake_pipeline.answer_parts = ["Revenue was $1.2M."]
+    monkeypatch.setattr(fake_pipeline.pipeline, "answer_cache", SemanticAnswerCache(similarity=0.8, ttl_s=60))
+
+    def ask(question, generation=0):
+        return fake_pipeline.ask(
+            question, tenant_id="cache-t3", collection_names=["finance"], collection_ids=["c1"],
+            content_generations={"finance": generation},
+        )
+
+    def calls():
+        return len(fake_pipeline.retrieval_calls), len(fake_pipeline.llm_calls) + len(fake_pipeline.stream_calls)
+
+    first = ask(QUESTION)
+    calls_after_first = calls()
+    repeat = ask("what was the total revenue in 2023")
+
+    assert repeat["answer"] == first["answer"] == "Revenue was $1.2M."
+    assert repeat["sources"] == first["sources"]
+    assert repeat["metrics"]["answer_cache_hit"] == 1
+    assert calls() == calls_after_first
+
+    # Another worker indexed a document: the shared generation moved on
+    after_ingest = ask(QUESTION, generation=1)
+    assert "answer_cache_hit" not in after_ingest["metrics"]
+    assert calls()[0] > calls_after_first[0]
@@ -0,0 +1,66 @@
+from LLM_Config.chart_spec_builder import build_chart_specs, parse_number
+
+
+ANSWER = """## Revenue 2024
+
+| Month | Revenue | Expenses | Margin |
+| --- | --- | --- | --- |
+| Jan | $1,200 | $800 | 33% |
+| Feb | $1,500 | ($100) | 40% |
+| **Total** | $2,700 | $700 | |
+"""
+
+
+def test_parse_number_units():
+    assert parse_number("$1,250,000") == (1250000.0, "$")
+    assert parse_number("(1,200)") == (-1200.0, "")
+    assert parse_number("12.5%") == (12.5, "%")
+    assert parse_number("NGN 2.5m") == (2500000.0, "NGN")
+    assert parse_number("Engineering") is None
+
+
+def test_table_becomes_line_charts_split_by_unit():
+    specs = build_chart_specs("Show revenue and margin by month", ANSWER)
+
+    amounts, margin = specs
+    assert amounts["chart_type"] == "line"
+    assert amounts["x_field"] == "month" and amounts["y_fields"] == ["revenue", "expenses"]
+    assert amounts["y_label"] == "Amount ($)"
+    # Total row dropped, negatives parsed
+    assert amounts["data"] == [
+        {"month": "Jan", "revenue": 1200, "expenses": 800},
+        {"month": "Feb", "revenue": 1500, "expenses": -100},
+    ]
+    assert margin["y_fields"] == ["margin"] and margin["y_label"] == "Margin (%)"
+
+
+def test_series_and_table_context_fallbacks():
+    series = build_chart_specs("headcount", "**Headcount by department:**\n- Engineering: 42\n- Sales: 17\n- HR: 5\n")
+    assert series[0]["chart_type"] == "bar" and series[0]["title"] == "Headcount by department"
+    assert [p["value"] for p in series[0]["data"]] == [42, 17, 5]
+
+    context = (
+        "| Metric | Total | Average | Min | Max |\n| --- | --- | --- | --- | --- |\n"
+        "| amount | 12 | 6 | 5 | 7 |\n| tax | 2 | 1 | 1 | 1 |\n"
+        "By month:\n| Year | Month | amount |\n| --- | --- | --- |\n| 2024 | 1 | 5 |\n| 2024 | 2 | 7 |\n"
+    )
+    specs = build_chart_specs("amount in 2024", "Spending rose in February.", table_context=context)
+    assert len(specs) == 1
+    assert specs[0]["x_field"] == "period" and specs[0]["data"][0] == {"period": "2024-01", "amount": 5}
+
+    assert build_chart_specs("q", "| Name | Role |\n| --- | --- |\n| Ada | CTO |\n| Bo | CFO |\n") == []
+    # Identifier columns are not measures
+    assert build_chart_specs("q", "| Name | Employee ID |\n| --- | --- |\n| Ada | 1042 |\n| Bo | 1043 |\n") == []
+    staff = build_chart_specs("q", "| Dept | Cost Code | Number of staff |\n| --- | --- | --- |\n| HR | 11 | 5 |\n| IT | 12 | 9 |\n")
+    assert staff[0]["y_fields"] == ["number_of_staff"]
+
+
+def test_pipeline_skips_chart_llm_call_when_answer_has_a_table(fake_pipeline):
+    fake_pipeline.documents = [("Revenue data", "Finance")]
+    fake_pipeline.answer_parts = [ANSWER]
+
+    holder = fake_pipeline.ask("Show a chart of revenue by month")
+
+    assert holder["chart_specs"][0]["y_fields"] == ["revenue", "expenses"]
+    assert holder["metrics"]["chart_source"] == "local"
+    assert 1500 not in [c["max_tokens"] for c in fake_pipeline.llm_calls]  # no chart-spec LLM call
@@ -0,0 +1,57 @@
+from LLM_Config.context_packer import (
+    CHUNK_OVERHEAD_TOKENS,
+    MESSAGE_OVERHEAD_TOKENS,
+    pack_context,
+    prompt_token_budget,
+)
+
+
+def _words(text):
+    return len(text.split())
+
+
+def _text(prefix, n):
+    return " ".join(f"{prefix}{i}" for i in range(n))
+
+
+def test_greedy_fill_by_rank_skips_chunks_that_do_not_fit():
+    chunks = [_text("a", 50), _text("b", 300), _text("c", 40), _text("d", 100)]
+
+    packed = pack_context(chunks, ranking=[1, 0, 3, 2], budget=300, fixed_tokens=100, count_fn=_words)
+
+    # b (rank 1) is too big; a, d, c are taken in rank order while they fit
+    assert packed["chunk_indices"] == [0, 3]
+    assert packed["dropped"] == 2
+    assert packed["prompt_tokens"] == 100 + 150 + 2 * CHUNK_OVERHEAD_TOKENS
+    assert packed["prompt_tokens"] <= packed["budget"]
+
+
+def test_duplicates_and_chunker_overlap_are_removed():
+    first = _text("w", 60)
+    overlapping = " ".join(first.split()[40:]) + " " + _text("x", 30)
+
+    packed = pack_context(
+        [first, first, overlapping, first[:200]],
+        ranking=[0, 1, 2, 3],
+        budget=1000,
+        fixed_tokens=0,
+        count_fn=_words,
+    )
+
+    assert packed["chunk_indices"] == [0, 2]
+    assert packed["chunks"][1] == _text("x", 30)
+    assert packed["deduplicated"] == 2
+
+
+def test_history_keeps_newest_whole_turns_within_its_share():
+    history = [(_text("q", 500), _text("a", 500)), ("Short question?", "Short answer.")]
+
+    packed = pack_context([], ranking=[], budget=1000, fixed_tokens=100, history=history, count_fn=_words)
+
+    assert packed["history"] == [("Short question?", "Short answer.")]
+    assert packed["prompt_tokens"] == 100 + 4 + 2 * MESSAGE_OVERHEAD_TOKENS
+
+
+def test_budget_respects_model_context_window():
+    assert prompt_token_budget("gpt-4.1-mini", 4096) == 12_000
+    assert prompt_token_budget("unknown-model", 4096) == 8_000
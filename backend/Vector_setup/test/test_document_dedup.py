@@ -0,0 +1,68 @@
+from sqlmodel import SQLModel, create_engine, Session
+
+from Vector_setup.services.document_dedup_service import (
+    find_document_by_hash,
+    find_duplicate_upload,
+    register_document,
+    record_duplicate,
+    dedup_stats,
+    forget_document,
+)
+from Vector_setup.services.upload_spool_service import SpooledUpload
+
+
+def _session() -> Session:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    return Session(engine)
+
+
+def _hash(data: bytes) -> str:
+    with SpooledUpload() as spooled:
+        spooled.write(data)
+        return spooled.content_hash
+
+
+def test_duplicate_upload_is_linked_and_counted():
+    db = _session()
+    h = _hash(b"same pdf bytes")
+    register_document(db, "t1", "hr", h, "doc-1", "policy.pdf", size_bytes=1000, chunk_count=12)
+
+    # Same content, other collection -> not a duplicate (separate ACL)
+    assert find_document_by_hash(db, "t1", "finance", h) is None
+
+    existing = find_document_by_hash(db, "t1", "hr", _hash(b"same pdf bytes"))
+    result = record_duplicate(db, existing, filename="policy (1).pdf", source="upload")
+    assert result["status"] == "duplicate" and result["doc_id"] == "doc-1"
+
+    stats = dedup_stats(db, "t1")
+    assert stats["unique_documents"] == 1
+    assert stats["duplicate_uploads"] == 1
+    assert stats["bytes_saved"] == 1000 and stats["vectors_saved"] == 12
+    assert dedup_stats(db, "t2")["unique_documents"] == 0
+
+    assert forget_document(db, "t1", "doc-1") == 1
+    assert find_document_by_hash(db, "t1", "hr", h) is None
+
+
+def test_reupload_with_new_content_drops_stale_hash():
+    db = _session()
+    register_document(db, "t1", "hr", "hash-v1", "doc-1", "policy.pdf", size_bytes=10, chunk_count=2)
+    register_document(db, "t1", "hr", "hash-v2", "doc-1", "policy.pdf", size_bytes=12, chunk_count=3)
+
+    assert find_document_by_hash(db, "t1", "hr", "hash-v1") is None
+    assert find_document_by_hash(db, "t1", "hr", "hash-v2").chunk_count == 3
+
+
+def test_update_with_another_documents_content_is_not_short_circuited():
+    db = _session()
+    h = _hash(b"contract v2")
+    register_document(db, "t1", "hr", "hash-x", "doc-x", "contract.pdf", size_bytes=10, chunk_count=2)
+    register_document(db, "t1", "hr", h, "doc-y", "contract-final.pdf", size_bytes=11, chunk_count=2)
+
+    # New upload without doc_id: linked to doc-y as before
+    assert find_duplicate_upload(db, "t1", "hr", h).doc_id == "doc-y"
+    # Updating doc-x with doc-y's bytes must re-index doc-x, not drop the update
+    assert find_duplicate_upload(db, "t1", "hr", h, doc_id="doc-x") is None
+    # Re-sending doc-y's own bytes under its doc_id is still a no-op
+    assert find_duplicate_upload(db, "t1", "hr", h, doc_id="doc-y").doc_id == "doc-y"
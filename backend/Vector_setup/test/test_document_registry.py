@@ -0,0 +1,81 @@
+import pytest
+
+from Vector_setup.user.db import Collection
+from Vector_setup.services.document_dedup_service import find_document_by_hash
+from Vector_setup.services.document_registry_service import (
+    chunk_ids_for,
+    delete_document_record,
+    find_foreign_document,
+    get_document,
+    list_documents,
+    record_indexed_document,
+)
+
+
+def _collection(db, cid="c1", name="hr") -> Collection:
+    col = Collection(id=cid, tenant_id="t1", name=name)
+    db.add(col)
+    db.commit()
+    return col
+
+
+def test_registry_maintains_doc_count_and_listing(db):
+    hr = _collection(db)
+    fin = _collection(db, "c2", "finance")
+
+    record_indexed_document(db, hr, "d1", "upload", "a.pdf", chunk_count=3, size_bytes=10, content_hash="h1")
+    record_indexed_document(db, hr, "d2", "google_drive", "b.pdf", chunk_count=1, size_bytes=5, drive_file_id="f1")
+    record_indexed_document(db, fin, "d3", "upload", "c.csv", chunk_count=2, size_bytes=7)
+    # Re-upload of d1 updates the row, not the count
+    record_indexed_document(db, hr, "d1", "upload", "a.pdf", chunk_count=4, size_bytes=12, content_hash="h2")
+
+    assert hr.doc_count == 2 and fin.doc_count == 1
+    assert hr.content_generation == 3 and fin.content_generation == 1
+    assert {d.doc_id for d in list_documents(db, "t1", collection_ids=[hr.id])} == {"d1", "d2"}
+    assert find_document_by_hash(db, "t1", "hr", "h2").doc_id == "d1"
+
+    doc = get_document(db, "t1", "d1")
+    assert chunk_ids_for(doc.doc_id, doc.chunk_count)[-1] == "d1__chunk_3"
+    assert get_document(db, "t2", "d1") is None
+
+    delete_document_record(db, doc)
+    db.refresh(hr)
+    assert hr.doc_count == 1 and hr.content_generation == 4
+    assert find_document_by_hash(db, "t1", "hr", "h2") is None
+
+
+def test_doc_id_of_another_tenant_or_collection_is_not_taken_over(db):
+    hr = _collection(db)
+    fin = _collection(db, "c2", "finance")
+    other_tenant = Collection(id="c3", tenant_id="t2", name="hr")
+    db.add(other_tenant)
+    db.commit()
+    record_indexed_document(db, hr, "d1", "upload", "a.pdf", chunk_count=3, size_bytes=10)
+
+    assert find_foreign_document(db, hr, "d1") is None
+    for target in (fin, other_tenant):
+        assert find_foreign_document(db, target, "d1").doc_id == "d1"
+        with pytest.raises(ValueError):
+            record_indexed_document(db, target, "d1", "upload", "evil.pdf", chunk_count=1, size_bytes=1)
+
+    doc = get_document(db, "t1", "d1")
+    assert (doc.filename, doc.collection_id, doc.chunk_count) == ("a.pdf", "c1", 3)
+    db.refresh(other_tenant)
+    assert other_tenant.doc_count == 0
+
+
+def test_delete_collection_records_removes_dependent_rows(db):
+    from Vector_setup.services.document_registry_service import (
+        collection_chunk_total,
+        delete_collection_records,
+    )
+
+    hr = _collection(db)
+    record_indexed_document(db, hr, "d1", "upload", "a.pdf", chunk_count=3, size_bytes=10, content_hash="h1")
+    record_indexed_document(db, hr, "d2", "upload", "b.pdf", chunk_count=4, size_bytes=10, content_hash="h2")
+    assert collection_chunk_total(db, hr) == 7
+
+    assert delete_collection_records(db, hr) == 2
+    assert db.get(Collection, "c1") is None
+    assert list_documents(db, "t1") == []
+    assert find_document_by_hash(db, "t1", "hr", "h1") is None
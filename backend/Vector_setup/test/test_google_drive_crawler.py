@@ -0,0 +1,67 @@
+from Vector_setup.services.google_drive_crawler_service import (
+    DriveTreeCache,
+    crawl_drive_tree,
+    list_all_pages,
+)
+from Vector_setup.test.fake_drive import FakeDrive
+
+
+def test_list_all_pages_follows_next_page_token():
+    drive = FakeDrive()
+    for i in range(25):
+        drive.add(f"f{i}", f"doc{i}.txt", parent="folder")
+
+    files = list_all_pages(drive.service(), "trashed = false and 'folder' in parents", page_size=10)
+
+    assert [f["id"] for f in files] == [f"f{i}" for i in range(25)]
+    assert drive.list_calls == 3
+
+
+def test_crawl_drive_tree_visits_every_folder_once():
+    drive = FakeDrive()
+    drive.add_folder("a", "A")
+    drive.add_folder("b", "B", parent="a")
+    drive.add_folder("c", "C", parent="b")
+    drive.add("x", "x.txt", parent="a")
+    drive.add("y", "y.txt", parent="c")
+    shared = drive.add_folder("s", "Shared", parent="a")
+    shared["parents"].append("b")  # reachable from two parents
+
+    files = crawl_drive_tree(drive.service, None, page_size=2, max_workers=4)
+
+    ids = [f["id"] for f in files]
+    assert set(ids) == {"a", "b", "c", "x", "y", "s"}
+    # root, a, b, c, s listed exactly once each (a has 3 children -> 2 pages)
+    assert drive.list_calls == 6
+
+
+def test_tree_cache_is_scoped_per_tenant_and_expires():
+    cache = DriveTreeCache(ttl_s=60)
+    cache.put("t1", None, True, [{"id": "a"}])
+    cache.put("t2", None, True, [{"id": "b"}])
+
+    assert cache.get("t1", None, True) == [{"id": "a"}]
+    assert cache.get("t1", None, False) is None
+
+    cache.invalidate("t1")
+    assert cache.get("t1", None, True) is None
+    assert cache.get("t2", None, True) == [{"id": "b"}]
+
+    expired = DriveTreeCache(ttl_s=-1)
+    expired.put("t1", None, True, [])
+    assert expired.get("t1", None, True) is None
+
+
+def test_tree_cache_is_bounded_and_prunes_expired_entries_on_insert():
+    cache = DriveTreeCache(ttl_s=60, max_entries=2)
+    cache.put("t1", "f1", True, [])
+    cache.put("t1", "f2", True, [])
+    assert cache.get("t1", "f1", True) == []  # f1 now most recently used
+    cache.put("t1", "f3", True, [])
+    assert cache.get("t1", "f2", True) is None
+    assert cache.get("t1", "f1", True) == [] and cache.get("t1", "f3", True) == []
+
+    expired = DriveTreeCache(ttl_s=-1)
+    for folder in ("f1", "f2", "f3"):
+        expired.put("t1", folder, True, [])
+    assert len(expired._entries) == 1
@@ -0,0 +1,91 @@
+import asyncio
+
+from sqlmodel import Session
+
+from Vector_setup.user.db import Collection, IngestedDriveFile
+from Vector_setup.services.document_registry_service import list_documents
+from Vector_setup.services.google_drive_ingest_service import (
+    create_ingest_job,
+    get_ingest_job,
+    run_drive_folder_ingest,
+)
+from Vector_setup.test.fake_drive import FakeDrive
+
+
+class _Store:
+    def __init__(self):
+        self.rows = {}
+        self.embed_calls = []
+
+    def get_collection_info(self, tenant_id, collection_name):
+        return {}
+
+    def build_chunk_records(self, tenant_id, collection_name, doc_id, text, metadata=None, table_chunks=None):
+        chunks = text.split()
+        return [f"{doc_id}__chunk_{i}" for i in range(len(chunks))], chunks, [dict(metadata or {}) for _ in chunks]
+
+    def embed_texts(self, texts):
+        self.embed_calls.append(len(texts))
+        return [[1.0] for _ in texts]
+
+    def write_chunks(self, tenant_id, collection_name, ids, documents, embeddings, metadatas):
+        self.rows.update(zip(ids, documents))
+        return len(ids)
+
+    def delete_document_chunks(self, tenant_id, collection_name, doc_id, chunk_ids=None):
+        return 0
+
+
+def test_folder_ingest_indexes_tree_and_isolates_failures(engine, db):
+    db.add(Collection(id="c1", tenant_id="t1", name="hr"))
+    db.commit()
+
+    drive = FakeDrive()
+    drive.add_folder("top", "Policies")
+    drive.add_folder("sub", "Archive", parent="top")
+    drive.add_file("a", "a.txt", b"leave policy text", parent="top")
+    drive.add_file("b", "b.txt", b"travel rules", parent="sub")
+    drive.add_file("b2", "copy-of-b.txt", b"travel rules", parent="sub")
+    drive.add_file("blank", "blank.txt", b"   ", parent="sub")
+    drive.add_file("img", "photo.png", b"\x89PNG", parent="top", mime_type="image/png")
+    drive.add_file("other", "elsewhere.txt", b"not in folder")
+
+    store = _Store()
+    job = create_ingest_job("t1", "hr", "top")
+    asyncio.run(
+        run_drive_folder_ingest(
+            job,
+            collection_id="c1",
+            user_id="u1",
+            service_factory=drive.service,
+            download_fn=drive.download,
+            store=store,
+            tables_store=None,
+            session_factory=lambda: Session(engine),
+        )
+    )
+
+    assert get_ingest_job("t1", job["job_id"]) is job and get_ingest_job("t2", job["job_id"]) is None
+    assert job["status"] == "done" and job["files_total"] == 4 and job["files_done"] == 4
+    assert {d["filename"] for d in job["indexed"]} == {"a.txt", "b.txt"}
+    assert [d["filename"] for d in job["duplicates"]] == ["copy-of-b.txt"]
+    assert [f["filename"] for f in job["failures"]] == ["blank.txt"]
+    assert [s["reason"] for s in job["skipped"]] == ["unsupported"]
+    assert sorted(store.rows.values()) == ["leave", "policy", "rules", "text", "travel"]
+    assert len(store.embed_calls) == 1  # chunks of both files in one batch
+
+    db.expire_all()
+    assert {d.drive_file_id for d in list_documents(db, "t1")} == {"a", "b"}
+    assert db.get(Collection, "c1").doc_count == 2
+    tracked = {r.drive_file_id: r.doc_id for r in db.query(IngestedDriveFile).all()}
+    assert set(tracked) == {"a", "b", "b2"} and tracked["b2"] is None
+
+    # Re-running skips what is already in the collection
+    again = create_ingest_job("t1", "hr", "top")
+    asyncio.run(
+        run_drive_folder_ingest(
+            again, "c1", "u1", drive.service, drive.download, store, None,
+            session_factory=lambda: Session(engine),
+        )
+    )
+    assert again["files_total"] == 1 and again["indexed"] == []
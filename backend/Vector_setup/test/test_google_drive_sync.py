@@ -0,0 +1,169 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlmodel import SQLModel, Session, create_engine
+
+from Vector_setup.user.db import Collection, Document, DriveSyncState, IngestedDriveFile
+from Vector_setup.services.document_registry_service import record_indexed_document
+from Vector_setup.services.google_drive_sync_service import (
+    acquire_sync_lease,
+    mark_file_ingested,
+    release_sync_lease,
+    sync_tenant_drive,
+    tracked_drive_document,
+)
+from Vector_setup.test.fake_drive import FakeDrive
+
+
+class _Store:
+    def __init__(self):
+        self.docs = {}
+
+    def get_collection_info(self, tenant_id, collection_name):
+        return {}
+
+    async def upsert_document(self, tenant_id, collection_name, doc_id, text, metadata=None, table_chunks=None):
+        self.docs[doc_id] = text
+        return {"status": "ok", "chunks_indexed": 1}
+
+    def delete_document_chunks(self, tenant_id, collection_name, doc_id, chunk_ids=None):
+        return 1 if self.docs.pop(doc_id, None) is not None else 0
+
+
+class _Tables:
+    def delete_document(self, tenant_id, doc_id):
+        return 0
+
+
+def _ingest(db, drive, store, collection, file_id, doc_id):
+    meta = drive.files_by_id[file_id]
+    spooled, _ = drive.download(None, meta)
+    with spooled:
+        store.docs[doc_id] = spooled.source().decode()
+        record_indexed_document(
+            db, collection, doc_id, "google_drive", meta["name"], chunk_count=1,
+            size_bytes=spooled.size, content_hash=spooled.content_hash, drive_file_id=file_id,
+        )
+    mark_file_ingested(
+        db, "t1", file_id, meta["name"], meta["mimeType"], doc_id=doc_id, collection_name=collection.name,
+        modified_time=meta["modifiedTime"], md5_checksum=meta.get("md5Checksum"),
+    )
+
+
+def _sync(db, drive, store, **kwargs):
+    return asyncio.run(
+        sync_tenant_drive(db, "t1", drive.service(), store, _Tables(), drive.download, **kwargs)
+    )
+
+
+def test_sync_reindexes_changed_files_and_deletes_removed_ones(db):
+    col = Collection(id="c1", tenant_id="t1", name="hr")
+    db.add(col)
+    db.commit()
+
+    drive, store = FakeDrive(), _Store()
+    drive.add_file("a", "a.txt", b"alpha v1")
+    drive.add_file("b", "b.txt", b"beta")
+    drive.add_file("c", "c.txt", b"gamma")
+    drive.add_file("untracked", "u.txt", b"never ingested")
+    for file_id, doc_id in (("a", "da"), ("b", "db"), ("c", "dc")):
+        _ingest(db, drive, store, col, file_id, doc_id)
+    drive.downloads.clear()
+
+    # First run has no cursor: full reconcile, nothing changed
+    first = _sync(db, drive, store)
+    assert (first["mode"], first["files_checked"], first["unchanged"]) == ("full", 3, 3)
+    assert drive.downloads == []
+
+    drive.update("a", b"alpha v2")
+    drive.update("b", name="b-renamed.txt")  # metadata-only change
+    drive.trash("c")
+    drive.update("untracked", b"still not ours")
+
+    second = _sync(db, drive, store)
+    assert second["mode"] == "changes" and second["errors"] == []
+    assert (second["updated"], second["unchanged"], second["removed"]) == (1, 1, 1)
+    assert drive.downloads == ["a"]
+    assert store.docs == {"da": "alpha v2", "db": "beta"}
+    assert db.get(Document, "dc") is None
+    assert db.query(IngestedDriveFile).filter_by(drive_file_id="c").first() is None
+    assert db.query(IngestedDriveFile).filter_by(drive_file_id="b").first().filename == "b-renamed.txt"
+
+    # Cursor advanced: nothing left to look at
+    assert _sync(db, drive, store)["files_checked"] == 0
+
+    drive.delete("b")
+    assert _sync(db, drive, store)["removed"] == 1
+    assert db.get(Collection, "c1").doc_count == 1
+
+
+def test_failed_file_keeps_cursor_for_retry(db):
+    col = Collection(id="c1", tenant_id="t1", name="hr")
+    db.add(col)
+    db.commit()
+
+    drive, store = FakeDrive(), _Store()
+    drive.add_file("a", "a.txt", b"alpha")
+    _ingest(db, drive, store, col, "a", "da")
+    _sync(db, drive, store)
+    cursor = db.query(DriveSyncState).filter_by(tenant_id="t1").first().page_token
+
+    drive.update("a", b"   ")  # no extractable text -> fails
+    result = _sync(db, drive, store)
+    assert result["status"] == "partial" and result["errors"][0]["drive_file_id"] == "a"
+    assert db.query(DriveSyncState).filter_by(tenant_id="t1").first().page_token == cursor
+
+    drive.update("a", b"alpha fixed")
+    assert _sync(db, drive, store)["updated"] == 1
+    assert store.docs["da"] == "alpha fixed"
+
+
+def test_reingest_targets_the_tracked_document_of_the_same_collection(db):
+    hr = Collection(id="c1", tenant_id="t1", name="hr")
+    fin = Collection(id="c2", tenant_id="t1", name="finance")
+    db.add(hr)
+    db.add(fin)
+    db.commit()
+
+    drive, store = FakeDrive(), _Store()
+    drive.add_file("a", "a.txt", b"alpha v1")
+    assert tracked_drive_document(db, "t1", "a", hr) is None
+
+    _ingest(db, drive, store, hr, "a", "da")
+    assert tracked_drive_document(db, "t1", "a", hr).doc_id == "da"
+    assert tracked_drive_document(db, "t1", "a", fin) is None
+    assert tracked_drive_document(db, "t2", "a", hr) is None
+
+
+def test_one_sync_per_tenant_across_worker_processes(tmp_path):
+    # Each worker has its own connection to the shared SQLite file
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as worker_a, Session(engine) as worker_b:
+        col = Collection(id="c1", tenant_id="t1", name="hr")
+        worker_a.add(col)
+        worker_a.commit()
+        drive, store = FakeDrive(), _Store()
+        drive.add_file("a", "a.txt", b"alpha")
+        _ingest(worker_a, drive, store, col, "a", "da")
+        drive.update("a", b"alpha v2")
+        drive.downloads.clear()
+
+        # Worker A is syncing: B's scheduled pass (or manual /sync) backs off untouched
+        lease = acquire_sync_lease(worker_a, "t1")
+        assert lease is not None
+        assert _sync(worker_b, drive, store) == {"status": "busy", "tenant_id": "t1"}
+        assert drive.downloads == [] and store.docs["da"] == "alpha"
+
+        release_sync_lease(worker_a, "t1", lease)
+        assert _sync(worker_b, drive, store)["updated"] == 1
+        assert acquire_sync_lease(worker_a, "t1") is not None  # released after the sync
+
+        # A lease left behind by a crashed worker is taken over once it expires
+        crashed = datetime.utcnow() - timedelta(hours=2)
+        state = worker_a.query(DriveSyncState).filter_by(tenant_id="t1").first()
+        state.running_since = crashed
+        worker_a.commit()
+        assert acquire_sync_lease(worker_b, "t1", lease_s=3600) is not None
+        release_sync_lease(worker_a, "t1", crashed)  # no longer A's lease: no-op
+        assert acquire_sync_lease(worker_a, "t1") is None
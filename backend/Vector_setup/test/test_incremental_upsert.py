@@ -0,0 +1,46 @@
+import asyncio
+
+from benchmarks.fake_embedder import HashEmbeddingService
+from Vector_setup.base.db_setup_management import MultiTenantChromaStoreManager
+
+
+class _CountingEmbedder(HashEmbeddingService):
+    def __init__(self):
+        super().__init__()
+        self.embedded = []
+
+    def embed_batch(self, texts):
+        self.embedded.extend(texts)
+        return super().embed_batch(texts)
+
+
+def _chunks(*texts):
+    return [{"text": t, "metadata": {}} for t in texts]
+
+
+def test_upsert_only_embeds_changed_chunks_and_deletes_stale_ids(tmp_path):
+    embedder = _CountingEmbedder()
+    store = MultiTenantChromaStoreManager(persist_dir=str(tmp_path), embedding_service=embedder)
+
+    async def index(*texts):
+        return await store.upsert_document("t1", "hr", "doc-1", "", table_chunks=_chunks(*texts))
+
+    first = asyncio.run(index("leave policy", "sick days", "parental leave", "remote work"))
+    assert first["chunks_embedded"] == 4 and first["chunks_deleted"] == 0
+
+    # Chunk 1 edited, chunk 3 dropped: one new embedding, one stale id removed; the
+    # untouched chunks only get their chunk_count metadata updated
+    embedder.embedded.clear()
+    second = asyncio.run(index("leave policy", "sick days are paid", "parental leave"))
+    assert embedder.embedded == ["sick days are paid"]
+    assert (second["chunks_upserted"], second["chunks_metadata_updated"], second["chunks_deleted"]) == (1, 2, 1)
+
+    stored = store.get_collection("t1", "hr").get(where={"doc_id": "doc-1"}, include=["documents"])
+    assert sorted(stored["ids"]) == ["doc-1__chunk_0", "doc-1__chunk_1", "doc-1__chunk_2"]
+    assert "sick days are paid" in stored["documents"]
+
+    # Same content again: nothing embedded, nothing written
+    embedder.embedded.clear()
+    third = asyncio.run(index("leave policy", "sick days are paid", "parental leave"))
+    assert embedder.embedded == []
+    assert (third["chunks_unchanged"], third["chunks_upserted"], third["chunks_deleted"]) == (3, 0, 0)
@@ -0,0 +1,97 @@
+import asyncio
+
+from Vector_setup.services.ingestion_pipeline_service import IngestionPipeline
+
+
+class _RecordingStore:
+    """In-memory stand-in exposing the store methods the pipeline drives."""
+
+    def __init__(self):
+        self.rows = {}
+        self.embed_calls = []
+
+    def build_chunk_records(self, tenant_id, collection_name, doc_id, text, metadata=None, table_chunks=None):
+        chunks = [part for part in text.split("|") if part]
+        ids = [f"{doc_id}__chunk_{i}" for i in range(len(chunks))]
+        return ids, chunks, [{"doc_id": doc_id, **(metadata or {})} for _ in chunks]
+
+    def embed_texts(self, texts):
+        self.embed_calls.append(len(texts))
+        if any("bad-embed" in t for t in texts):
+            return []
+        return [[float(len(t))] for t in texts]
+
+    def write_chunks(self, tenant_id, collection_name, ids, documents, embeddings, metadatas):
+        self.rows.update(zip(ids, documents))
+        return len(self.rows)
+
+    def delete_document_chunks(self, tenant_id, collection_name, doc_id, chunk_ids=None):
+        for key in [k for k in self.rows if k.startswith(f"{doc_id}__")]:
+            del self.rows[key]
+
+
+def _extract(filename, source):
+    if filename == "broken.pdf":
+        raise ValueError("corrupt file")
+    return source.decode(), None, None
+
+
+def test_pipeline_batches_across_documents_and_isolates_failures():
+    store = _RecordingStore()
+    pipeline = IngestionPipeline(store, extract_concurrency=3, embed_batch_size=4, queue_size=2, extract_fn=_extract)
+    items = [
+        {"doc_id": f"d{i}", "filename": f"f{i}.txt", "source": b"a|b|c", "metadata": {}}
+        for i in range(5)
+    ]
+    items.append({"doc_id": "bad", "filename": "broken.pdf", "source": b"", "metadata": {}})
+    items.append({"doc_id": "empty", "filename": "e.txt", "source": b"   ", "metadata": {}})
+    progress = []
+
+    result = asyncio.run(pipeline.run("t1", "hr", items, on_progress=progress.append))
+
+    docs = result["documents"]
+    assert all(docs[f"d{i}"] == {"status": "ok", "filename": f"f{i}.txt", "chunks_indexed": 3} for i in range(5))
+    assert docs["bad"]["status"] == "error" and "corrupt" in docs["bad"]["error"]
+    assert docs["empty"]["status"] == "error"
+    assert max(store.embed_calls) == 4 and sum(store.embed_calls) == 15
+    assert len(store.rows) == 15
+    assert len(progress) == 7 and progress[-1]["done"] == 7
+    assert result["stats"]["documents_indexed"] == 5
+
+
+def test_pipeline_drops_partial_vectors_of_failed_documents():
+    store = _RecordingStore()
+    pipeline = IngestionPipeline(store, extract_concurrency=1, embed_batch_size=2, extract_fn=_extract)
+    items = [{"doc_id": "d1", "filename": "f.txt", "source": b"ok|ok|bad-embed", "metadata": {}}]
+
+    result = asyncio.run(pipeline.run("t1", "hr", items))
+
+    assert result["documents"]["d1"]["status"] == "error"
+    assert store.rows == {}
+
+
+def test_pipeline_fetches_sources_and_extracts_in_process_pool():
+    from concurrent.futures import ProcessPoolExecutor
+
+    store = _RecordingStore()
+    sources = {"d0": b"a|b", "d1": b"c", "d2": b"dup"}
+
+    def _fetch(item):
+        if item["doc_id"] == "d2":
+            return None
+        if item["doc_id"] == "d3":
+            raise IOError("download failed")
+        return {**item, "source": sources[item["doc_id"]]}
+
+    items = [{"doc_id": f"d{i}", "filename": f"f{i}.txt", "metadata": {}} for i in range(4)]
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        pipeline = IngestionPipeline(
+            store, extract_concurrency=2, fetch_fn=_fetch, fetch_concurrency=3, extract_executor=pool
+        )
+        result = asyncio.run(pipeline.run("t1", "hr", items))
+
+    docs = result["documents"]
+    assert docs["d0"]["chunks_indexed"] == 2 and docs["d1"]["chunks_indexed"] == 1
+    assert docs["d2"]["status"] == "skipped"
+    assert docs["d3"]["status"] == "error" and "download failed" in docs["d3"]["error"]
+    assert set(store.rows.values()) == {"a", "b", "c"}
@@ -0,0 +1,56 @@
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import LLM_Config.llm_pipeline as pipeline
+from benchmarks.fake_embedder import HashEmbeddingService
+from LLM_Config.intent_classifier import IntentCentroidClassifier, load_examples
+
+
+EMBEDDER = HashEmbeddingService()
+
+
+def _classify(classifier, question):
+    intent, domain, _ = pipeline.infer_intent_rule_based(question)
+    return classifier.classify(EMBEDDER.embed_batch([question])[0], intent, domain)
+
+
+def test_centroids_override_keyword_misfires_and_rules_break_ties():
+    classifier = IntentCentroidClassifier(load_examples(), EMBEDDER.embed_batch)
+
+    # "hi " / "great" made the rules answer these as CHITCHAT
+    misfire = _classify(classifier, "Hi, what was the total revenue in 2023?")
+    assert (misfire["intent"], misfire["domain"], misfire["intent_source"]) == ("NUMERIC_ANALYSIS", "FINANCE", "embedding")
+    assert _classify(classifier, "This is great but what was the average expense in 2022?")["intent"] == "NUMERIC_ANALYSIS"
+
+    # A plain greeting stays chitchat
+    assert _classify(classifier, "hello")["intent"] == "CHITCHAT"
+
+    # Query vector equidistant from everything: the rule label wins
+    tie = classifier.classify([0.0] * EMBEDDER.dim, "PROCEDURE", "HR")
+    assert (tie["intent"], tie["domain"], tie["intent_source"]) == ("PROCEDURE", "HR", "rules")
+
+
+def test_classification_costs_well_under_a_millisecond():
+    classifier = IntentCentroidClassifier(load_examples(), EMBEDDER.embed_batch)
+    vec = EMBEDDER.embed_batch(["How do I request annual leave?"])[0]
+
+    started = time.perf_counter()
+    for _ in range(200):
+        classifier.classify(vec, "PROCEDURE", "HR")
+    assert (time.perf_counter() - started) / 200 < 0.001
+
+
+def test_pipeline_reuses_the_query_embedding_for_retrieval(fake_pipeline):
+    fake_pipeline.embedder = EMBEDDER
+    fake_pipeline.documents = [("Revenue 2023: $1.2M", "Finance")]
+    fake_pipeline.answer_parts = ["Revenue was $1.2M."]
+
+    holder = fake_pipeline.ask("Hi, what was the total revenue in 2023?")
+
+    # Not short-circuited as chitchat; retrieval got the precomputed embedding
+    assert holder["answer"] == "Revenue was $1.2M."
+    retrieval_calls = fake_pipeline.retrieval_calls
+    assert retrieval_calls and retrieval_calls[0]["query_embedding"] is not None
+    assert "intent_ms" in holder["metrics"]
@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+from sqlmodel import Session, select
+
+from LLM_Config.llm_cache import LLMResponseCache, is_cacheable
+from Vector_setup.services.document_registry_service import record_indexed_document
+from Vector_setup.user.db import Collection
+
+
+PARAMS = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "rank these"}], "temperature": 0.0}
+HR = (("hr", 0),)
+
+
+def test_hits_are_scoped_per_tenant_and_retired_on_collection_change():
+    cache = LLMResponseCache(ttl_s=60, max_entries=10)
+    calls = []
+
+    async def call():
+        calls.append(1)
+        return f"response-{len(calls)}"
+
+    async def run():
+        first = await cache.get_or_call("tenant-a", HR, PARAMS, call)
+        again = await cache.get_or_call("tenant-a", HR, dict(PARAMS), call)
+        other_tenant = await cache.get_or_call("tenant-b", HR, PARAMS, call)
+        other_params = await cache.get_or_call("tenant-a", HR, {**PARAMS, "max_tokens": 300}, call)
+        after_ingest = await cache.get_or_call("tenant-a", (("hr", 1),), PARAMS, call)
+        return first, again, other_tenant, other_params, after_ingest
+
+    first, again, other_tenant, other_params, after_ingest = asyncio.run(run())
+
+    assert first == again == "response-1"
+    assert other_tenant == "response-2" and other_params == "response-3"
+    assert after_ingest == "response-4"
+    assert cache.stats("tenant-a") == {"hits": 1, "misses": 3, "entries": 3, "hit_rate": 0.25}
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 4
+
+
+def test_ingest_written_through_the_db_retires_entries_in_other_workers(engine, fake_pipeline):
+    cache = LLMResponseCache(ttl_s=60, max_entries=10)
+    calls = []
+
+    async def call():
+        calls.append(1)
+        return f"response-{len(calls)}"
+
+    def generations(worker):
+        # What query_stream_routes hands the pipeline: the collections' persisted generations
+        rows = worker.exec(select(Collection).where(Collection.tenant_id == "t1")).all()
+        content_generations = {c.name: c.content_generation or 0 for c in rows}
+        fake_pipeline.ask("How many days of annual leave do I get?", collection_names=["hr"],
+                          content_generations=content_generations)
+        return fake_pipeline.llm_calls[-1]["cache_generations"]
+
+    with Session(engine) as worker_a, Session(engine) as worker_b:
+        col = Collection(id="c1", tenant_id="t1", name="hr")
+        worker_a.add(col)
+        worker_a.commit()
+        fake_pipeline.documents = [(f"Leave rule {i}: 20 days.", "HR Policy") for i in range(8)]
+
+        before = generations(worker_b)
+        assert asyncio.run(cache.get_or_call("t1", before, PARAMS, call)) == "response-1"
+        assert asyncio.run(cache.get_or_call("t1", generations(worker_b), PARAMS, call)) == "response-1"
+
+        # Worker A indexes a document; worker B's cache has never heard of it
+        record_indexed_document(worker_a, col, "d1", "upload", "leave.pdf", chunk_count=1, size_bytes=10)
+        after = generations(worker_b)
+        assert (before, after) == ((("hr", 0),), (("hr", 1),))
+        assert asyncio.run(cache.get_or_call("t1", after, PARAMS, call)) == "response-2"
+    assert cache.stats("t1")["misses"] == 2
+
+
+def test_concurrent_identical_calls_share_one_request_and_bounds_apply():
+    cache = LLMResponseCache(ttl_s=0.05, max_entries=2)
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    async def run():
+        results = await asyncio.gather(*(cache.get_or_call("t", HR, PARAMS, call) for _ in range(5)))
+        for n in range(3):
+            await cache.get_or_call("t", HR, {**PARAMS, "seed": n}, call)
+        return results
+
+    assert asyncio.run(run()) == ["ok"] * 5
+    assert len(calls) == 4
+    stats = cache.stats()
+    assert stats["coalesced"] == 4 and stats["evictions"] == 2 and stats["entries"] == 2
+
+    time.sleep(0.06)
+    asyncio.run(cache.get_or_call("t", HR, {**PARAMS, "seed": 2}, call))
+    assert cache.stats()["expired"] == 1
+
+
+def test_cancelled_first_caller_does_not_cancel_shared_call():
+    cache = LLMResponseCache(ttl_s=60, max_entries=10)
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "shared"
+
+    async def run():
+        first = asyncio.create_task(cache.get_or_call("t", HR, PARAMS, call))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(cache.get_or_call("t", HR, PARAMS, call))
+        await asyncio.sleep(0)
+        first.cancel()
+        result = await second
+        return first.cancelled(), result, await cache.get_or_call("t", HR, PARAMS, call)
+
+    assert asyncio.run(run()) == (True, "shared", "shared")
+    assert len(calls) == 1
+
+
+def test_only_deterministic_calls_are_cacheable():
+    assert is_cacheable(PARAMS)
+    assert not is_cacheable({**PARAMS, "temperature": 0.3})
+    assert not is_cacheable({**PARAMS, "stream": True})
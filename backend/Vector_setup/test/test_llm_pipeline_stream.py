@@ -0,0 +1,11 @@
+def test_tokens_are_forwarded_as_they_arrive(fake_pipeline):
+    fake_pipeline.answer_parts = ["Employees ", "get ", "**20 days**."]
+
+    holder = fake_pipeline.ask("How many days of annual leave do I get?")
+    events = fake_pipeline.events
+
+    # Text reaches the client before the next token is generated
+    assert events[:3] == [("llm", "Employees "), ("client", "Employees"), ("llm", "get ")]
+    assert "".join(p for kind, p in events if kind == "client") == "Employees get **20 days**."
+    assert holder["answer"] == "Employees get **20 days**."
+    assert holder["metrics"]["stream_chunks"] == 3 and "ttft_ms" in holder["metrics"]
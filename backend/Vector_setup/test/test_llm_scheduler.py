@@ -0,0 +1,105 @@
+import asyncio
+
+from LLM_Config.llm_scheduler import LLMScheduler, ScheduledStream
+
+
+async def _queue(scheduler, requests):
+    """
+    Hold the only slot, queue `requests` (tenant, model, priority) in order,
+    then free it; returns the order in which the queued calls were served.
+    """
+    served = []
+    blocker = await scheduler.acquire("blocker", "m", "answer")
+
+    async def call(name, tenant, model, priority):
+        async with scheduler.slot(tenant, model, priority):
+            served.append(name)
+            await asyncio.sleep(0)
+
+    tasks = [asyncio.create_task(call(*r)) for r in requests]
+    await asyncio.sleep(0)
+    blocker.release()
+    await asyncio.gather(*tasks)
+    return served
+
+
+def test_priority_classes_then_weighted_fair_share_between_tenants():
+    scheduler = LLMScheduler(max_concurrency=1, model_limits={}, tenant_weights={"gold": 2})
+
+    served = asyncio.run(_queue(scheduler, [
+        ("chart", "t1", "m", "background"),
+        ("rerank", "t1", "m", "rerank"),
+        ("answer", "t1", "m", "answer"),
+    ]))
+    assert served == ["answer", "rerank", "chart"]
+
+    # A burst from one tenant does not push a later tenant to the back of the queue
+    burst = [(f"a{i}", "bulk", "m", "rerank") for i in range(4)] + [(f"b{i}", "other", "m", "rerank") for i in range(2)]
+    served = asyncio.run(_queue(LLMScheduler(max_concurrency=1, model_limits={}), burst))
+    assert served == ["a0", "b0", "a1", "b1", "a2", "a3"]
+
+    # Weight 2 gets two calls for every one of a weight-1 tenant
+    mixed = [(f"g{i}", "gold", "m", "rerank") for i in range(4)] + [(f"s{i}", "std", "m", "rerank") for i in range(2)]
+    served = asyncio.run(_queue(scheduler, mixed))
+    assert served.index("s1") > served.index("g2")
+    assert served[:3].count("s0") == 1
+
+    stats = scheduler.stats()
+    assert stats["in_flight"] == 0 and stats["waiting"]["rerank"] == 0
+    assert stats["priority"]["background"]["queued_calls"] == 1
+    assert scheduler.stats("gold")["calls"] == 4
+
+
+def test_model_limits_cancellation_and_streams_release_slots():
+    scheduler = LLMScheduler(max_concurrency=3, model_limits={"small": 1})
+
+    async def run():
+        first = await scheduler.acquire("t", "small", "background")
+        blocked = asyncio.create_task(scheduler.acquire("t", "small", "background"))
+        await asyncio.sleep(0)
+        # Another model still gets a slot while "small" is at its limit
+        other = await asyncio.wait_for(scheduler.acquire("t", "large", "background"), 0.1)
+        assert not blocked.done()
+
+        blocked.cancel()
+        await asyncio.gather(blocked, return_exceptions=True)
+        assert scheduler.stats()["waiting"]["background"] == 0
+        first.release()
+        other.release()
+
+        async def chunks():
+            yield "a"
+            yield "b"
+
+        stream = ScheduledStream(chunks(), await scheduler.acquire("t", "small", "answer"))
+        assert scheduler.stats()["in_flight"] == 1
+        assert [c async for c in stream] == ["a", "b"]
+        return scheduler.stats()["in_flight"]
+
+    assert asyncio.run(run()) == 0
+
+
+def test_closing_the_pipeline_early_frees_the_answer_slot(fake_pipeline, monkeypatch):
+    scheduler = LLMScheduler(max_concurrency=2, model_limits={})
+    fake_pipeline.answer_parts = ["Employees ", "get ", "20 days."]
+    fake_stream_llm = fake_pipeline.pipeline.stream_llm
+    streams = []  # kept referenced, so only an explicit close can free the slot
+
+    async def scheduled_stream_llm(**kwargs):
+        slot = await scheduler.acquire(kwargs.get("tenant_id"), kwargs.get("model"), "answer")
+        streams.append(await fake_stream_llm(**kwargs))
+        return ScheduledStream(streams[-1], slot)
+
+    monkeypatch.setattr(fake_pipeline.pipeline, "stream_llm", scheduled_stream_llm)
+
+    async def run():
+        answer = fake_pipeline.pipeline.llm_pipeline_stream(
+            store=fake_pipeline.store, tenant_id="t1", question="How many days of annual leave do I get?",
+        )
+        first = await answer.__anext__()
+        in_flight = scheduler.stats()["in_flight"]
+        await answer.aclose()  # client went away
+        return first, in_flight, scheduler.stats()["in_flight"], streams[0].ag_frame is None
+
+    # Slot freed and the underlying response stream closed right away
+    assert asyncio.run(run()) == ("Employees", 1, 0, True)
@@ -0,0 +1,37 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from benchmarks import llm_stub_server
+
+
+def _client(**overrides) -> TestClient:
+    cfg = llm_stub_server.config
+    cfg.ttft_ms, cfg.tokens_per_s, cfg.failure_rate, cfg.abort_rate = 0, 0, 0, 0
+    for key, value in overrides.items():
+        setattr(cfg, key, value)
+    return TestClient(llm_stub_server.app)
+
+
+def test_stream_reassembles_to_answer_and_ends_with_done():
+    client = _client()
+    body = {"model": "gpt-4.1-mini", "stream": True, "messages": [{"role": "user", "content": "q"}]}
+
+    with client.stream("POST", "/v1/chat/completions", json=body) as resp:
+        lines = [l for l in resp.iter_lines() if l.startswith("data: ")]
+
+    assert lines[-1] == "data: [DONE]"
+    chunks = [json.loads(l[6:]) for l in lines[:-1]]
+    text = "".join(c["choices"][0]["delta"].get("content") or "" for c in chunks)
+    assert text.startswith("## Answer") and "| Q1 | 1,200 |" in text
+    assert chunks[-1]["choices"][0]["finish_reason"] == "stop"
+
+
+def test_rerank_prompt_and_failure_injection():
+    client = _client()
+    rerank = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "Return a JSON array of indices"}]}
+    assert client.post("/v1/chat/completions", json=rerank).json()["choices"][0]["message"]["content"] == "[0, 1, 2, 3, 4]"
+
+    client = _client(failure_rate=1.0, failure_status=429)
+    assert client.post("/v1/chat/completions", json=rerank).status_code == 429
+    llm_stub_server.config.failure_rate = 0
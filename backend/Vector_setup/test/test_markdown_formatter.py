@@ -0,0 +1,77 @@
+import random
+
+from LLM_Config.markdown_formatter import StreamingMarkdownFormatter, format_markdown
+
+
+RAW = """Annual leave is **20 days** per year.   
+#Leave types
+**Key points:**
+* Sick leave: 10 days
+•Maternity leave: 16 weeks
+   + carried over
+1) Submit the form
+2) Wait for approval
+
+
+
+|Type|Days|Cost|
+|Annual|20|$ 1250000|
+| Sick | 10 | USD 98000.5 |
+Total spend was 1234567.891 across 2024 for employee 1234567.
+```
+x = 1234567.891
+```
+Done."""
+
+EXPECTED = """Annual leave is **20 days** per year.
+
+## Leave types
+
+### Key points
+
+- Sick leave: 10 days
+- Maternity leave: 16 weeks
+  - carried over
+1. Submit the form
+2. Wait for approval
+
+| Type | Days | Cost |
+| --- | --- | --- |
+| Annual | 20 | $1,250,000 |
+| Sick | 10 | USD 98,000.5 |
+
+Total spend was 1,234,567.891 across 2024 for employee 1234567.
+
+```
+x = 1234567.891
+```
+
+Done."""
+
+
+def test_format_markdown_normalizes_blocks_and_numbers():
+    assert format_markdown(RAW) == EXPECTED
+    assert format_markdown(EXPECTED) == EXPECTED  # idempotent
+    # Zero-padded numbers are identifiers, not amounts
+    assert format_markdown("ID 00012345.5 costs $0012.50") == "ID 00012345.5 costs $0012.50"
+
+
+def test_streaming_output_matches_whole_text_for_any_split():
+    rng = random.Random(7)
+    for _ in range(200):
+        formatter = StreamingMarkdownFormatter()
+        out, pos = [], 0
+        while pos < len(RAW):
+            step = rng.randint(1, 12)
+            out.append(formatter.feed(RAW[pos:pos + step]))
+            pos += step
+        out.append(formatter.flush())
+        assert "".join(out).strip() == EXPECTED
+
+
+def test_paragraph_text_is_released_before_the_line_ends():
+    formatter = StreamingMarkdownFormatter()
+    assert formatter.feed("Employees get ") == "Employees get"
+    assert formatter.feed("$ 12") == ""  # amount may continue
+    assert formatter.feed("50000 per year") == " $1,250,000 per"
+    assert formatter.flush() == " year"
@@ -0,0 +1,48 @@
+import asyncio
+
+from Vector_setup.services.post_answer_service import run_post_answer_stages
+
+
+def _stage(delay, result=None, error=None):
+    async def run():
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return result
+    return run
+
+
+def _collect(stages, optional, deadline_s):
+    async def consume():
+        return [e async for e in run_post_answer_stages(stages, optional=optional, deadline_s=deadline_s)]
+    return asyncio.run(consume())
+
+
+def test_stages_run_concurrently_and_report_in_completion_order():
+    events = _collect(
+        {
+            "save": _stage(0.15, "saved"),
+            "charts": _stage(0.05, ["chart"]),
+            "audit": _stage(0.1, error=RuntimeError("db down")),
+        },
+        optional={"charts"},
+        deadline_s=5,
+    )
+
+    assert [(e["stage"], e["status"]) for e in events] == [
+        ("charts", "ok"), ("audit", "failed"), ("save", "ok"),
+    ]
+    assert events[0]["result"] == ["chart"]
+    # Concurrent: total is the slowest stage, not the sum
+    assert events[-1]["ms"] < 250
+
+
+def test_deadline_drops_optional_stages_but_waits_for_required_ones():
+    events = _collect(
+        {"save": _stage(0.2, "saved"), "suggestions": _stage(5, ["q?"])},
+        optional={"suggestions"},
+        deadline_s=0.05,
+    )
+
+    assert [(e["stage"], e["status"]) for e in events] == [("suggestions", "dropped"), ("save", "ok")]
+    assert events[0]["ms"] < 150
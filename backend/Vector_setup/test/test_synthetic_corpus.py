@@ -0,0 +1,13 @@
+from benchmarks.synthetic_corpus import generate_corpus
+from Vector_setup.services.extraction_documents_service import extract_text_from_upload
+
+
+def test_corpus_is_deterministic_and_extractable(tmp_path):
+    first = generate_corpus(str(tmp_path / "a"), docs_per_kind=1, pages=1, rows=10, seed=7)
+    second = generate_corpus(str(tmp_path / "b"), docs_per_kind=1, pages=1, rows=10, seed=7)
+
+    assert [p.rsplit(".", 1)[-1] for p in first] == ["pdf", "docx", "xlsx", "csv"]
+    for a, b in zip(first, second):
+        text_a = extract_text_from_upload(a, a)
+        assert text_a.strip()
+        assert text_a == extract_text_from_upload(b, b)
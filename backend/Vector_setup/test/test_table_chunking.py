@@ -0,0 +1,59 @@
+import pandas as pd
+
+from Vector_setup.services.table_chunking_service import (
+    chunk_table_rows,
+    extract_table_chunks_from_upload,
+)
+
+
+def _finance_df() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Year": [2022, 2022, 2022, 2023, 2023],
+            "Month": ["Jan", "Feb", "Mar", "Jan", "Feb"],
+            "Revenue": [100, 200, 300, 400, 500],
+        }
+    )
+
+
+def test_header_and_sheet_repeated_in_every_chunk():
+    chunks = chunk_table_rows("Sales", _finance_df(), rows_per_chunk=2)
+
+    assert len(chunks) == 3
+    for c in chunks:
+        assert c["text"].startswith("Sheet: Sales\nColumns: Year | Month | Revenue\n")
+        assert c["metadata"]["sheet"] == "Sales"
+
+
+def test_year_change_starts_new_chunk_with_year_metadata():
+    chunks = chunk_table_rows("Sales", _finance_df(), rows_per_chunk=10)
+
+    assert [c["metadata"]["year"] for c in chunks] == ["2022", "2023"]
+    assert (chunks[0]["metadata"]["row_start"], chunks[0]["metadata"]["row_end"]) == (1, 3)
+    assert (chunks[1]["metadata"]["row_start"], chunks[1]["metadata"]["row_end"]) == (4, 5)
+    assert "month" not in chunks[0]["metadata"]
+
+
+def test_month_recorded_when_uniform_and_from_dates():
+    df = pd.DataFrame(
+        {
+            "Date": pd.to_datetime(["2024-03-01", "2024-03-15"]),
+            "Amount": [1.0, 2.5],
+        }
+    )
+    [chunk] = chunk_table_rows("Ledger", df)
+
+    assert chunk["metadata"]["year"] == "2024"
+    assert chunk["metadata"]["month"] == 3
+    assert "Date: 2024-03-01  |  Amount: 1" in chunk["text"]
+
+
+def test_csv_upload_is_chunked_and_non_tabular_is_skipped():
+    raw = b"year,department,cost\n2023,HR,10\n2023,IT,20\n"
+    chunks = extract_table_chunks_from_upload("budget.csv", raw)
+
+    assert chunks is not None and len(chunks) == 1
+    assert chunks[0]["metadata"]["sheet"] == "budget"
+    assert chunks[0]["metadata"]["year"] == "2023"
+
+    assert extract_table_chunks_from_upload("policy.pdf", b"%PDF") is None
@@ -0,0 +1,46 @@
+import pandas as pd
+
+from Vector_setup.base.tabular_store_management import TenantTabularStore
+
+
+def _load(tmp_path) -> TenantTabularStore:
+    store = TenantTabularStore(str(tmp_path))
+    df = pd.DataFrame(
+        {
+            "Date": pd.to_datetime(["2023-01-01", "2023-02-01", "2024-01-01"]),
+            "Department": ["HR", "IT", "HR"],
+            "Revenue": ["1,000", "2,000", "3,000"],
+        }
+    )
+    store.load_tables("t1", "finance", "doc-1", {"Sheet1": df}, title="fin.xlsx")
+    return store
+
+
+def test_exact_totals_with_year_filter_and_breakdowns(tmp_path):
+    store = _load(tmp_path)
+
+    ctx = store.build_numeric_context(
+        "t1", ["finance"], "Total revenue in 2023 by department", by_period=True
+    )
+
+    assert ctx is not None and ctx["sources"] == ["fin.xlsx"]
+    assert "| Revenue | 3,000 | 1,500 | 1,000 | 2,000 |" in ctx["text"]
+    assert "| 2023 | 2 | 2,000 |" in ctx["text"]
+    assert "| IT | 2,000 |" in ctx["text"]
+
+
+def test_acl_scoping_and_reload_replaces_doc_tables(tmp_path):
+    store = _load(tmp_path)
+
+    assert store.build_numeric_context("t1", ["hr"], "total revenue") is None
+
+    store.load_tables(
+        "t1", "finance", "doc-1",
+        {"Sheet1": pd.DataFrame({"Revenue": [5]})},
+        title="fin.xlsx",
+    )
+    assert len(store.list_tables("t1")) == 1
+    assert "| Revenue | 5 |" in store.build_numeric_context("t1", None, "revenue")["text"]
+
+    assert store.delete_document("t1", "doc-1") == 1
+    assert store.list_tables("t1") == []
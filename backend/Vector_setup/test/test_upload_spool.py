@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+from Vector_setup.services.upload_spool_service import SpooledUpload, UploadTooLargeError
+from Vector_setup.services.extraction_documents_service import extract_text_from_upload
+
+
+def test_small_upload_stays_in_memory():
+    with SpooledUpload(max_bytes=100, max_memory_bytes=50) as spooled:
+        spooled.write(b"hello ")
+        spooled.write(b"world")
+
+        assert not spooled.on_disk
+        assert spooled.source() == b"hello world"
+        assert extract_text_from_upload("a.txt", spooled.source()) == "hello world"
+
+
+def test_large_upload_rolls_over_to_disk_and_is_removed_on_close():
+    spooled = SpooledUpload(max_bytes=1000, max_memory_bytes=10, suffix=".csv")
+    spooled.write(b"a,b\n")
+    spooled.write(b"1,2\n3,4\n")
+
+    path = spooled.source()
+    assert spooled.on_disk and isinstance(path, str) and path.endswith(".csv")
+    assert extract_text_from_upload("data.csv", path) == "a | b\n1 | 2\n3 | 4"
+
+    spooled.close()
+    assert not os.path.exists(path)
+
+
+def test_size_limit_enforced_while_writing():
+    with SpooledUpload(max_bytes=8, max_memory_bytes=4) as spooled:
+        spooled.write(b"12345")
+        with pytest.raises(UploadTooLargeError):
+            spooled.write(b"6789")
+        assert spooled.size == 5
+
+
+def _zip_bytes(members) -> bytes:
+    import io
+    import zipfile
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in members:
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+def test_zip_expansion_skips_hidden_and_enforces_total_size():
+    from Vector_setup.services.upload_spool_service import expand_zip_upload
+
+    archive = _zip_bytes([
+        ("docs/a.txt", b"alpha"),
+        ("__MACOSX/docs/._a.txt", b"junk"),
+        ("docs/.DS_Store", b"junk"),
+        ("b.csv", b"x,y\n1,2\n"),
+    ])
+    with SpooledUpload() as spooled:
+        spooled.write(archive)
+        members = expand_zip_upload(spooled)
+        assert [name for name, _ in members] == ["a.txt", "b.csv"]
+        assert members[0][1].source() == b"alpha"
+        for _, m in members:
+            m.close()
+
+        with pytest.raises(UploadTooLargeError):
+            expand_zip_upload(spooled, max_total_bytes=8)
@@ -46,6 +46,8 @@ class Collection(SQLModel, table=True):
     
     created_at: datetime = Field(default_factory=datetime.utcnow)
     doc_count: int = Field(default=0)
+    # Bumped on every indexed / deleted document; answer-cache entries record it
+    content_generation: int = Field(default=0)
     
      
 class DBUser(SQLModel, table=True):
@@ -114,10 +116,92 @@ class IngestedDriveFile(SQLModel, table=True):
     drive_file_id: str = Field(index=True)
     filename: str
     mime_type: str
-    # Optional: has/versioning fields later
-    # content_has: Optional[str] = None
+    # What the file was indexed as, and the Drive version it was indexed from (for sync)
+    doc_id: Optional[str] = Field(default=None, index=True)
+    collection_name: Optional[str] = None
+    modified_time: Optional[str] = None
+    md5_checksum: Optional[str] = None  # binary files only; Google-native files have none
     last_ingested_at: datetime = Field(default_factory=datetime.utcnow)        
 
+
+class DriveSyncState(SQLModel, table=True):
+    """
+    Per-tenant Drive changes cursor (changes.list page token) for incremental sync.
+    `running_since` is the lease of the sync in progress, shared by every worker process.
+    """
+    __tablename__ = "drive_sync_state"
+
+    id: int | None = Field(default=None, primary_key=True)
+    tenant_id: str = Field(index=True)
+    page_token: Optional[str] = None
+    last_synced_at: Optional[datetime] = None
+    last_status: Optional[str] = None
+    running_since: Optional[datetime] = None
+
+    __table_args__ = (
+        UniqueConstraint("tenant_id", name="uq_drive_sync_tenant"),
+    )
+
+class Document(SQLModel, table=True):
+    """
+    SQL mirror of every indexed document, so listing, counting and deleting
+    don't need to scan Chroma. Chunk ids are `{doc_id}__chunk_{i}` for i < chunk_count.
+    """
+    __tablename__ = "documents"
+
+    doc_id: str = Field(primary_key=True)
+    tenant_id: str = Field(index=True)
+    collection_id: str = Field(index=True)
+    collection_name: str = Field(index=True)
+    source: str  # "upload", "bulk_upload", "google_drive"
+    filename: str
+    title: Optional[str] = None
+    content_type: Optional[str] = None
+    content_hash: Optional[str] = Field(default=None, index=True)
+    drive_file_id: Optional[str] = Field(default=None, index=True)
+    chunk_count: int = Field(default=0)
+    size_bytes: int = Field(default=0)
+    ingested_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class DocumentContentHash(SQLModel, table=True):
+    """
+    Per-tenant registry of indexed document contents (sha256 of the file bytes).
+    A re-upload with the same hash into the same collection is short-circuited
+    and linked to `doc_id` through DocumentAlias instead of being re-embedded.
+    """
+    __tablename__ = "document_content_hashes"
+
+    id: int | None = Field(default=None, primary_key=True)
+    tenant_id: str = Field(index=True)
+    collection_name: str = Field(index=True)
+    content_hash: str = Field(index=True)
+    doc_id: str = Field(index=True)
+    filename: str
+    size_bytes: int = Field(default=0)
+    chunk_count: int = Field(default=0)
+    duplicate_count: int = Field(default=0)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    last_seen_at: datetime = Field(default_factory=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "collection_name", "content_hash", name="uq_content_hash_collection"),
+    )
+
+
+class DocumentAlias(SQLModel, table=True):
+    __tablename__ = "document_aliases"
+
+    id: int | None = Field(default=None, primary_key=True)
+    tenant_id: str = Field(index=True)
+    doc_id: str = Field(index=True)  # canonical doc the duplicate points to
+    content_hash: str = Field(index=True)
+    filename: str
+    source: str  # "upload", "bulk_upload", "google_drive"
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 class FirstLoginToken(SQLModel, table=True):
     __tablename__ = "first_login_tokens"
     id: str = Field(primary_key=True, index=True)
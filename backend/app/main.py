@@ -1,6 +1,8 @@
 import os
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from sqlmodel import Session, select, SQLModel
 from sqlalchemy import text
 from dotenv import load_dotenv
@@ -10,7 +12,7 @@ from Vector_setup.API.query_routes import router as query_router
 from Vector_setup.API.auth_router import router as user_router
 from Vector_setup.API.query_stream_routes import router as query_stream_router
 from Vector_setup.API.company_users_routes import router as company_user_router
-from Vector_setup.API.google_drive_router import router as google_drive_router
+from Vector_setup.API.google_drive_router import router as google_drive_router, drive_sync_loop
 from Vector_setup.API.contact_router import router as contact_router
 from Vector_setup.API.organizations_router import router as organization_router
 from Vector_setup.API.collections_router import router as collection_router
@@ -19,6 +21,8 @@ from Vector_setup.API.collections_router import router as collection_router
 from Vector_setup.user.db import init_db, DBUser, engine
 from Vector_setup.user.password import get_password_hash
 from Vector_setup.base.db_setup_management import MultiTenantChromaStoreManager
+from Vector_setup.services.upload_spool_service import MAX_UPLOAD_BYTES, MAX_BULK_UPLOAD_BYTES
+from Vector_setup.services.google_drive_sync_service import DRIVE_SYNC_INTERVAL_S
 
 
 
@@ -47,6 +51,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- Upload size limit ---
+# Reject oversize bodies from Content-Length before the multipart form is parsed.
+# Small allowance on top of MAX_UPLOAD_BYTES for multipart boundaries and form fields.
+MAX_REQUEST_BODY_BYTES = MAX_UPLOAD_BYTES + 1024 * 1024
+MAX_BULK_REQUEST_BODY_BYTES = MAX_BULK_UPLOAD_BYTES + 1024 * 1024
+BULK_UPLOAD_PATH = "/api/documents/upload/bulk"
+
+
+@app.middleware("http")
+async def reject_oversize_requests(request: Request, call_next):
+    content_length = request.headers.get("content-length")
+    if request.url.path == BULK_UPLOAD_PATH:
+        limit, max_bytes = MAX_BULK_REQUEST_BODY_BYTES, MAX_BULK_UPLOAD_BYTES
+    else:
+        limit, max_bytes = MAX_REQUEST_BODY_BYTES, MAX_UPLOAD_BYTES
+    if content_length and content_length.isdigit() and int(content_length) > limit:
+        return JSONResponse(
+            status_code=413,
+            content={
+                "detail": f"Request body too large. Maximum allowed size is {max_bytes // (1024 * 1024)} MB."
+            },
+        )
+    return await call_next(request)
+
+
 # --- Routers ---
 app.include_router(ingest_router, prefix="/api", tags=["ingest"])
 app.include_router(query_router, prefix="/api", tags=["query"])
@@ -145,6 +174,10 @@ def add_to_user_schema() -> None:
             conn.execute(
                 text("ALTER TABLE collection ADD COLUMN organization_id INTEGER;")
             )    
+        if "content_generation" not in cols:
+            conn.execute(
+                text("ALTER TABLE collection ADD COLUMN content_generation INTEGER NOT NULL DEFAULT 0;")
+            )
 
         # ✅ always commit after all possible ALTERs
         conn.commit()      
@@ -182,3 +215,31 @@ def ensure_chat_messages_schema() -> None:
         if "doc_id" not in cols:
             conn.execute(text("ALTER TABLE chat_messages ADD COLUMN doc_id TEXT;"))
             conn.commit()
+
+
+@app.on_event("startup")
+def ensure_ingested_drive_files_schema() -> None:
+    with engine.connect() as conn:
+        res = conn.execute(text("PRAGMA table_info(ingested_drive_files);"))
+        cols = [row[1] for row in res.fetchall()]
+        for col in ("doc_id", "collection_name", "modified_time", "md5_checksum"):
+            if col not in cols:
+                conn.execute(text(f"ALTER TABLE ingested_drive_files ADD COLUMN {col} TEXT;"))
+        conn.commit()
+
+
+@app.on_event("startup")
+def ensure_drive_sync_state_schema() -> None:
+    with engine.connect() as conn:
+        res = conn.execute(text("PRAGMA table_info(drive_sync_state);"))
+        cols = [row[1] for row in res.fetchall()]
+        if "running_since" not in cols:
+            conn.execute(text("ALTER TABLE drive_sync_state ADD COLUMN running_since DATETIME;"))
+            conn.commit()
+
+
+# --- Scheduled Google Drive sync ---
+@app.on_event("startup")
+async def start_drive_sync_scheduler() -> None:
+    if DRIVE_SYNC_INTERVAL_S > 0:
+        app.state.drive_sync_task = asyncio.create_task(drive_sync_loop(DRIVE_SYNC_INTERVAL_S))
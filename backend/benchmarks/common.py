@@ -0,0 +1,61 @@
+import json
+import platform
+import resource
+import subprocess
+import sys
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return round(peak / (1024 * 1024), 1)
+    return round(peak / 1024, 1)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def percentiles_ms(samples_s) -> dict:
+    if not len(samples_s):
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None}
+    arr = np.asarray(samples_s, dtype=float) * 1000.0
+    return {
+        "p50_ms": round(float(np.percentile(arr, 50)), 3),
+        "p95_ms": round(float(np.percentile(arr, 95)), 3),
+        "p99_ms": round(float(np.percentile(arr, 99)), 3),
+        "mean_ms": round(float(arr.mean()), 3),
+    }
+
+
+def build_report(benchmark: str, config: dict, results) -> dict:
+    return {
+        "benchmark": benchmark,
+        "git_commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "results": results,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def write_report(report: dict, output: Optional[str]) -> None:
+    """JSON to `output` (one file per run, easy to diff across commits) or stdout."""
+    text = json.dumps(report, indent=2, default=str)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
@@ -0,0 +1,38 @@
+import hashlib
+from typing import List
+
+import numpy as np
+
+
+class HashEmbeddingService:
+    """
+    Deterministic stand-in for EmbeddingService (same `embed_batch` interface).
+
+    Each token is hashed into a fixed random direction and a text's vector is the
+    normalized sum of its token directions, so texts sharing words are close in
+    cosine space. Needs no model download and costs ~microseconds per text, which
+    keeps benchmark numbers about the storage / retrieval code, not the encoder.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.model_name = f"hash-{dim}"
+        self.dim = dim
+        self._cache: dict = {}
+
+    def _token_vector(self, token: str) -> np.ndarray:
+        vec = self._cache.get(token)
+        if vec is None:
+            seed = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vec = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+            self._cache[token] = vec
+        return vec
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for token in text.lower().split():
+                out[i] += self._token_vector(token)
+            norm = np.linalg.norm(out[i])
+            if norm > 0:
+                out[i] /= norm
+        return out.tolist()
@@ -0,0 +1,181 @@
+"""
+Ingestion throughput benchmark.
+
+Generates a deterministic synthetic corpus (PDF / DOCX / XLSX / CSV), ingests it
+into a throwaway Chroma directory and reports per-stage time, docs/s, chunks/s
+and peak RSS as JSON.
+
+    cd backend
+    python -m benchmarks.ingest_benchmark --docs-per-kind 20 --output ingest.json
+    python -m benchmarks.ingest_benchmark --mode pipeline --embedder bge-small
+
+Modes:
+- sequential: extract_text_from_upload + MultiTenantChromaStoreManager.add_document
+  per file, with the chunk / embed / write stages timed inside add_document.
+- pipeline: the staged IngestionPipeline used by bulk upload.
+"""
+import argparse
+import asyncio
+import functools
+import os
+import tempfile
+import time
+from collections import defaultdict
+
+from benchmarks.common import build_report, write_report
+from benchmarks.fake_embedder import HashEmbeddingService
+from benchmarks.synthetic_corpus import KINDS, generate_corpus
+from Vector_setup.base.db_setup_management import MultiTenantChromaStoreManager
+from Vector_setup.services.extraction_documents_service import extract_text_from_upload
+from Vector_setup.services.ingestion_pipeline_service import IngestionPipeline
+
+TENANT_ID = "benchtenant"
+COLLECTION_NAME = "benchcollection"
+
+
+def _make_store(chroma_dir: str, embedder: str) -> MultiTenantChromaStoreManager:
+    if embedder == "fake":
+        return MultiTenantChromaStoreManager(chroma_dir, embedding_service=HashEmbeddingService())
+    return MultiTenantChromaStoreManager(chroma_dir)
+
+
+def _instrument(store: MultiTenantChromaStoreManager, stage_time: dict) -> None:
+    """Time the stages add_document goes through by wrapping them on the instance."""
+
+    def timed_sync(stage, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                stage_time[stage] += time.perf_counter() - t0
+        return wrapper
+
+    def timed_async(stage, fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                stage_time[stage] += time.perf_counter() - t0
+        return wrapper
+
+    store.build_chunk_records = timed_sync("chunk", store.build_chunk_records)
+    store._get_embeddings_batch = timed_async("embed", store._get_embeddings_batch)
+    store.write_chunks = timed_sync("write", store.write_chunks)
+
+
+async def run_sequential(store: MultiTenantChromaStoreManager, paths) -> dict:
+    stage_time = defaultdict(float)
+    _instrument(store, stage_time)
+    per_kind = defaultdict(lambda: {"docs": 0, "chunks": 0, "extract_s": 0.0, "bytes": 0})
+    chunks_total = 0
+    failed = 0
+
+    started = time.perf_counter()
+    for i, path in enumerate(paths):
+        kind = path.rsplit(".", 1)[-1]
+        t0 = time.perf_counter()
+        text = extract_text_from_upload(os.path.basename(path), path)
+        extract_s = time.perf_counter() - t0
+        stage_time["extract"] += extract_s
+
+        result = await store.add_document(
+            tenant_id=TENANT_ID,
+            collection_name=COLLECTION_NAME,
+            doc_id=f"doc-{i}",
+            text=text,
+            metadata={"filename": os.path.basename(path)},
+        )
+        if result.get("status") != "ok":
+            failed += 1
+            continue
+        chunks_total += result["chunks_indexed"]
+        stats = per_kind[kind]
+        stats["docs"] += 1
+        stats["chunks"] += result["chunks_indexed"]
+        stats["extract_s"] += extract_s
+        stats["bytes"] += os.path.getsize(path)
+    elapsed = time.perf_counter() - started
+
+    docs_ok = len(paths) - failed
+    return {
+        "mode": "sequential",
+        "documents": len(paths),
+        "documents_indexed": docs_ok,
+        "documents_failed": failed,
+        "chunks_indexed": chunks_total,
+        "elapsed_s": round(elapsed, 3),
+        "docs_per_s": round(docs_ok / elapsed, 3) if elapsed else 0.0,
+        "chunks_per_s": round(chunks_total / elapsed, 2) if elapsed else 0.0,
+        "stage_s": {k: round(v, 3) for k, v in stage_time.items()},
+        "per_kind": {k: {**v, "extract_s": round(v["extract_s"], 3)} for k, v in per_kind.items()},
+    }
+
+
+async def run_pipeline(store: MultiTenantChromaStoreManager, paths) -> dict:
+    items = [
+        {
+            "doc_id": f"doc-{i}",
+            "filename": os.path.basename(path),
+            "source": path,
+            "metadata": {"filename": os.path.basename(path)},
+        }
+        for i, path in enumerate(paths)
+    ]
+    result = await IngestionPipeline(store).run(TENANT_ID, COLLECTION_NAME, items)
+    stats = result["stats"]
+    failed = sum(1 for r in result["documents"].values() if r["status"] != "ok")
+    return {
+        "mode": "pipeline",
+        "documents": len(paths),
+        "documents_indexed": stats["documents_indexed"],
+        "documents_failed": failed,
+        "chunks_indexed": stats["chunks_indexed"],
+        "elapsed_s": stats["elapsed_s"],
+        "docs_per_s": round(stats["docs_per_minute"] / 60.0, 3),
+        "chunks_per_s": stats["chunks_per_second"],
+        "stage_s": stats["stage_busy_s"],
+    }
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs-per-kind", type=int, default=10)
+    parser.add_argument("--kinds", default=",".join(KINDS), help="comma-separated subset of pdf,docx,xlsx,csv")
+    parser.add_argument("--pages", type=int, default=5, help="PDF pages / DOCX size unit per document")
+    parser.add_argument("--rows", type=int, default=200, help="rows per XLSX sheet / CSV file")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mode", choices=["sequential", "pipeline"], default="sequential")
+    parser.add_argument("--embedder", choices=["fake", "bge-small"], default="fake")
+    parser.add_argument("--corpus-dir", help="reuse / keep the generated corpus here (default: temp dir)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    kinds = tuple(k.strip() for k in args.kinds.split(",") if k.strip())
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "corpus_dir")}
+
+    with tempfile.TemporaryDirectory(prefix="ingest_bench_") as tmp:
+        corpus_dir = args.corpus_dir or os.path.join(tmp, "corpus")
+        t0 = time.perf_counter()
+        paths = generate_corpus(corpus_dir, args.docs_per_kind, kinds, args.pages, args.rows, args.seed)
+        corpus_s = time.perf_counter() - t0
+
+        store = _make_store(os.path.join(tmp, "chroma"), args.embedder)
+        runner = run_sequential if args.mode == "sequential" else run_pipeline
+        results = asyncio.run(runner(store, paths))
+        results["corpus"] = {
+            "files": len(paths),
+            "bytes": sum(os.path.getsize(p) for p in paths),
+            "generate_s": round(corpus_s, 3),
+        }
+
+    report = build_report("ingest", config, results)
+    write_report(report, args.output)
+    return report
+
+
+if __name__ == "__main__":
+    main()
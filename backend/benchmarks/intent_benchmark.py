@@ -0,0 +1,94 @@
+"""
+Intent classification microbenchmark.
+
+Replays the recorded question corpus (benchmarks/data/intent_golden.jsonl) through
+infer_intent_rule_based and through the previous implementation's strategy (one
+`any(k in text ...)` scan per keyword table, same tables and order), and reports
+per-call latency percentiles for both plus the speedup as JSON.
+
+    cd backend
+    python -m benchmarks.intent_benchmark --repeat 200 --output intent.json
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-unused")  # llm_setup builds its client on import
+
+from benchmarks.common import build_report, percentiles_ms, write_report
+from LLM_Config import llm_pipeline as pipeline
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "data", "intent_golden.jsonl")
+
+
+def load_questions(path: str = GOLDEN_PATH) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def scan_baseline(user_message: str):
+    """The previous classifier: substring scans over each keyword list in turn."""
+    text = (user_message or "").lower().strip()
+    chart_only = any(p in text for p in pipeline.CHART_ONLY_PHRASES)
+    if any(x in text for x in pipeline.CHITCHAT_PHRASES):
+        return "CHITCHAT", "GENERAL", chart_only
+    if any(x in text for x in pipeline.CAPABILITIES_PHRASES):
+        return "CAPABILITIES", "GENERAL", chart_only
+
+    domain = "GENERAL"
+    for name, keywords in (
+        ("FINANCE", pipeline.FINANCE_KEYWORDS),
+        ("HR", pipeline.HR_KEYWORDS),
+        ("TECH", pipeline.TECH_KEYWORDS),
+        ("POLICY", pipeline.POLICY_KEYWORDS),
+    ):
+        if any(k in text for k in keywords):
+            domain = name
+            break
+
+    intent = "NEW_QUESTION"
+    for name, keywords in pipeline.INTENT_KEYWORDS:
+        if any(x in text for x in keywords):
+            intent = name
+            break
+    return intent, domain, chart_only
+
+
+def time_classifier(fn, questions: list, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        for q in questions:
+            started = time.perf_counter()
+            fn(q)
+            samples.append(time.perf_counter() - started)
+    return {**percentiles_ms(samples), "calls": len(samples), "total_s": round(sum(samples), 4)}
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=100, help="passes over the question corpus")
+    parser.add_argument("--questions-file", default=GOLDEN_PATH, help="JSONL with a 'question' field per line")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    questions = [r["question"] for r in load_questions(args.questions_file)]
+    mismatches = sum(
+        1 for q in questions if pipeline.infer_intent_rule_based(q) != scan_baseline(q)
+    )
+
+    results = {
+        "questions": len(questions),
+        "mismatches": mismatches,
+        "compiled": time_classifier(pipeline.infer_intent_rule_based, questions, args.repeat),
+        "baseline_scan": time_classifier(scan_baseline, questions, args.repeat),
+    }
+    results["speedup"] = round(results["baseline_scan"]["total_s"] / max(results["compiled"]["total_s"], 1e-9), 2)
+
+    report = build_report("intent", {k: v for k, v in vars(args).items() if k != "output"}, results)
+    write_report(report, args.output)
+    return report
+
+
+if __name__ == "__main__":
+    main()
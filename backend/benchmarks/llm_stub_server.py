@@ -0,0 +1,176 @@
+"""
+Local OpenAI-compatible chat-completions stub for offline load tests.
+
+Speaks POST /v1/chat/completions (streaming and non-streaming) and GET /v1/models,
+with configurable time-to-first-token, token rate and failure injection. Replies
+are shaped by what the pipeline asks for: the rerank call gets a JSON index array,
+the chart-spec call a valid chart spec, everything else a Markdown answer with a
+small table.
+
+    cd backend
+    python -m benchmarks.llm_stub_server --port 8901 --ttft-ms 300 --tokens-per-s 80 --failure-rate 0.02
+    OPENAI_API_BASE=http://127.0.0.1:8901/v1 OPENAI_API_KEY=stub uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+class StubConfig:
+    """Runtime knobs; defaults come from env so the app can also be run by uvicorn directly."""
+
+    def __init__(self):
+        self.ttft_ms = float(os.getenv("STUB_TTFT_MS", "250"))
+        self.tokens_per_s = float(os.getenv("STUB_TOKENS_PER_S", "80"))
+        self.response_tokens = int(os.getenv("STUB_RESPONSE_TOKENS", "200"))
+        self.failure_rate = float(os.getenv("STUB_FAILURE_RATE", "0"))
+        self.failure_status = int(os.getenv("STUB_FAILURE_STATUS", "500"))
+        self.abort_rate = float(os.getenv("STUB_ABORT_RATE", "0"))  # streams cut off mid-answer
+        self.seed = int(os.getenv("STUB_SEED", "42"))
+
+
+config = StubConfig()
+_rng = random.Random(config.seed)
+app = FastAPI(title="LLM stub")
+
+_ANSWER_WORDS = (
+    "Based on the retrieved documents the policy applies to all permanent employees "
+    "and requires manager approval before the request is submitted to HR for review"
+).split()
+
+_CHART_SPEC = {
+    "chart_type": "bar",
+    "title": "Revenue by quarter",
+    "x_field": "quarter",
+    "x_label": "Quarter",
+    "y_fields": ["revenue"],
+    "y_label": "Revenue",
+    "data": [
+        {"quarter": "Q1", "revenue": 1200},
+        {"quarter": "Q2", "revenue": 1500},
+        {"quarter": "Q3", "revenue": 1100},
+        {"quarter": "Q4", "revenue": 1800},
+    ],
+}
+
+
+def _reply_for(messages: list, max_tokens: int) -> str:
+    text = " ".join(str(m.get("content") or "") for m in messages)
+    if "Return a JSON array of indices" in text:
+        return "[0, 1, 2, 3, 4]"
+    if "Assistant Markdown answer" in text:
+        return json.dumps(_CHART_SPEC)
+
+    n = max(1, min(max_tokens or config.response_tokens, config.response_tokens))
+    words = [_ANSWER_WORDS[i % len(_ANSWER_WORDS)] for i in range(max(n - 30, 1))]
+    table = "\n\n| Quarter | Revenue |\n|---|---|\n| Q1 | 1,200 |\n| Q2 | 1,500 |\n"
+    return "## Answer\n\n" + " ".join(words) + "." + table
+
+
+def _tokens(content: str) -> list:
+    # Roughly one token per word, keeping the separators so the stream reassembles exactly
+    parts = content.split(" ")
+    return [p if i == 0 else " " + p for i, p in enumerate(parts)]
+
+
+def _should_fail() -> bool:
+    return config.failure_rate > 0 and _rng.random() < config.failure_rate
+
+
+def _error_response() -> JSONResponse:
+    return JSONResponse(
+        status_code=config.failure_status,
+        content={"error": {"message": "Injected stub failure", "type": "server_error", "code": None}},
+    )
+
+
+@app.get("/v1/models")
+async def list_models():
+    return {"object": "list", "data": [{"id": m, "object": "model"} for m in ("gpt-4.1-mini", "gpt-4o-mini")]}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "stub")
+    content = _reply_for(body.get("messages") or [], body.get("max_tokens") or 0)
+    tokens = _tokens(content)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+    created = int(time.time())
+    per_token_s = 1.0 / config.tokens_per_s if config.tokens_per_s > 0 else 0.0
+
+    if _should_fail():
+        await asyncio.sleep(config.ttft_ms / 1000.0)
+        return _error_response()
+
+    if not body.get("stream"):
+        await asyncio.sleep(config.ttft_ms / 1000.0 + per_token_s * len(tokens))
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+            ],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+        }
+
+    abort_at = _rng.randint(1, max(len(tokens) - 1, 1)) if _rng.random() < config.abort_rate else None
+
+    def chunk(delta: dict, finish_reason=None) -> str:
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(payload)}\n\n"
+
+    async def events():
+        await asyncio.sleep(config.ttft_ms / 1000.0)
+        yield chunk({"role": "assistant", "content": ""})
+        for i, token in enumerate(tokens):
+            if abort_at is not None and i == abort_at:
+                return  # connection closes without finish_reason / [DONE]
+            yield chunk({"content": token})
+            if per_token_s:
+                await asyncio.sleep(per_token_s)
+        yield chunk({}, finish_reason="stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def main(argv=None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--ttft-ms", type=float, default=config.ttft_ms)
+    parser.add_argument("--tokens-per-s", type=float, default=config.tokens_per_s, help="0 = no delay between tokens")
+    parser.add_argument("--response-tokens", type=int, default=config.response_tokens)
+    parser.add_argument("--failure-rate", type=float, default=config.failure_rate, help="share of requests answered with an error")
+    parser.add_argument("--failure-status", type=int, default=config.failure_status)
+    parser.add_argument("--abort-rate", type=float, default=config.abort_rate, help="share of streams cut off mid-answer")
+    parser.add_argument("--seed", type=int, default=config.seed)
+    args = parser.parse_args(argv)
+
+    for key in ("ttft_ms", "tokens_per_s", "response_tokens", "failure_rate", "failure_status", "abort_rate", "seed"):
+        setattr(config, key, getattr(args, key))
+    _rng.seed(config.seed)
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Retrieval latency / recall benchmark for MultiTenantChromaStoreManager.query_policies.
+
+Builds a synthetic tenant (N collections, M chunks spread evenly, deterministic
+text + year metadata), replays a query set and reports, per setting:
+- p50 / p95 / p99 latency of query_policies,
+- recall@k against exact brute-force top-k over the same candidate set
+  (same collections and where filter), i.e. what the ANN index + per-collection
+  merge loses,
+- target_hit@k: share of queries whose source chunk is in the top-k.
+
+    cd backend
+    python -m benchmarks.retrieval_benchmark --collections 1,10 --chunks 10000 --top-k 5,20
+    python -m benchmarks.retrieval_benchmark --collections 100 --chunks 1000000 --where none,year --output r.json
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from benchmarks.common import build_report, percentiles_ms, write_report
+from benchmarks.fake_embedder import HashEmbeddingService
+from Vector_setup.base.db_setup_management import MultiTenantChromaStoreManager
+
+TENANT_ID = "benchtenant"
+YEARS = (2021, 2022, 2023, 2024)
+FILTER_YEAR = 2023
+BUILD_BATCH = 5000
+
+
+class SyntheticTenant:
+    """Deterministic chunk texts grouped by topic, so queries have near and far neighbours."""
+
+    def __init__(self, n_chunks: int, n_topics: int = 64, seed: int = 42):
+        self.rng = random.Random(seed)
+        general = [f"w{i}" for i in range(2000)]
+        self.topics = [self.rng.sample(general, 40) for _ in range(n_topics)]
+        self.general = general
+        self.n_chunks = n_chunks
+
+    def chunk(self, i: int) -> tuple:
+        rng = random.Random(i * 7919 + 1)
+        topic = self.topics[i % len(self.topics)]
+        words = [rng.choice(topic) if rng.random() < 0.7 else rng.choice(self.general) for _ in range(40)]
+        return " ".join(words), YEARS[i % len(YEARS)]
+
+    def query_for(self, i: int) -> str:
+        text, _ = self.chunk(i)
+        rng = random.Random(f"q{i}")
+        return " ".join(rng.sample(text.split(), 10))
+
+
+def _make_store(persist_dir: str, embedder: str) -> MultiTenantChromaStoreManager:
+    if embedder == "fake":
+        return MultiTenantChromaStoreManager(persist_dir, embedding_service=HashEmbeddingService())
+    return MultiTenantChromaStoreManager(persist_dir)
+
+
+def build_tenant(store, tenant: SyntheticTenant, n_collections: int):
+    """Index all chunks; returns (collection names, embedding matrix, year per row)."""
+    names = [f"col{c:03d}" for c in range(n_collections)]
+    per_col = max(1, tenant.n_chunks // n_collections)
+    dim = len(store.embed_texts(["probe"])[0])
+    matrix = np.zeros((per_col * n_collections, dim), dtype=np.float32)
+    year_of = np.zeros(len(matrix), dtype=np.int32)
+
+    row = 0
+    for name in names:
+        for start in range(0, per_col, BUILD_BATCH):
+            idxs = range(row + start, row + min(start + BUILD_BATCH, per_col))
+            texts, years = zip(*(tenant.chunk(i) for i in idxs))
+            embeddings = store.embed_texts(list(texts))
+            store.write_chunks(
+                TENANT_ID,
+                name,
+                ids=[f"doc{i}__chunk_0" for i in idxs],
+                documents=list(texts),
+                embeddings=embeddings,
+                metadatas=[{"doc_id": f"doc{i}", "year": y, "chunk_index": 0} for i, y in zip(idxs, years)],
+            )
+            matrix[idxs.start: idxs.stop] = np.asarray(embeddings, dtype=np.float32)
+            year_of[idxs.start: idxs.stop] = years
+        row += per_col
+    return names, matrix, year_of
+
+
+def exact_top_k(matrix, candidates: np.ndarray, q: np.ndarray, k: int) -> set:
+    idx = np.nonzero(candidates)[0]
+    if not len(idx):
+        return set()
+    # Embeddings are L2-normalized: smallest L2 distance == largest dot product
+    scores = matrix[idx] @ q
+    k = min(k, len(idx))
+    top = idx[np.argpartition(-scores, k - 1)[:k]]
+    return {f"doc{i}__chunk_0" for i in top}
+
+
+async def replay(store, tenant, names, matrix, year_of, n_queries, top_k, where_mode, seed) -> dict:
+    where = {"year": FILTER_YEAR} if where_mode == "year" else None
+    candidates = np.ones(len(matrix), dtype=bool)
+    if where:
+        candidates &= year_of == FILTER_YEAR
+
+    # Query sources are drawn from the rows the filter allows, so target_hit stays meaningful
+    pool = np.nonzero(candidates)[0].tolist()
+    targets = random.Random(seed).sample(pool, min(n_queries, len(pool)))
+
+    latencies: List[float] = []
+    recalls: List[float] = []
+    target_hits = 0
+    for t in targets:
+        query = tenant.query_for(t)
+        t0 = time.perf_counter()
+        result = await store.query_policies(
+            tenant_id=TENANT_ID,
+            collection_name=None,
+            query=query,
+            top_k=top_k,
+            where=where,
+            collection_names=names,
+        )
+        latencies.append(time.perf_counter() - t0)
+
+        got = {h["id"] for h in result["results"]}
+        q = np.asarray(store.embed_texts([query])[0], dtype=np.float32)
+        truth = exact_top_k(matrix, candidates, q, top_k)
+        recalls.append(len(got & truth) / len(truth) if truth else 1.0)
+        target_hits += f"doc{t}__chunk_0" in got
+
+    return {
+        **percentiles_ms(latencies),
+        "qps": round(len(latencies) / sum(latencies), 2) if latencies else 0.0,
+        "recall_at_k": round(float(np.mean(recalls)), 4) if recalls else None,
+        "target_hit_at_k": round(target_hits / len(targets), 4) if targets else None,
+        "queries": len(targets),
+    }
+
+
+def _ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collections", default="1,10", help="comma-separated collection counts (1-100)")
+    parser.add_argument("--chunks", default="10000", help="comma-separated total chunk counts (10k-1M)")
+    parser.add_argument("--top-k", default="5,20", help="comma-separated top_k values")
+    parser.add_argument("--where", default="none,year", help="filters to test: none, year")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--embedder", choices=["fake", "bge-small"], default="fake")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    settings = []
+    for n_chunks in _ints(args.chunks):
+        for n_collections in _ints(args.collections):
+            with tempfile.TemporaryDirectory(prefix="retrieval_bench_") as tmp:
+                store = _make_store(os.path.join(tmp, "chroma"), args.embedder)
+                tenant = SyntheticTenant(n_chunks, seed=args.seed)
+
+                t0 = time.perf_counter()
+                names, matrix, year_of = build_tenant(store, tenant, n_collections)
+                build_s = time.perf_counter() - t0
+
+                for top_k in _ints(args.top_k):
+                    for where_mode in [w.strip() for w in args.where.split(",") if w.strip()]:
+                        stats = asyncio.run(
+                            replay(store, tenant, names, matrix, year_of,
+                                   args.queries, top_k, where_mode, args.seed)
+                        )
+                        settings.append({
+                            "chunks": len(matrix),
+                            "collections": n_collections,
+                            "top_k": top_k,
+                            "where": where_mode,
+                            "build_s": round(build_s, 2),
+                            **stats,
+                        })
+
+    config = {k: v for k, v in vars(args).items() if k != "output"}
+    report = build_report("retrieval", config, settings)
+    write_report(report, args.output)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Load generator for /api/query/stream (SSE).
+
+Runs N concurrent workers, each opening streaming sessions back to back, and
+reports time-to-first-token (first `event: token`), total latency (until
+`event: done` or end of stream), tokens and throughput per worker and overall.
+
+    cd backend
+    python -m benchmarks.sse_load_generator --base-url http://127.0.0.1:8000 \
+        --token "$JWT" --concurrency 20 --requests-per-worker 10 --output load.json
+
+Pair with benchmarks.llm_stub_server (OPENAI_API_BASE pointed at it) to test the
+whole pipeline offline.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from typing import List, Optional
+
+import aiohttp
+
+from benchmarks.common import build_report, percentiles_ms, write_report
+
+DEFAULT_QUESTIONS = [
+    "What is the annual leave policy?",
+    "Summarize the travel reimbursement rules.",
+    "What was total revenue in 2023 by department?",
+    "Who approves overtime requests?",
+    "Show the expense trend by month as a chart.",
+]
+
+
+async def run_session(session: aiohttp.ClientSession, args, question: str) -> dict:
+    params = {"question": question, "conversation_id": str(uuid.uuid4()), "top_k": args.top_k}
+    if args.collection_name:
+        params["collection_name"] = args.collection_name
+    headers = {"Authorization": f"Bearer {args.token}", "Accept": "text/event-stream"}
+
+    started = time.perf_counter()
+    ttft: Optional[float] = None
+    tokens = 0
+    done = False
+    event = None
+    try:
+        async with session.get(f"{args.base_url}/api/query/stream", params=params, headers=headers) as resp:
+            if resp.status != 200:
+                return {"ok": False, "error": f"HTTP {resp.status}", "latency_s": time.perf_counter() - started}
+            async for raw in resp.content:
+                line = raw.decode("utf-8", errors="ignore").rstrip("\r\n")
+                if line.startswith("event:"):
+                    event = line[6:].strip()
+                elif line.startswith("data:") and event == "token":
+                    if ttft is None:
+                        ttft = time.perf_counter() - started
+                    tokens += 1
+                elif line.startswith("data:") and event == "done":
+                    done = True
+                    break
+                elif not line:
+                    event = None
+    except Exception as exc:
+        return {"ok": False, "error": type(exc).__name__, "latency_s": time.perf_counter() - started}
+
+    return {
+        "ok": done and ttft is not None,
+        "error": None if done else "stream ended without done event",
+        "ttft_s": ttft,
+        "latency_s": time.perf_counter() - started,
+        "tokens": tokens,
+    }
+
+
+async def worker(worker_id: int, args, questions: List[str]) -> dict:
+    timeout = aiohttp.ClientTimeout(total=args.timeout_s)
+    results = []
+    started = time.perf_counter()
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        for i in range(args.requests_per_worker):
+            question = questions[(worker_id + i) % len(questions)]
+            results.append(await run_session(session, args, question))
+    return {"worker": worker_id, "elapsed_s": time.perf_counter() - started, "sessions": results}
+
+
+def _summarize(sessions: List[dict], elapsed_s: float) -> dict:
+    ok = [s for s in sessions if s["ok"]]
+    tokens = sum(s.get("tokens", 0) for s in ok)
+    errors: dict = {}
+    for s in sessions:
+        if not s["ok"]:
+            errors[s["error"]] = errors.get(s["error"], 0) + 1
+    return {
+        "sessions": len(sessions),
+        "succeeded": len(ok),
+        "errors": errors,
+        "ttft": percentiles_ms([s["ttft_s"] for s in ok]),
+        "latency": percentiles_ms([s["latency_s"] for s in ok]),
+        "tokens": tokens,
+        "sessions_per_s": round(len(ok) / elapsed_s, 3) if elapsed_s else 0.0,
+        "tokens_per_s": round(tokens / elapsed_s, 2) if elapsed_s else 0.0,
+    }
+
+
+async def run(args) -> dict:
+    questions = DEFAULT_QUESTIONS
+    if args.questions_file:
+        with open(args.questions_file, encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+
+    started = time.perf_counter()
+    per_worker = await asyncio.gather(*(worker(w, args, questions) for w in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    all_sessions = [s for w in per_worker for s in w["sessions"]]
+    return {
+        "overall": {**_summarize(all_sessions, elapsed), "elapsed_s": round(elapsed, 3)},
+        "per_worker": [
+            {"worker": w["worker"], **_summarize(w["sessions"], w["elapsed_s"])} for w in per_worker
+        ],
+    }
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--token", required=True, help="JWT of a user with access to the target collections")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests-per-worker", type=int, default=5)
+    parser.add_argument("--collection-name")
+    parser.add_argument("--top-k", type=int, default=100)
+    parser.add_argument("--questions-file", help="one question per line (default: built-in set)")
+    parser.add_argument("--timeout-s", type=float, default=180.0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    config = {k: v for k, v in vars(args).items() if k not in ("token", "output")}
+    report = build_report("sse_load", config, results)
+    write_report(report, args.output)
+    return report
+
+
+if __name__ == "__main__":
+    main()
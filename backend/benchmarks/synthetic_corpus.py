@@ -0,0 +1,122 @@
+"""
+Deterministic synthetic document corpora for benchmarks.
+
+The same (seed, sizes) always produce byte-identical text content, so ingest
+numbers are comparable across commits.
+"""
+import csv
+import os
+import random
+from pathlib import Path
+from typing import List
+
+import fitz  # PyMuPDF
+import pandas as pd
+from docx import Document
+
+
+KINDS = ("pdf", "docx", "xlsx", "csv")
+
+_WORDS = (
+    "policy employee leave annual sick maternity paternity salary bonus payroll "
+    "revenue expense budget forecast quarter audit compliance contract vendor "
+    "invoice procurement security access password device laptop travel claim "
+    "reimbursement approval manager director department finance hr engineering "
+    "sales marketing customer onboarding training benefit pension insurance "
+    "overtime holiday remote office schedule report review target performance"
+).split()
+
+_DEPARTMENTS = ["HR", "Finance", "Engineering", "Sales", "Marketing", "Operations"]
+
+
+def _sentence(rng: random.Random, n_words: int = 14) -> str:
+    words = [rng.choice(_WORDS) for _ in range(n_words)]
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraphs(rng: random.Random, n: int) -> List[str]:
+    return [" ".join(_sentence(rng) for _ in range(rng.randint(3, 6))) for _ in range(n)]
+
+
+def _write_pdf(path: Path, rng: random.Random, pages: int) -> None:
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page()
+        text = "\n\n".join(_paragraphs(rng, 4))
+        page.insert_textbox(fitz.Rect(50, 50, 550, 800), text, fontsize=9)
+    doc.save(str(path))
+    doc.close()
+
+
+def _write_docx(path: Path, rng: random.Random, pages: int) -> None:
+    doc = Document()
+    for p in _paragraphs(rng, pages * 4):
+        doc.add_paragraph(p)
+    table = doc.add_table(rows=4, cols=3)
+    for row in table.rows:
+        for cell in row.cells:
+            cell.text = rng.choice(_WORDS)
+    doc.save(str(path))
+
+
+def _table_rows(rng: random.Random, rows: int) -> List[dict]:
+    out = []
+    for i in range(rows):
+        year = 2021 + (i * 3 // max(rows, 1))
+        month = i % 12 + 1
+        out.append({
+            "Date": f"{year}-{month:02d}-01",
+            "Department": rng.choice(_DEPARTMENTS),
+            "Revenue": round(rng.uniform(1_000, 50_000), 2),
+            "Expense": round(rng.uniform(500, 40_000), 2),
+            "Note": _sentence(rng, 6),
+        })
+    return out
+
+
+def _write_xlsx(path: Path, rng: random.Random, rows: int) -> None:
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        pd.DataFrame(_table_rows(rng, rows)).to_excel(writer, sheet_name="Ledger", index=False)
+        pd.DataFrame(_table_rows(rng, max(rows // 4, 1))).to_excel(writer, sheet_name="Summary", index=False)
+
+
+def _write_csv(path: Path, rng: random.Random, rows: int) -> None:
+    data = _table_rows(rng, rows)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(data[0].keys()))
+        writer.writeheader()
+        writer.writerows(data)
+
+
+def generate_corpus(
+    out_dir: str,
+    docs_per_kind: int = 5,
+    kinds=KINDS,
+    pages: int = 5,
+    rows: int = 200,
+    seed: int = 42,
+) -> List[str]:
+    """
+    Write `docs_per_kind` files of each kind into out_dir and return their paths.
+
+    - pages: PDF pages / DOCX size unit (4 paragraphs each)
+    - rows: data rows per XLSX sheet / CSV file
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths: List[str] = []
+    for kind in kinds:
+        for i in range(docs_per_kind):
+            rng = random.Random(f"{seed}-{kind}-{i}")
+            path = Path(out_dir) / f"synthetic_{kind}_{i:04d}.{kind}"
+            if kind == "pdf":
+                _write_pdf(path, rng, pages)
+            elif kind == "docx":
+                _write_docx(path, rng, pages)
+            elif kind == "xlsx":
+                _write_xlsx(path, rng, rows)
+            elif kind == "csv":
+                _write_csv(path, rng, rows)
+            else:
+                raise ValueError(f"Unknown corpus kind: {kind}")
+            paths.append(str(path))
+    return paths